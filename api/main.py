@@ -5,6 +5,7 @@ RESTful API providing endpoints for the basketball coaching application.
 """
 import sys
 import os
+import io
 
 # Add src to path
 sys.path.append(os.path.abspath("src"))
@@ -13,14 +14,17 @@ import logging
 from contextlib import asynccontextmanager
 from typing import Optional
 
+import pyarrow as pa
 import uvicorn
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 from bbcoach.config import settings
 from bbcoach.core import CoachService, AnalyticsService, DataService
+from bbcoach.data.dtypes import to_records
+from bbcoach.data.query import QueryError
 from bbcoach.data.scrapers import main as scrape_all
 
 logger = logging.getLogger(__name__)
@@ -53,6 +57,25 @@ class MatchupRequest(BaseModel):
     season: int
 
 
+class SimulationRequest(BaseModel):
+    team_a_id: str
+    team_b_id: str
+    season: int
+    simulations: int = Field(100_000, ge=1, le=1_000_000)
+    seed: Optional[int] = 0
+    league: Optional[str] = None
+
+
+class QueryRequest(BaseModel):
+    sql: str
+    params: Optional[list] = None
+    max_rows: Optional[int] = None
+
+
+class MentionRequest(BaseModel):
+    text: str
+
+
 class PlayerRequest(BaseModel):
     player_names: list[str]
     season: int
@@ -127,11 +150,12 @@ async def get_data_status():
 
 
 @app.get("/api/data/refresh")
-async def refresh_data_cache():
-    """Clear and reload data cache."""
-    data_service.clear_cache()
+async def refresh_data_cache(background_tasks: BackgroundTasks):
+    """Reload the data cache in the background (requests keep the current data meanwhile)."""
+    background_tasks.add_task(data_service.reload, force=True)
+    analytics_service.matchup_cache.clear()
     status = data_service.get_data_status()
-    return {"message": "Cache refreshed", "status": status}
+    return {"message": "Cache refresh started", "status": status}
 
 
 @app.post("/api/data/fetch")
@@ -160,7 +184,9 @@ async def fetch_latest_data(background_tasks: BackgroundTasks):
         try:
             players_count, teams_count = scrape_all(progress_callback=update_progress)
             data_service.update_metadata()
-            data_service.clear_cache()  # Force reload from disk
+            # Build the new data off to the side; requests are served from
+            # the previous version until it is swapped in
+            data_service.reload()
             scraping_progress["status"] = "idle"
         except Exception as e:
             scraping_progress["status"] = "error"
@@ -173,6 +199,71 @@ async def fetch_latest_data(background_tasks: BackgroundTasks):
         "status": data_service.get_data_status()
     }
 
+@app.get("/api/data/snapshots")
+async def get_snapshots(dataset: str = Query("players", description="Dataset name")):
+    """List the recorded snapshots of a dataset."""
+    if dataset not in ("players", "teams", "schedule"):
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    return {"dataset": dataset, "snapshots": data_service.list_snapshots(dataset)}
+
+
+class ArrowStreamResponse(StreamingResponse):
+    """
+    A query result as an Arrow IPC stream.
+
+    The result is closed (releasing its read locks) however the response
+    ends, including when the client disconnects mid-stream.
+    """
+
+    media_type = "application/vnd.apache.arrow.stream"
+
+    def __init__(self, reader):
+        self.reader = reader
+        super().__init__(self._chunks())
+
+    def _chunks(self):
+        # Each batch is sent as soon as it is written
+        sink = io.BytesIO()
+        try:
+            with pa.ipc.new_stream(sink, self.reader.schema) as writer:
+                for batch in self.reader:
+                    writer.write_batch(batch)
+                    yield _drain(sink)
+            yield _drain(sink)
+        except QueryError as e:
+            # Headers are sent already: end the stream early
+            logger.error(f"Query failed while streaming: {e}")
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.reader.close()
+
+
+@app.post("/api/data/query")
+def run_query(request: QueryRequest):
+    """Run a read-only SQL query and stream the result as an Arrow IPC stream."""
+    if not settings.sql_query_enabled:
+        raise HTTPException(status_code=403, detail="SQL queries are disabled")
+    max_rows = settings.sql_query_max_rows
+    if request.max_rows is not None:
+        max_rows = max(0, min(request.max_rows, max_rows))
+    try:
+        reader = data_service.query(request.sql, request.params, max_rows=max_rows)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ArrowStreamResponse(reader)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
 @app.get("/api/data/fetch-progress")
 async def get_fetch_progress():
     """Return the current data scraping execution progress."""
@@ -196,15 +287,90 @@ async def get_teams(
     return {"season": season, "league": league, "teams": teams}
 
 
+@app.get("/api/stats/metrics")
+async def get_metrics():
+    """List the metrics players can be ranked by."""
+    return {"metrics": analytics_service.get_metrics()}
+
+
 @app.get("/api/stats/top-players", response_class=ORJSONResponse)
 async def get_top_players(
-    season: int, league: str = "Men", metric: str = "PPG", limit: int = 10
+    season: int,
+    league: str = "Men",
+    metric: str = "PPG",
+    limit: int = 10,
+    as_of: Optional[str] = Query(None, description="Timestamp or snapshot seq"),
 ):
-    """Get top players for a specific metric."""
-    players = analytics_service.get_top_players(season, league, metric, limit)
+    """Get top players for a specific metric, optionally as of a past snapshot."""
+    if metric not in analytics_service.get_metrics():
+        raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+    try:
+        players = analytics_service.get_top_players(season, league, metric, limit, as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid as_of: {e}")
     return {"season": season, "league": league, "metric": metric, "players": players}
 
 
+@app.get("/api/stats/player-deltas", response_class=ORJSONResponse)
+async def get_player_deltas(
+    start: str = Query(..., description="Earlier timestamp or snapshot seq"),
+    end: str = Query(..., description="Later timestamp or snapshot seq"),
+    season: Optional[int] = None,
+    league: Optional[str] = None,
+    metrics: Optional[list[str]] = Query(None, description="Stats to compare"),
+):
+    """Get per-player stat changes between two snapshots."""
+    try:
+        players = analytics_service.get_player_deltas(start, end, season, league, metrics)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid snapshot bound: {e}")
+    return {"start": start, "end": end, "players": players}
+
+
+@app.get("/api/stats/player/{player_id}/similar", response_class=ORJSONResponse)
+async def get_similar_players(
+    player_id: str,
+    k: int = Query(10, ge=1, le=100),
+    season: Optional[int] = Query(None, description="The player's season to match (default: latest)"),
+    league: Optional[str] = Query(None, description="League to search (default: all)"),
+    target_season: Optional[int] = Query(None, description="Season to search (default: all)"),
+    min_games: Optional[int] = None,
+):
+    """Find players with the most similar standardized stats."""
+    players = analytics_service.similar_players(
+        player_id, k, season, league, target_season, min_games
+    )
+    if players is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return {"player_id": player_id, "players": players}
+
+
+@app.get("/api/stats/standings", response_class=ORJSONResponse)
+async def get_standings(season: int, league: str = "Men"):
+    """League table with W-L, home/away splits, point differential, form and streak."""
+    return {
+        "season": season,
+        "league": league,
+        "standings": analytics_service.get_standings(season, league),
+    }
+
+
+@app.get("/api/stats/names/resolve")
+async def resolve_name(
+    q: str,
+    kind: str = Query("player", pattern="^(player|team)$"),
+    limit: int = Query(5, ge=1, le=50),
+):
+    """Players or teams matching a possibly misspelled, accent-free name."""
+    return {"query": q, "matches": analytics_service.resolve_name(q, kind, limit)}
+
+
+@app.post("/api/stats/names/mentions")
+async def find_mentions(request: MentionRequest):
+    """Players and teams named in a piece of text."""
+    return {"mentions": analytics_service.find_mentions(request.text)}
+
+
 @app.get("/api/stats/team/{team_id}", response_class=ORJSONResponse)
 async def get_team_stats(team_id: str, season: int = Query(...)):
     """Get team statistics."""
@@ -222,7 +388,13 @@ async def compare_players(request: PlayerRequest):
     )
     if comparison is None:
         raise HTTPException(status_code=404, detail="Players not found")
-    return comparison.to_dict(orient="records")
+    # Each player also gets their league percentiles and z-scores
+    return [
+        {**record, **ranks}
+        for record, ranks in zip(
+            to_records(comparison), analytics_service.percentile_ranks(comparison)
+        )
+    ]
 
 
 # Analytics endpoints
@@ -241,6 +413,9 @@ async def predict_matchup(request: MatchupRequest):
         "team_b_id": request.team_b_id,
         "season": request.season,
         "analysis": analysis,
+        "ratings": analytics_service.matchup_ratings(
+            request.team_a_id, request.team_b_id, request.season
+        ),
     }
 
 
@@ -257,6 +432,55 @@ async def predict_multi_season_matchup(request: MultiMatchupRequest):
     }
 
 
+@app.post("/api/analytics/simulate-matchup", response_class=ORJSONResponse)
+async def simulate_matchup(request: SimulationRequest):
+    """Simulate games between two teams (win probability and score quantiles)."""
+    simulation = analytics_service.simulate_matchup(
+        request.team_a_id, request.team_b_id, request.season,
+        request.simulations, request.seed, request.league,
+    )
+    if simulation is None:
+        raise HTTPException(
+            status_code=404, detail="Simulation failed - check team IDs and season"
+        )
+    return {
+        "team_a_id": request.team_a_id,
+        "team_b_id": request.team_b_id,
+        "season": request.season,
+        **simulation,
+    }
+
+
+@app.get("/api/analytics/ratings", response_class=ORJSONResponse)
+async def get_ratings(season: Optional[int] = None, league: Optional[str] = None):
+    """Elo and SRS team ratings from completed games."""
+    return {"ratings": analytics_service.get_ratings(season, league)}
+
+
+@app.get("/api/analytics/ratings/{team_id}/history", response_class=ORJSONResponse)
+async def get_rating_history(team_id: str, season: Optional[int] = None):
+    """A team's games with its Elo rating after each one."""
+    history = analytics_service.get_rating_history(team_id, season)
+    if not history:
+        raise HTTPException(status_code=404, detail="No rated games for team")
+    return {"team_id": team_id, "games": history}
+
+
+@app.get("/api/analytics/matchup-matrix", response_class=ORJSONResponse)
+async def get_matchup_matrix(season: int, league: str = "Men"):
+    """Stat edges of every team pair in a season (row team over column team)."""
+    matrix = analytics_service.matchup_matrix(season, league)
+    if matrix is None:
+        raise HTTPException(status_code=404, detail="No teams found for season")
+    return matrix
+
+
+@app.get("/api/analytics/cache")
+async def get_analytics_cache():
+    """Hit/miss counters of the matchup prediction cache."""
+    return analytics_service.matchup_cache.info()
+
+
 # Coach/AI endpoints
 @app.post("/api/coach/ask")
 async def ask_coach(request: CoachRequest):
@@ -272,6 +496,17 @@ async def ask_coach(request: CoachRequest):
             stats = analytics_service.get_team_stats(request.team_id, request.season)
             if stats:
                 resolved_context = f"Team Statistics ({request.season}):\n{stats}\n\n" + resolved_context
+            standing = analytics_service.get_team_standing(request.team_id, request.season)
+            if standing:
+                record = (
+                    f"Standing ({request.season}): #{standing['rank']}, "
+                    f"{standing['wins']}-{standing['losses']} "
+                    f"(home {standing['home_wins']}-{standing['home_losses']}, "
+                    f"away {standing['away_wins']}-{standing['away_losses']}), "
+                    f"point diff {standing['point_diff']:+.0f}, "
+                    f"last {len(standing['form'])}: {standing['form']}, streak {standing['streak']}"
+                )
+                resolved_context = f"{record}\n\n" + resolved_context
 
         response = coach_service.ask(request.question, resolved_context)
         model_info = coach_service.get_model_info()
@@ -4,6 +4,7 @@ import sys
 import os
 import json
 import datetime
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,7 +12,20 @@ load_dotenv()
 # Add src to path
 sys.path.append(os.path.abspath("src"))
 
-from bbcoach.data.storage import load_players, load_teams, load_schedule  # noqa: E402
+from bbcoach.data.storage import (  # noqa: E402
+    load_players,
+    load_teams,
+    load_schedule,
+    dataset_exists,
+    dataset_mtime,
+    dataset_version,
+)
+from bbcoach.data.locking import atomic_write_json  # noqa: E402
+from bbcoach.data.names import NameIndex  # noqa: E402
+from bbcoach.data.percentiles import Percentiles  # noqa: E402
+from bbcoach.data.player_index import PlayerIndex  # noqa: E402
+from bbcoach.data.ratings import RatingEngine, completed_games  # noqa: E402
+from bbcoach.data.schedule import ScheduleIndex  # noqa: E402
 from bbcoach.ui.components import (  # noqa: E402
     render_player_card,
     render_comparison_chart,
@@ -19,8 +33,9 @@ from bbcoach.ui.components import (  # noqa: E402
 
 # Lazy load AI model to avoid long startup time if not needed immediately
 # from bbcoach.ai.coach import BasketballCoach
-from bbcoach.analysis import predict_matchup  # noqa: E402
+from bbcoach.analysis import compute_all_team_aggregates, predict_matchup  # noqa: E402
 from bbcoach.rag.pipeline import RAGPipeline  # noqa: E402
+from bbcoach.simulation import simulate_matchup  # noqa: E402
 
 st.set_page_config(
     page_title="Swedish Basketball League Coach", layout="wide", page_icon="🏀"
@@ -183,14 +198,14 @@ with st.sidebar:
             pass
 
     # 3. Robust Data Check
-    data_exists = os.path.exists("data_storage/players.parquet")
+    data_exists = dataset_exists("players")
 
     if data_exists and last_update == "Never":
         try:
             # Metadata missing, but data exists.
             # Try to get file timestamp, otherwise default to NOW to fix user issue.
-            if os.path.exists("data_storage/players.parquet"):
-                ts = os.path.getmtime("data_storage/players.parquet")
+            ts = dataset_mtime("players")
+            if ts is not None:
                 last_dt = datetime.datetime.fromtimestamp(ts)
             else:
                 last_dt = datetime.datetime.now()
@@ -202,8 +217,9 @@ with st.sidebar:
                 is_fresh = True
 
             # Create the missing metadata file
-            with open("data_storage/metadata.json", "w") as f:
-                json.dump({"last_updated": last_update}, f)
+            atomic_write_json(
+                Path("data_storage/metadata.json"), {"last_updated": last_update}
+            )
         except Exception:
             # If all else fails but data exists, just say it's updated now
             last_update = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -314,18 +330,72 @@ with st.sidebar:
         st.success("Context Cleared! (Coach persona remains)")
 
 
-@st.cache_data(ttl=60)  # Cache for 60 seconds
-def get_data():
+# Keyed on the data version, so a scrape from any process is picked up on
+# the next rerun and unchanged data is never reloaded
+@st.cache_data(max_entries=2)
+def get_data(version: str):
     players = load_players()
     teams = load_teams()
     return players, teams
 
 
+@st.cache_resource(max_entries=2)
+def get_schedule_index(version: str):
+    # Sorted once per load; per-team lookups are binary searches
+    return ScheduleIndex(load_schedule())
+
+
+@st.cache_resource(max_entries=2)
+def get_completed_games(version: str):
+    # One row per played game, parsed once for the simulator
+    return completed_games(load_schedule())
+
+
+@st.cache_resource
+def get_latest_rating_engine():
+    # Last engine built, shared by every session
+    return {"engine": RatingEngine()}
+
+
+@st.cache_resource(max_entries=2)
+def get_rating_engine(version: str):
+    # Elo/SRS from the schedule's completed games; a new version only rates
+    # the games added since the last engine (see RatingEngine.update)
+    latest = get_latest_rating_engine()
+    latest["engine"] = latest["engine"].update(load_schedule())
+    return latest["engine"]
+
+
+@st.cache_resource(max_entries=2)
+def get_player_names(version: str):
+    # Accent-insensitive mention extraction for the coach chat
+    return NameIndex.for_players(get_data(version)[0])
+
+
+@st.cache_resource(max_entries=2)
+def get_percentiles(version: str):
+    # League distributions for the normalized radar chart
+    return Percentiles(PlayerIndex(get_data(version)[0]))
+
+
+@st.cache_resource(max_entries=2)
+def get_team_aggregates_table(version: str):
+    # Every team-season aggregated in one pass; matchups are lookups
+    return compute_all_team_aggregates(get_data(version)[0])
+
+
 if st.sidebar.button("Refresh Data"):
     st.cache_data.clear()
+    get_schedule_index.clear()
+    get_team_aggregates_table.clear()
+    get_percentiles.clear()
+    get_player_names.clear()
+    get_rating_engine.clear()
+    get_completed_games.clear()
     st.rerun()
 
-players_df, teams_df = get_data()
+data_version = f"{dataset_version('players')}/{dataset_version('teams')}"
+players_df, teams_df = get_data(data_version)
 
 # --- LEAGUE FILTER ---
 # Ensure "league" column exists (backwards compatibility handled in storage.py but good to be safe)
@@ -385,7 +455,8 @@ tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
 with tab5:
     st.title("📅 Game Schedule")
 
-    schedule_df = load_schedule()
+    schedule_index = get_schedule_index(dataset_version("schedule"))
+    schedule_df = schedule_index.frame
 
     if schedule_df.empty:
         st.info("No schedule data found. Please fetch stats to load the schedule.")
@@ -416,17 +487,13 @@ with tab5:
         else:
             st.subheader(f"Schedule for Team {selected_team_id}")
 
-        team_schedule = schedule_df[schedule_df["team_id"] == selected_team_id].copy()
-
-        # Sort by date
-        # Date format might be string, let's try to convert for sorting
-        try:
-            team_schedule["date_dt"] = pd.to_datetime(
-                team_schedule["date"], errors="coerce", format="mixed"
-            )
-            team_schedule = team_schedule.sort_values("date_dt")
-        except Exception:
-            pass
+        # Already sorted by date (parsed at ingest); undated games come last
+        team_schedule = schedule_index.games_between(selected_team_id).copy()
+        team_schedule["date"] = (
+            team_schedule["date"]
+            .dt.strftime("%Y-%m-%d %H:%M")
+            .fillna(team_schedule["date_text"])
+        )
 
         # Display
         st.dataframe(
@@ -440,6 +507,21 @@ with tab5:
             },
         )
 
+        from bbcoach.data.analytics import create_win_loss_trend
+
+        ratings = get_rating_engine(dataset_version("schedule"))
+        momentum = create_win_loss_trend(
+            team_name if not teams_df.empty else f"Team {selected_team_id}",
+            ratings.history(selected_team_id),
+        )
+        if momentum:
+            rating = ratings.team_rating(selected_team_id)
+            st.caption(
+                f"Elo {rating['elo']:.0f} | SRS {rating['srs']:+.1f} | "
+                f"{rating['wins']}-{rating['losses']}"
+            )
+            st.plotly_chart(momentum)
+
 # ------------------------------------------------------------------
 # TAB 1: League Stats
 # ------------------------------------------------------------------
@@ -495,45 +577,24 @@ with tab1:
         display_data = []
         for _, row in season_players.iterrows():
             try:
-                # Use direct columns if available (new scraper), else fallback to raw_stats (legacy)
-                if "PPG" in row:
-                    display_data.append(
-                        {
-                            "Name": row["name"],
-                            "Team": team_id_map.get(
-                                str(row["team_id"]), row["team_id"]
-                            ),
-                            "PPG": row.get("PPG", 0),
-                            "RPG": row.get("RPG", 0),
-                            "APG": row.get("APG", 0),
-                            "GP": row.get("GP", 0),
-                            "MIN": row.get("MIN", 0),
-                            "FG%": row.get("FG%", 0),
-                            "3P%": row.get("3P%", 0),
-                            "FT%": row.get("FT%", 0),
-                            "EFF": row.get("EFF", 0),
-                        }
-                    )
-                else:
-                    # Legacy fallback
-                    raw = row["raw_stats"]
-                    display_data.append(
-                        {
-                            "Name": row["name"],
-                            "Team": team_id_map.get(
-                                str(row["team_id"]), row["team_id"]
-                            ),
-                            "PPG": raw[3],
-                            "RPG": raw[4],
-                            "APG": raw[5],
-                            "GP": raw[6],
-                            "MIN": raw[8],
-                            "FG%": raw[9],
-                            "3P%": raw[10],
-                            "FT%": raw[11],
-                            "EFF": raw[-4] if len(raw) > 20 else "N/A",
-                        }
-                    )
+                # Stats are normalized into columns when saved (legacy raw_stats included)
+                display_data.append(
+                    {
+                        "Name": row["name"],
+                        "Team": team_id_map.get(
+                            str(row["team_id"]), row["team_id"]
+                        ),
+                        "PPG": row.get("PPG", 0),
+                        "RPG": row.get("RPG", 0),
+                        "APG": row.get("APG", 0),
+                        "GP": row.get("GP", 0),
+                        "MIN": row.get("MIN", 0),
+                        "FG%": row.get("FG%", 0),
+                        "3P%": row.get("3P%", 0),
+                        "FT%": row.get("FT%", 0),
+                        "EFF": row.get("EFF", 0),
+                    }
+                )
             except Exception:
                 continue
 
@@ -597,7 +658,9 @@ with tab2:
             ].copy()
 
             # Render Chart
-            fig = create_radar_chart(comparison_df)
+            fig = create_radar_chart(
+                comparison_df, percentiles=get_percentiles(data_version)
+            )
             if fig:
                 # use_container_width=True is deprecated
                 st.plotly_chart(fig)
@@ -718,16 +781,43 @@ with tab3:
                     # --- AI ANALYSIS ---
                     with st.spinner("Asking Assistant Coach..."):
                         # 1. Single Season Analysis
-                        analysis = predict_matchup(players_df, coach_id, opp_id, season)
+                        analysis = predict_matchup(
+                            players_df, coach_id, opp_id, season,
+                            get_team_aggregates_table(data_version),
+                        )
                         st.markdown("### 🧠 Coach's Analysis")
                         st.markdown(analysis)
 
+                        simulation = simulate_matchup(
+                            get_team_aggregates_table(data_version),
+                            get_completed_games(dataset_version("schedule")),
+                            coach_id, opp_id, season,
+                            league=selected_league,
+                        )
+                        if simulation:
+                            col_win, col_score = st.columns(2)
+                            col_win.metric(
+                                "Win Probability",
+                                f"{simulation['win_probability_a']:.0%}",
+                            )
+                            col_score.metric(
+                                "Projected Score (median)",
+                                f"{simulation['score_quantiles_a']['p50']:.0f} - "
+                                f"{simulation['score_quantiles_b']['p50']:.0f}",
+                            )
+                        elo_win = get_rating_engine(
+                            dataset_version("schedule")
+                        ).win_probability(coach_id, opp_id, season)
+                        if elo_win is not None:
+                            st.caption(f"Elo win probability (neutral court): {elo_win:.0%}")
+
                         # 2. Multi-Season Analysis (Optional)
                         if use_multi_season:
                             from bbcoach.analysis import predict_matchup_multi_season
 
                             trend_analysis = predict_matchup_multi_season(
-                                players_df, coach_id, opp_id
+                                players_df, coach_id, opp_id,
+                                get_team_aggregates_table(data_version),
                             )
                             st.divider()
                             st.markdown("### 📈 Historical Trends")
@@ -906,9 +996,8 @@ with tab4:
                         roster_summary = []
                         for _, p in team_players.iterrows():
                             try:
-                                raw = p["raw_stats"]
                                 roster_summary.append(
-                                    f"{p['name']}: {raw[3]} PPG, {raw[4]} RPG, {raw[5]} APG, {raw[10]} 3P%"
+                                    f"{p['name']}: {p['PPG']} PPG, {p['RPG']} RPG, {p['APG']} APG, {p['3P%']} 3P%"
                                 )
                             except Exception:
                                 continue
@@ -928,23 +1017,24 @@ with tab4:
             # 3. Mentioned Players (Specific Queries)
             found_mentions = []
             if not players_df.empty:
-                prompt_lower = prompt.lower()
+                # One pass over the prompt, whatever the number of players
+                mentioned = {
+                    m["id"] for m in get_player_names(data_version).mentions(prompt)
+                }
                 unique_players = players_df[
                     players_df["season"] == players_df["season"].max()
                 ]
-
-                for idx, row in unique_players.iterrows():
-                    name = str(row["name"])
-                    if name.lower() in prompt_lower:
-                        found_mentions.append(row)
+                mentioned_rows = unique_players[
+                    unique_players["id"].astype(str).isin(mentioned)
+                ]
+                found_mentions = [row for _, row in mentioned_rows.iterrows()]
 
             if found_mentions:
                 context += "\n=== SPECIFIC PLAYERS ===\n"
                 for p in found_mentions:
                     try:
-                        raw = p["raw_stats"]
                         # Detailed stats for mentioned players
-                        context += f"- {p['name']} ({p['season']}): {raw[3]} PPG, {raw[4]} RPG, {raw[5]} APG, {raw[9]} FG%, {raw[10]} 3P%, {raw[18]} TO\n"
+                        context += f"- {p['name']} ({p['season']}): {p['PPG']} PPG, {p['RPG']} RPG, {p['APG']} APG, {p['FG%']} FG%, {p['3P%']} 3P%, {p['TO']} TO\n"
                     except Exception:
                         pass
 
@@ -1013,7 +1103,8 @@ with st.sidebar.expander("Analysis Tools"):
             latest_season = players_df["season"].max()
 
             analysis = predict_matchup(
-                players_df, my_team_id, opp_team_id, latest_season
+                players_df, my_team_id, opp_team_id, latest_season,
+                get_team_aggregates_table(data_version),
             )
             save_context(analysis)
             st.session_state["prediction_context"] = (
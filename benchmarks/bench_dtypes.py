@@ -0,0 +1,69 @@
+"""
+Benchmark: memory per row of the player/team frames with and without the
+compact dtype policy (bbcoach.data.dtypes).
+
+Usage:
+    python benchmarks/bench_dtypes.py                 # data_storage/
+    python benchmarks/bench_dtypes.py --rows 100000   # synthetic players
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Ensure src is in path
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data import storage  # noqa: E402
+from bbcoach.data.dtypes import PLAYER_SCHEMA, TEAM_SCHEMA, apply_dtypes, memory_report  # noqa: E402
+
+STATS = ["PPG", "RPG", "APG", "SPG", "BPG", "MIN", "TO", "FG%", "3P%", "FT%", "EFF"]
+
+
+def make_players(n_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    teams = [f"Team {i}" for i in range(40)]
+    team_idx = rng.integers(0, len(teams), n_rows)
+    df = pd.DataFrame(
+        {
+            "id": [str(i) for i in range(n_rows)],
+            "name": [f"Player {i % (n_rows // 3 + 1)}" for i in range(n_rows)],
+            "link": [f"https://example.com/person/{i % (n_rows // 3 + 1)}" for i in range(n_rows)],
+            "team_id": [str(188990 + i) for i in team_idx],
+            "team_name": [teams[i] for i in team_idx],
+            "league": rng.choice(["Men", "Women"], n_rows),
+            "season": rng.integers(2015, 2026, n_rows),
+            "GP": rng.integers(1, 30, n_rows).astype(float),
+        }
+    )
+    for stat in STATS:
+        df[stat] = np.round(rng.uniform(0, 30, n_rows), 1)
+    return df
+
+
+def report(label: str, before: pd.DataFrame, schema: dict):
+    r = memory_report(before, apply_dtypes(before, schema))
+    print(
+        f"{label:<8} | {r['rows']:>9} | {r['before_bytes_per_row']:>14.1f} | "
+        f"{r['after_bytes_per_row']:>13.1f} | {r['reduction']:>8.0%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=0, help="Synthetic player rows")
+    args = parser.parse_args()
+
+    print(f"{'frame':<8} | {'rows':>9} | {'bytes/row raw':>14} | {'bytes/row new':>13} | {'saved':>8}")
+    print("-" * 64)
+    if args.rows:
+        report("players", make_players(args.rows), PLAYER_SCHEMA)
+    else:
+        report("players", storage.load_players(compact=False), PLAYER_SCHEMA)
+        report("teams", storage.load_teams(compact=False), TEAM_SCHEMA)
+
+
+if __name__ == "__main__":
+    main()
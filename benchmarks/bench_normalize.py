@@ -0,0 +1,96 @@
+"""
+Benchmark: raw_stats normalization, row-wise apply vs columnar engine.
+
+Usage:
+    python benchmarks/bench_normalize.py
+    python benchmarks/bench_normalize.py --rows 100000 1000000 --legacy-max-rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ensure src is in path
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.normalize import (  # noqa: E402
+    normalize_player_stats,
+    normalize_player_stats_rowwise,
+)
+
+
+def make_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic players frame shaped like a proballers scrape (24-cell rows)."""
+    rng = np.random.default_rng(seed)
+    pts_totals = rng.integers(0, 600, n_rows).astype(str)
+    pts_avgs = np.char.mod("%.1f", rng.uniform(0, 30, n_rows))
+    is_total = rng.random(n_rows) < 0.3
+    pts = np.where(is_total, pts_totals, pts_avgs)
+    gp = rng.integers(1, 30, n_rows).astype(str)
+    small = np.char.mod("%.1f", rng.uniform(0, 12, (n_rows, 2)))
+    minutes = np.char.mod("%.1f", rng.uniform(0, 40, n_rows))
+    pct = np.char.add(np.char.mod("%.1f", rng.uniform(0, 70, (n_rows, 3))), "%")
+    filler = np.full((n_rows, 13), "-", dtype=object)
+
+    cells = np.column_stack(
+        [
+            np.full(n_rows, "Name", dtype=object),
+            np.full(n_rows, "-", dtype=object),
+            np.full(n_rows, "-", dtype=object),
+            pts,
+            small,
+            gp,
+            np.full(n_rows, "-", dtype=object),
+            minutes,
+            pct,
+            filler,
+        ]
+    ).astype(object)
+
+    raw = np.empty(n_rows, dtype=object)
+    raw[:] = list(cells)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n_rows).astype(str),
+            "name": np.full(n_rows, " Player "),
+            "season": 2024,
+            "league": "Men",
+            "raw_stats": raw,
+        }
+    )
+
+
+def timed(func, df: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    func(df.copy())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=1_000_000,
+        help="Skip the row-wise reference above this size (it takes minutes at 1M)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} | {'row-wise (s)':>12} | {'columnar (s)':>12} | {'speedup':>8}")
+    print("-" * 52)
+    for n in args.rows:
+        df = make_frame(n)
+        columnar = timed(normalize_player_stats, df)
+        if n <= args.legacy_max_rows:
+            legacy = timed(normalize_player_stats_rowwise, df)
+            print(f"{n:>10} | {legacy:>12.2f} | {columnar:>12.2f} | {legacy / columnar:>7.1f}x")
+        else:
+            print(f"{n:>10} | {'skipped':>12} | {columnar:>12.2f} | {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: save_players latency vs. size of the existing dataset.
+
+Each save appends a delta file, so the time for a fixed-size batch should
+stay flat while the dataset grows.
+
+Usage:
+    python benchmarks/bench_storage_writes.py
+    python benchmarks/bench_storage_writes.py --existing 10000 100000 1000000 --batch 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure src is in path
+sys.path.append(os.path.abspath("src"))
+
+import bbcoach.data.storage as storage  # noqa: E402
+
+
+def make_players(n_rows: int, offset: int = 0, season: int = 2024) -> list[dict]:
+    rng = np.random.default_rng(offset)
+    return [
+        {
+            "id": str(offset + i),
+            "name": f"Player {offset + i}",
+            "team_id": str(i % 14),
+            "season": season,
+            "league": "Men",
+            "PPG": float(rng.uniform(0, 30)),
+            "RPG": float(rng.uniform(0, 12)),
+        }
+        for i in range(n_rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--existing", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=300)
+    args = parser.parse_args()
+
+    batch = make_players(args.batch, offset=10_000_000, season=2025)
+
+    print(f"{'existing rows':>14} | {'save (ms)':>10}")
+    print("-" * 28)
+    for n in args.existing:
+        with tempfile.TemporaryDirectory() as tmp:
+            storage.DATA_DIR = Path(tmp)
+            storage.save_players(make_players(n))
+            storage.wait_for_compaction()
+
+            start = time.perf_counter()
+            storage.save_players(batch)
+            elapsed = (time.perf_counter() - start) * 1000
+            storage.wait_for_compaction()
+        print(f"{n:>14} | {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,183 @@
-def get_team_aggregates(players_df, team_id, season):
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.dtypes import widen_floats
+
+# Per-player rotation fields and the columns they are read from
+_PLAYER_FIELDS = {
+    "ppg": "PPG",
+    "rpg": "RPG",
+    "apg": "APG",
+    "gp": "GP",
+    "min": "MIN",
+    "fg_pct": "FG%",
+    "3p_pct": "3P%",
+    "to": "TO",
+    "eff": "EFF",
+}
+
+ROTATION_SIZE = 8
+
+
+def _empty_aggregates(roster_size: int) -> dict:
+    return {
+        "total_ppg": 0.0,
+        "total_rpg": 0.0,
+        "total_apg": 0.0,
+        "roster_size": roster_size,
+        "total_3p_made": 0,
+        "avg_fg_pct": 0,
+        "avg_3p_pct": 0,
+        "total_to": 0,
+        "total_min": 0,
+        "top_scorer": "N/A",
+        "top_playmaker": "N/A",
+        "top_rebounder": "N/A",
+        "rotation": [],
+        "top_8": [],
+    }
+
+
+def _parse_players(players_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rotation fields of every player row as float64, with the rows the
+    row-wise parser skips (non-string name, non-numeric stat) dropped.
+    """
+    df = widen_floats(players_df)
+    parsed = pd.DataFrame(index=df.index)
+    if "name" in df.columns:
+        names = df["name"].astype(object)
+        valid = names.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        parsed["name"] = names.where(valid, "").map(str.strip)
+    else:
+        valid = np.ones(len(df), dtype=bool)
+        parsed["name"] = ""
+    for field, col in _PLAYER_FIELDS.items():
+        if col not in df.columns:
+            parsed[field] = 0.0
+            continue
+        raw = df[col]
+        values = pd.to_numeric(raw, errors="coerce").astype(np.float64)
+        valid &= ~(values.isna() & raw.notna()).to_numpy()
+        parsed[field] = values
+    return parsed[valid]
+
+
+def compute_all_team_aggregates(players_df: pd.DataFrame) -> dict[tuple, dict]:
+    """
+    Team strength aggregates of every team and season in one grouped pass.
+
+    Same rules as get_team_aggregates_rowwise: the rotation is the top 8
+    scorers among players with at least 5 games (1 game early in the season,
+    when nobody on the roster has 8 yet), falling back to the whole roster.
+
+    Returns:
+        {(team_id, season): stats} with team_id as str and season as int
+    """
+    if players_df.empty or "team_id" not in players_df.columns or "season" not in players_df.columns:
+        return {}
+
+    keys = pd.DataFrame({
+        "team_id": players_df["team_id"].astype(object),
+        "season": pd.to_numeric(players_df["season"], errors="coerce"),
+    }, index=players_df.index)
+    has_key = keys.notna().all(axis=1).to_numpy()
+    players_df, keys = players_df[has_key], keys[has_key]
+    if players_df.empty:
+        return {}
+
+    group_of, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    roster_sizes = np.bincount(group_of, minlength=len(uniques))
+    aggregates = {
+        (str(team_id), int(season)): _empty_aggregates(int(roster_sizes[g]))
+        for g, (team_id, season) in enumerate(uniques)
+    }
+    if "PPG" not in players_df.columns:
+        return aggregates
+
+    parsed = _parse_players(players_df)
+    group = pd.Series(group_of, index=players_df.index)[parsed.index].to_numpy()
+    parsed = parsed.reset_index(drop=True)
+    parsed["group"] = group
+    parsed["order"] = np.arange(len(parsed))
+
+    # Adaptive GP threshold per team-season
+    max_gp = parsed.groupby("group")["gp"].transform("max").to_numpy()
+    threshold = np.where(max_gp >= 8, 5, 1)
+    eligible = parsed["gp"].to_numpy() >= threshold
+    any_eligible = pd.Series(eligible).groupby(group).transform("any").to_numpy()
+    candidates = parsed[eligible | ~any_eligible]
+
+    # Top 8 scorers per team-season (stable: ties keep roster order)
+    ranked = candidates.sort_values(["group", "ppg", "order"], ascending=[True, False, True], kind="stable")
+    rotation = ranked[ranked.groupby("group").cumcount() < ROTATION_SIZE]
+
+    summed = ["ppg", "rpg", "apg", "fg_pct", "3p_pct", "to", "min"]
+    by_group = rotation.groupby("group", sort=False)
+    counts = by_group.size()
+    # Sums propagate NaN like the row-wise sum()
+    sums = by_group[summed].sum().mask(rotation[summed].isna().groupby(rotation["group"]).any())
+    top_apg = rotation.sort_values(["group", "apg"], ascending=[True, False], kind="stable").groupby("group").head(1)
+    top_rpg = rotation.sort_values(["group", "rpg"], ascending=[True, False], kind="stable").groupby("group").head(1)
+    top_ppg = rotation.groupby("group").head(1)
+
+    fields = ["name"] + list(_PLAYER_FIELDS)
+    records = parsed[fields].to_dict(orient="records")
+    rotations: dict[int, list] = {}
+    for g, record in zip(parsed["group"], records):
+        rotations.setdefault(g, []).append(record)
+    top_8: dict[int, list] = {}
+    for g, i in zip(rotation["group"], rotation["order"]):
+        top_8.setdefault(g, []).append(records[i])
+
+    top_names = {
+        label: dict(zip(frame["group"], frame["name"]))
+        for label, frame in [("top_scorer", top_ppg), ("top_playmaker", top_apg), ("top_rebounder", top_rpg)]
+    }
+    for g, (team_id, season) in enumerate(uniques):
+        if g not in counts.index:
+            continue
+        stats = aggregates[(str(team_id), int(season))]
+        n = counts[g]
+        row = sums.loc[g]
+        stats["total_ppg"] = row["ppg"]
+        stats["total_rpg"] = row["rpg"]
+        stats["total_apg"] = row["apg"]
+        stats["avg_fg_pct"] = row["fg_pct"] / n
+        stats["avg_3p_pct"] = row["3p_pct"] / n
+        stats["total_to"] = row["to"]
+        stats["total_min"] = row["min"]
+        for label, names in top_names.items():
+            stats[label] = names[g]
+        stats["rotation"] = rotations[g]
+        stats["top_8"] = top_8[g]
+    return aggregates
+
+
+def get_team_aggregates(players_df, team_id, season, aggregates=None):
     """
     Aggregates player stats to estimate team strength for a given season.
+
+    With aggregates (from compute_all_team_aggregates) this is a lookup;
+    otherwise only the team's rows are aggregated.
+    """
+    if aggregates is None:
+        team_players = players_df[
+            (players_df["team_id"] == team_id) & (players_df["season"] == season)
+        ]
+        aggregates = compute_all_team_aggregates(team_players)
+    try:
+        return aggregates.get((str(team_id), int(season)))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_team_aggregates_rowwise(players_df, team_id, season):
+    """
+    Aggregates player stats to estimate team strength for a given season.
+
+    Original per-row implementation, kept as the reference
+    compute_all_team_aggregates is tested against.
     """
     team_players = players_df[
         (players_df["team_id"] == team_id) & (players_df["season"] == season)
@@ -9,6 +186,9 @@ def get_team_aggregates(players_df, team_id, season):
     if team_players.empty:
         return None
 
+    # float32 stats would otherwise leak cast noise into the sums below
+    team_players = widen_floats(team_players)
+
     stats = {
         "total_ppg": 0.0,
         "total_rpg": 0.0,
@@ -109,12 +289,12 @@ def get_team_aggregates(players_df, team_id, season):
     return stats
 
 
-def predict_matchup(players_df, team_a_id, team_b_id, season):
+def predict_matchup(players_df, team_a_id, team_b_id, season, aggregates=None):
     """
     Compares two teams and returns a context string.
     """
-    stats_a = get_team_aggregates(players_df, team_a_id, season)
-    stats_b = get_team_aggregates(players_df, team_b_id, season)
+    stats_a = get_team_aggregates(players_df, team_a_id, season, aggregates)
+    stats_b = get_team_aggregates(players_df, team_b_id, season, aggregates)
 
     if not stats_a or not stats_b:
         return f"Insufficient data for matchup prediction in season {season}."
@@ -202,12 +382,14 @@ def predict_matchup(players_df, team_a_id, team_b_id, season):
     return analysis
 
 
-def get_multi_season_aggregates(players_df, team_id, seasons=None):
+def get_multi_season_aggregates(players_df, team_id, seasons=None, aggregates=None):
     """
     Aggregates stats for a team across specified seasons.
     """
+    if aggregates is None:
+        aggregates = compute_all_team_aggregates(players_df[players_df["team_id"] == team_id])
     if seasons is None:
-        seasons = sorted(players_df["season"].unique().tolist(), reverse=True)
+        seasons = sorted((s for t, s in aggregates if t == str(team_id)), reverse=True)
 
     aggregated_stats = {
         "total_ppg": 0,
@@ -220,7 +402,7 @@ def get_multi_season_aggregates(players_df, team_id, seasons=None):
 
     valid_seasons = 0
     for season in seasons:
-        stats = get_team_aggregates(players_df, team_id, season)
+        stats = get_team_aggregates(players_df, team_id, season, aggregates)
         if stats:
             aggregated_stats["total_ppg"] += stats["total_ppg"]
             aggregated_stats["total_rpg"] += stats["total_rpg"]
@@ -236,12 +418,12 @@ def get_multi_season_aggregates(players_df, team_id, seasons=None):
     return None
 
 
-def predict_matchup_multi_season(players_df, team_a_id, team_b_id):
+def predict_matchup_multi_season(players_df, team_a_id, team_b_id, aggregates=None):
     """
     Compares two teams based on multi-season performance.
     """
-    stats_a = get_multi_season_aggregates(players_df, team_a_id)
-    stats_b = get_multi_season_aggregates(players_df, team_b_id)
+    stats_a = get_multi_season_aggregates(players_df, team_a_id, aggregates=aggregates)
+    stats_b = get_multi_season_aggregates(players_df, team_b_id, aggregates=aggregates)
 
     if not stats_a or not stats_b:
         return "Insufficient historical data for multi-season prediction."
@@ -260,3 +442,37 @@ def predict_matchup_multi_season(players_df, team_a_id, team_b_id):
         f"Modeling suggests consistent performance trends favor {'Your Team' if diff_ppg > 0 else 'Opponent'}.\n"
     )
     return analysis
+
+
+# Stat edges of the matchup matrix: (aggregate key, sign); a positive cell
+# means the row team has the edge (fewer turnovers is the better side)
+MATRIX_EDGES = {
+    "scoring": ("total_ppg", 1),
+    "rebounding": ("total_rpg", 1),
+    "playmaking": ("total_apg", 1),
+    "three_point": ("avg_3p_pct", 1),
+    "ball_security": ("total_to", -1),
+}
+
+
+def compute_matchup_matrix(aggregates, team_ids, season):
+    """
+    predict_matchup's stat edges for every pair of teams at once.
+
+    Args:
+        aggregates: Table from compute_all_team_aggregates
+        team_ids: Teams in row/column order
+        season: Season year
+
+    Returns:
+        (team ids with aggregates, {edge: n x n array}) where cell [i, j] is
+        team i's edge over team j (NaN where a stat is missing)
+    """
+    teams = [str(t) for t in team_ids if (str(t), int(season)) in aggregates]
+    edges = {}
+    for edge, (key, sign) in MATRIX_EDGES.items():
+        values = np.array(
+            [aggregates[(t, int(season))][key] for t in teams], dtype=np.float64
+        )
+        edges[edge] = sign * (values[:, None] - values[None, :])
+    return teams, edges
@@ -24,6 +24,11 @@ class Settings(BaseSettings):
     # Data Paths
     data_dir: str = "data_storage"
     vector_db_dir: str = ".vectordb"
+    # Publish loaded datasets as memory-mapped Arrow files under
+    # data_dir/_shared, so API workers share one copy
+    shared_dataset: bool = False
+    # Matchup analyses kept per data version (LRU)
+    matchup_cache_size: int = 1024
 
     # Scraper Configuration
     scraper_timeout: int = 60
@@ -40,6 +45,11 @@ class Settings(BaseSettings):
     api_port: int = 8000
     api_reload: bool = True
 
+    # SQL query endpoint (read-only, off by default)
+    sql_query_enabled: bool = False
+    sql_query_max_rows: int = 100_000
+    sql_query_timeout: float = 10.0  # Seconds before the query is interrupted
+
     # CORS
     cors_origins: list[str] = ["http://localhost:3000", "http://localhost:3001"]
 
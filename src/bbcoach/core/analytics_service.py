@@ -4,19 +4,84 @@ Analytics Service
 Business logic for statistical analysis and predictions.
 """
 import logging
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
 
+import numpy as np
 import pandas as pd
 
 from bbcoach.analysis import (
+    compute_matchup_matrix,
     get_team_aggregates,
     predict_matchup,
     predict_matchup_multi_season,
 )
+from bbcoach.config import settings
+from bbcoach.simulation import DEFAULT_SIMULATIONS, simulate_matchup
+from bbcoach.data.dtypes import to_records
+from bbcoach.data.leaderboards import METRICS
 
 logger = logging.getLogger(__name__)
 
 
+class ResultCache:
+    """
+    Bounded LRU cache of computed results, with hit/miss counters.
+
+    Keys end with the data version they were computed at; entries of any
+    other version are dropped as soon as a new version is seen.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._version: Optional[str] = None
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, version: str, compute: Callable[[], Any]) -> Any:
+        """Cached result for key at version, computing it on a miss (None is not cached)."""
+        key = key + (version,)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        if value is None or self.maxsize <= 0:
+            return value
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "version": self._version,
+            }
+
+
 class AnalyticsService:
     """Service for analytics operations."""
 
@@ -29,8 +94,16 @@ class AnalyticsService:
         """
         self.data_service = data_service
 
+        # Matchup analyses by (team_a, team_b, season, players data version)
+        self.matchup_cache = ResultCache(settings.matchup_cache_size)
+
     def get_top_players(
-        self, season: int, league: str = "Men", metric: str = "PPG", limit: int = 10
+        self,
+        season: int,
+        league: str = "Men",
+        metric: str = "PPG",
+        limit: int = 10,
+        as_of=None,
     ) -> list[dict]:
         """
         Get top players by a specific metric.
@@ -40,29 +113,150 @@ class AnalyticsService:
             league: League (Men/Women)
             metric: Statistic to sort by (PPG, RPG, APG, etc.)
             limit: Number of players to return
+            as_of: Rank the stats as they were at this timestamp or snapshot
 
         Returns:
-            List of player dictionaries
+            List of player dictionaries (players without a value are not ranked)
         """
-        players_df = self.data_service.load_players()
-        if players_df.empty:
+        if metric not in METRICS:
+            logger.warning(f"Unknown metric {metric}")
             return []
 
-        filtered = players_df[
-            (players_df["season"] == season) & (players_df["league"] == league)
-        ]
+        if as_of is None:
+            top_players = self.data_service.leaderboards().top(league, season, metric, limit)
+        else:
+            filtered = self.data_service.load_players(
+                league=league, season=season, as_of=as_of
+            )
+            if metric not in filtered.columns:
+                return []
+            top_players = (
+                filtered[filtered[metric].notna()]
+                .sort_values(metric, ascending=False, kind="stable")
+                .head(limit)
+            )
+
+        # NaN becomes None and float32 stats keep their short repr for JSON
+        return to_records(top_players)
+
+    def get_metrics(self) -> dict[str, str]:
+        """Rankable metrics and their labels."""
+        return dict(METRICS)
+
+    def player_percentiles(
+        self,
+        player_ids: list[str],
+        season: int,
+        league: str = "Men",
+        metrics: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        League percentiles and z-scores of players in a season.
 
-        if metric not in filtered.columns:
-            logger.warning(f"Metric {metric} not found in data")
+        Args:
+            player_ids: Player identifiers
+            season: Season year
+            league: League (Men/Women)
+            metrics: Metrics to rank (default: every ranked metric)
+
+        Returns:
+            List of {"id", "name", "team_id", "percentiles", "z_scores"}
+            (one per team the player was on)
+        """
+        partition = self.data_service.player_index().partition(league, season)
+        if partition.empty:
             return []
+        players = partition[partition["id"].astype(str).isin({str(i) for i in player_ids})]
+        return [
+            {"id": row["id"], "name": row.get("name"), "team_id": row.get("team_id"), **ranks}
+            for row, ranks in zip(
+                players.to_dict(orient="records"), self.percentile_ranks(players, metrics)
+            )
+        ]
+
+    def percentile_ranks(
+        self, players: pd.DataFrame, metrics: Optional[list[str]] = None
+    ) -> list[dict]:
+        """
+        Percentiles and z-scores of player rows within their league/season.
+
+        Returns:
+            One {"percentiles": {metric: value}, "z_scores": {metric: value}}
+            per row (None where a value is missing)
+        """
+        percentiles, zscores = self.data_service.percentiles().lookup(players, metrics)
+
+        def values(frame: pd.DataFrame, digits: int) -> list[dict]:
+            return [
+                {m: None if np.isnan(v) else round(v, digits) for m, v in row.items()}
+                for row in frame.to_dict(orient="records")
+            ]
+
+        return [
+            {"percentiles": p, "z_scores": z}
+            for p, z in zip(values(percentiles, 1), values(zscores, 2))
+        ]
+
+    def similar_players(
+        self,
+        player_id: str,
+        k: int = 10,
+        season: Optional[int] = None,
+        league: Optional[str] = None,
+        target_season: Optional[int] = None,
+        min_games: Optional[int] = None,
+    ) -> Optional[list[dict]]:
+        """
+        Find the players whose standardized stats are closest to a player's.
+
+        Args:
+            player_id: Player identifier
+            k: Number of players to return
+            season: The player's season to match (default: their latest)
+            league: Only search this league (default: all)
+            target_season: Only search this season (default: all)
+            min_games: Only return players with at least this many games
 
-        top_players = filtered.sort_values(metric, ascending=False).head(limit)
+        Returns:
+            List of player dictionaries nearest first, with a "distance"
+            value, or None if the player is unknown
+        """
+        index = self.data_service.similarity_index()
+        if index.index.player(player_id).empty:
+            return None
+        similar = index.similar_players(
+            player_id, k, season=season, league=league,
+            target_season=target_season, min_games=min_games,
+        )
+        return to_records(similar)
+
+    def get_player_deltas(
+        self,
+        start,
+        end,
+        season: Optional[int] = None,
+        league: Optional[str] = None,
+        metrics: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        Get per-player stat changes between two snapshots.
 
-        import numpy as np
-        # Convert NaN values to None directly so JSON encoders handle them gracefully
-        top_players = top_players.replace({np.nan: None})
+        Args:
+            start: Earlier timestamp or snapshot seq
+            end: Later timestamp or snapshot seq
+            season: Season year
+            league: League (Men/Women)
+            metrics: Stats to compare (default: all numeric stats)
 
-        return top_players.to_dict(orient="records")
+        Returns:
+            List of player dictionaries with <stat>_before/_after/_delta values
+        """
+        deltas = self.data_service.player_deltas(
+            start, end, league=league, season=season, columns=metrics
+        )
+        if deltas.empty:
+            return []
+        return to_records(deltas)
 
     def get_team_stats(self, team_id: str, season: int) -> Optional[dict]:
         """
@@ -75,14 +269,10 @@ class AnalyticsService:
         Returns:
             Dictionary with team statistics or None if not found
         """
-        players_df = self.data_service.load_players()
-
-        if players_df.empty:
-            return None
-
         try:
-            stats = get_team_aggregates(players_df, team_id, season)
-            return stats
+            return get_team_aggregates(
+                None, team_id, season, self.data_service.team_aggregates()
+            )
         except Exception as e:
             logger.error(f"Error getting team stats for {team_id}: {e}")
             return None
@@ -101,13 +291,19 @@ class AnalyticsService:
         Returns:
             Matchup analysis text or None
         """
-        players_df = self.data_service.load_players()
-
-        if players_df.empty:
+        return self.matchup_cache.get_or_compute(
+            (str(team_a_id), str(team_b_id), int(season)),
+            self.data_service.data_version("players"),
+            lambda: self._predict_matchup(team_a_id, team_b_id, season),
+        )
+
+    def _predict_matchup(self, team_a_id: str, team_b_id: str, season: int) -> Optional[str]:
+        aggregates = self.data_service.team_aggregates()
+        if not any((str(t), season) in aggregates for t in (team_a_id, team_b_id)):
             return None
 
         try:
-            analysis = predict_matchup(players_df, team_a_id, team_b_id, season)
+            analysis = predict_matchup(None, team_a_id, team_b_id, season, aggregates)
             return analysis
         except Exception as e:
             logger.error(f"Error predicting matchup: {e}")
@@ -126,18 +322,152 @@ class AnalyticsService:
         Returns:
             Multi-season analysis or None
         """
-        players_df = self.data_service.load_players()
-
-        if players_df.empty:
+        return self.matchup_cache.get_or_compute(
+            (str(team_a_id), str(team_b_id), None),
+            self.data_service.data_version("players"),
+            lambda: self._predict_matchup_multi_season(team_a_id, team_b_id),
+        )
+
+    def _predict_matchup_multi_season(self, team_a_id: str, team_b_id: str) -> Optional[str]:
+        aggregates = self.data_service.team_aggregates()
+        if not any(t in (str(team_a_id), str(team_b_id)) for t, _ in aggregates):
             return None
 
         try:
-            analysis = predict_matchup_multi_season(players_df, team_a_id, team_b_id)
+            analysis = predict_matchup_multi_season(None, team_a_id, team_b_id, aggregates)
             return analysis
         except Exception as e:
             logger.error(f"Error in multi-season prediction: {e}")
             return None
 
+    def simulate_matchup(
+        self,
+        team_a_id: str,
+        team_b_id: str,
+        season: int,
+        simulations: int = DEFAULT_SIMULATIONS,
+        seed: Optional[int] = 0,
+        league: Optional[str] = None,
+    ) -> Optional[dict]:
+        """
+        Simulate games between two teams.
+
+        Args:
+            team_a_id: First team ID
+            team_b_id: Second team ID
+            season: Season year
+            simulations: Number of games to draw
+            seed: Random seed (None for a fresh one each call)
+            league: League whose results are used (default: the teams' league)
+
+        Returns:
+            Win probabilities, expected scores, score quantiles and the
+            fitted score model, or None if either team has no data
+        """
+        try:
+            return simulate_matchup(
+                self.data_service.team_aggregates(),
+                self.data_service.completed_games(),
+                team_a_id, team_b_id, season, simulations, seed, league,
+            )
+        except Exception as e:
+            logger.error(f"Error simulating matchup: {e}")
+            return None
+
+    def get_standings(self, season: int, league: str = "Men") -> list[dict]:
+        """
+        League table from the schedule's completed games.
+
+        Args:
+            season: Season year
+            league: League (Men/Women)
+
+        Returns:
+            List of team rows (rank, W-L, home/away splits, points, form
+            and streak), best first
+        """
+        return to_records(self.data_service.standings().table(league, season))
+
+    def get_team_standing(self, team_id: str, season: int) -> Optional[dict]:
+        """A team's row in its season's league table."""
+        return self.data_service.standings().team(team_id, season)
+
+    def get_ratings(self, season: Optional[int] = None, league: Optional[str] = None) -> list[dict]:
+        """
+        Elo and SRS ratings of every team with completed games.
+
+        Args:
+            season: Season year (default: all)
+            league: League (Men/Women, default: all)
+
+        Returns:
+            List of {"team_id", "league", "season", "elo", "srs", "games",
+            "wins", "losses"}, best Elo first
+        """
+        return to_records(self.data_service.ratings().ratings(season, league))
+
+    def get_rating_history(self, team_id: str, season: Optional[int] = None) -> list[dict]:
+        """A team's games with its Elo after each one (default: its latest season)."""
+        history = self.data_service.ratings().history(team_id, season)
+        history["date"] = history["date"].map(lambda d: None if pd.isna(d) else d.isoformat())
+        return to_records(history)
+
+    def matchup_ratings(self, team_a_id: str, team_b_id: str, season: int) -> Optional[dict]:
+        """
+        Both teams' ratings and the Elo win probability of team a
+        (neutral court), or None unless both teams have rated games.
+        """
+        engine = self.data_service.ratings()
+        team_a = engine.team_rating(team_a_id, season)
+        team_b = engine.team_rating(team_b_id, season)
+        if team_a is None or team_b is None:
+            return None
+        return {
+            "team_a": team_a,
+            "team_b": team_b,
+            "elo_win_probability_a": engine.win_probability(team_a_id, team_b_id, season),
+        }
+
+    def matchup_matrix(self, season: int, league: str = "Men") -> Optional[dict]:
+        """
+        Stat edges of every team pair in a league season, for a heatmap.
+
+        Args:
+            season: Season year
+            league: League (Men/Women)
+
+        Returns:
+            {"season", "league", "teams": [{"id", "name"}], "edges":
+            {edge: rows}} where edges[edge][i][j] is team i's edge over
+            team j (None where a stat is missing), or None without teams
+        """
+        teams_df = self.data_service.load_teams()
+        names = {}
+        if not teams_df.empty:
+            league_teams = teams_df[(teams_df["season"] == season) & (teams_df["league"] == league)]
+            names = dict(zip(league_teams["id"].astype(str), league_teams["name"]))
+        if not names:
+            # No team list for the season: use the teams players are listed on
+            partition = self.data_service.player_index().partition(league, season)
+            if "team_id" in partition.columns:
+                names = {str(t): None for t in partition["team_id"].dropna().unique()}
+
+        team_ids, edges = compute_matchup_matrix(
+            self.data_service.team_aggregates(), sorted(names), season
+        )
+        if not team_ids:
+            return None
+
+        def rows(matrix: np.ndarray) -> list[list]:
+            return [[None if np.isnan(v) else round(v, 2) for v in row] for row in matrix.tolist()]
+
+        return {
+            "season": season,
+            "league": league,
+            "teams": [{"id": t, "name": names[t]} for t in team_ids],
+            "edges": {edge: rows(matrix) for edge, matrix in edges.items()},
+        }
+
     def compare_players(
         self, player_names: list[str], season: int, league: str = "Men"
     ) -> Optional[pd.DataFrame]:
@@ -152,31 +482,52 @@ class AnalyticsService:
         Returns:
             DataFrame with player comparison or None
         """
-        players_df = self.data_service.load_players()
-
-        if players_df.empty:
+        # Names match case- and accent-insensitively; a name without an
+        # exact match resolves to the closest player names
+        index = self.data_service.player_index()
+        names = self.data_service.player_names()
+        groups = []
+        for name in player_names:
+            rows = index.by_name(name)
+            if rows.empty:
+                matches = names.resolve(name)
+                best = [m["id"] for m in matches if m["score"] == matches[0]["score"]]
+                rows = pd.concat([index.player(i) for i in best]) if best else rows
+            groups.append(rows)
+        named = pd.concat(groups) if groups else index.frame.iloc[0:0]
+        named = named[~named.index.duplicated()].sort_index()
+        if named.empty:
             return None
 
-        filtered = players_df[
-            (players_df["season"] == season)
-            & (players_df["league"] == league)
-            & (players_df["name"].isin(player_names))
-        ]
+        filtered = named[(named["season"] == season) & (named["league"] == league)]
 
         if filtered.empty:
             return None
 
         return filtered
 
-    def get_available_seasons(self, league: str = "Men") -> list[int]:
-        """Get list of available seasons for a league."""
-        players_df = self.data_service.load_players()
+    def resolve_name(self, name: str, kind: str = "player", limit: int = 5) -> list[dict]:
+        """
+        Players or teams whose name best matches a possibly misspelled name.
 
-        if players_df.empty:
-            return []
+        Args:
+            name: Name to look up
+            kind: "player" or "team"
+            limit: Maximum number of matches
 
-        filtered = players_df[players_df["league"] == league]
-        return sorted(filtered["season"].dropna().unique().astype(int).tolist(), reverse=True)
+        Returns:
+            List of {"kind", "id", "name", "score"}, best first
+        """
+        names = self.data_service.team_names() if kind == "team" else self.data_service.player_names()
+        return names.resolve(name, limit)
+
+    def find_mentions(self, text: str) -> list[dict]:
+        """Players and teams named in free text, as {"kind", "id", "name", "match"}."""
+        return self.data_service.team_names().mentions(text) + self.data_service.player_names().mentions(text)
+
+    def get_available_seasons(self, league: str = "Men") -> list[int]:
+        """Get list of available seasons for a league."""
+        return self.data_service.player_index().seasons(league)
 
     def get_available_teams(self, season: int, league: str = "Men") -> list[dict]:
         """Get list of teams for a given season and league."""
@@ -189,4 +540,4 @@ class AnalyticsService:
             (teams_df["season"] == season) & (teams_df["league"] == league)
         ]
 
-        return filtered.to_dict(orient="records")
+        return to_records(filtered)
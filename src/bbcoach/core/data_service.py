@@ -5,21 +5,41 @@ Abstraction layer over data storage operations.
 """
 import logging
 import json
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import pandas as pd
 
+from bbcoach.analysis import compute_all_team_aggregates
 from bbcoach.config import settings
+from bbcoach.data.leaderboards import Leaderboards
+from bbcoach.data.locking import atomic_write_json, file_lock
+from bbcoach.data.names import NameIndex
+from bbcoach.data.percentiles import Percentiles
+from bbcoach.data.player_index import PlayerIndex
+from bbcoach.data.query import QueryResult, query as storage_query
+from bbcoach.data.ratings import RatingEngine, completed_games
+from bbcoach.data.schedule import ScheduleIndex
+from bbcoach.data.shared import shared_frame
+from bbcoach.data.similarity import SimilarityIndex
+from bbcoach.data.standings import Standings
 from bbcoach.data.storage import (
+    dataset_stats as storage_dataset_stats,
+    dataset_version as storage_dataset_version,
+    list_snapshots as storage_list_snapshots,
     load_players as storage_load_players,
+    snapshot_deltas as storage_snapshot_deltas,
     load_teams as storage_load_teams,
     load_schedule as storage_load_schedule,
 )
 
 logger = logging.getLogger(__name__)
 
+CACHED_DATASETS = ("players", "teams", "schedule")
+
 
 class DataService:
     """Service for data operations."""
@@ -33,18 +53,181 @@ class DataService:
         """
         self.data_dir = Path(data_dir or settings.data_dir)
 
-        # Data cache to avoid repeated loading
-        self._players_cache: pd.DataFrame = pd.DataFrame()
-        self._teams_cache: pd.DataFrame = pd.DataFrame()
-        self._schedule_cache: pd.DataFrame = pd.DataFrame()
+        # Loaded values by (dataset, key) as (version, value); key is None for
+        # a whole dataset, (league, season, columns) for player partitions,
+        # "index" for the PlayerIndex / ScheduleIndex and a name for values
+        # derived from them (e.g. "leaderboards").
+        # An entry is current while the dataset's on-disk version matches,
+        # and an empty frame is a cached result too.
+        self._entries: dict[tuple, tuple[str, Any]] = {}
+
+        # How each entry was built, so reload() can rebuild it for a new version
+        self._loaders: dict[tuple, Callable[[], Any]] = {}
+
+        # In-flight loads by (dataset, key, version), so concurrent callers
+        # share one load per version
+        self._flights: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+        # Entries being built by reload() on its thread, swapped in together
+        self._staging = threading.local()
 
     def clear_cache(self):
         """Clear the data cache."""
-        self._players_cache = pd.DataFrame()
-        self._teams_cache = pd.DataFrame()
-        self._schedule_cache = pd.DataFrame()
+        with self._lock:
+            self._entries = {}
         logger.info("Data cache cleared")
 
+    def data_version(self, dataset: Optional[str] = None) -> str:
+        """
+        Version token of the stored data.
+
+        The token changes whenever a save (from any process) may have changed
+        the data, so downstream caches can key on it.
+
+        Args:
+            dataset: "players", "teams" or "schedule" (default: all three)
+        """
+        if dataset is not None:
+            return storage_dataset_version(dataset)
+        return "/".join(storage_dataset_version(name) for name in CACHED_DATASETS)
+
+    def _current(self, dataset: str, key=None) -> Optional[Any]:
+        """Cached value if it is at the dataset's on-disk version."""
+        version = storage_dataset_version(dataset)
+        with self._lock:
+            entry = self._entries.get((dataset, key))
+        return entry[1] if entry is not None and entry[0] == version else None
+
+    def _load_once(
+        self, dataset: str, key, loader: Callable[[], Any], use_cache: bool = True
+    ) -> Any:
+        """
+        Load a value once per dataset version.
+
+        The first caller to see a new version runs loader; callers arriving
+        while it runs get the previous version's value if there is one (so
+        a reload never blocks readers) and otherwise wait for the load.
+        """
+        slot = (dataset, key)
+        staged = getattr(self._staging, "entries", None)
+        if staged is not None:
+            return self._load_staged(staged, slot, loader)
+
+        if not use_cache:
+            version = storage_dataset_version(dataset)
+            value = loader()
+            with self._lock:
+                self._entries[slot] = (version, value)
+                self._loaders[slot] = loader
+            return value
+
+        version = storage_dataset_version(dataset)
+        flight_key = slot + (version,)
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = Future()
+            elif entry is not None:
+                return entry[1]
+
+        if not leader:
+            return flight.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[flight_key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[slot] = (version, value)
+            self._loaders[slot] = loader
+            del self._flights[flight_key]
+        flight.set_result(value)
+        return value
+
+    def _load_staged(self, staged: dict, slot: tuple, loader: Callable[[], Any]) -> Any:
+        """_load_once on the reload thread: build into the staging area."""
+        version = storage_dataset_version(slot[0])
+        entry = staged.get(slot)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        if not self._staging.force:
+            with self._lock:
+                entry = self._entries.get(slot)
+        if entry is None or entry[0] != version:
+            entry = (version, loader())
+        staged[slot] = entry
+        return entry[1]
+
+    def reload(self, force: bool = False) -> int:
+        """
+        Rebuild cached entries for the current data version and swap them in.
+
+        Every entry loaded so far (frames, indexes and values derived from
+        them) whose dataset changed on disk is rebuilt off to the side while
+        requests keep being served from the previous version. The new entries
+        then replace the old ones in one step. Requests already holding old
+        frames finish on them, and the old version is freed once they are
+        done.
+
+        Args:
+            force: Rebuild every entry even if its version is unchanged
+
+        Returns:
+            Number of entries rebuilt
+        """
+        versions = {name: storage_dataset_version(name) for name in CACHED_DATASETS}
+        with self._lock:
+            slots = {
+                slot: loader for slot, loader in self._loaders.items()
+                if force or self._entries.get(slot, (None,))[0] != versions.get(slot[0])
+            }
+            # Requests for these slots get the old entry (or wait) meanwhile
+            flights = {}
+            for slot in slots:
+                flight_key = slot + (versions.get(slot[0]),)
+                if flight_key not in self._flights:
+                    flights[flight_key] = self._flights[flight_key] = Future()
+
+        staged = self._staging.entries = {}
+        self._staging.force = force
+        try:
+            for slot, loader in slots.items():
+                self._load_once(*slot, loader)
+        except BaseException as e:
+            with self._lock:
+                for flight_key, flight in flights.items():
+                    del self._flights[flight_key]
+                    flight.set_exception(e)
+            raise
+        finally:
+            self._staging.entries = None
+
+        with self._lock:
+            self._entries.update(staged)
+            for flight_key, flight in flights.items():
+                del self._flights[flight_key]
+                flight.set_result(staged.get(flight_key[:2], (None, None))[1])
+
+        logger.info(f"Reloaded {len(slots)} cached entries")
+        return len(slots)
+
+    def _load_frame(self, dataset: str, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Load a whole dataset, through the shared memory-mapped copy when
+        settings.shared_dataset is on (see bbcoach.data.shared).
+        """
+        if not settings.shared_dataset:
+            return load()
+        return shared_frame(dataset, load)
+
     def get_metadata(self) -> dict:
         """Get the data storage metadata."""
         meta_path = self.data_dir / "metadata.json"
@@ -62,31 +245,148 @@ class DataService:
             self.data_dir.mkdir(parents=True)
             
         meta_path = self.data_dir / "metadata.json"
-        metadata = self.get_metadata()
-        metadata["last_fetched"] = datetime.now().isoformat()
-        
+
         try:
-            with open(meta_path, "w") as f:
-                json.dump(metadata, f, indent=2)
+            # Read-modify-write under a lock so concurrent writers keep each
+            # other's keys; the atomic replace keeps readers off partial files
+            with file_lock(self.data_dir / ".metadata.lock"):
+                metadata = self.get_metadata()
+                metadata["last_fetched"] = datetime.now().isoformat()
+                atomic_write_json(meta_path, metadata, indent=2)
         except Exception as e:
             logger.error(f"Error writing metadata: {e}")
 
-    def load_players(self, use_cache: bool = True) -> pd.DataFrame:
+    def load_players(
+        self,
+        use_cache: bool = True,
+        league: Optional[str] = None,
+        season: Optional[int] = None,
+        columns: Optional[list[str]] = None,
+        as_of=None,
+    ) -> pd.DataFrame:
         """
         Load players data.
 
         Args:
             use_cache: Whether to use cached data
+            league: Only load this league's partitions
+            season: Only load this season's partitions
+            columns: Only load these columns
+            as_of: Read the players as they were at this timestamp or
+                snapshot seq (not cached)
 
         Returns:
             DataFrame with player data
         """
-        if use_cache and not self._players_cache.empty:
-            return self._players_cache
+        if as_of is not None:
+            return storage_load_players(
+                league=league, season=season, columns=columns, as_of=as_of
+            )
 
-        df = storage_load_players()
-        self._players_cache = df
-        return df
+        if league is None and season is None and columns is None:
+            if not use_cache:
+                return storage_load_players()
+            return self.player_index().frame
+
+        # A warm full cache already holds every partition
+        index = self._current("players", "index") if use_cache else None
+        if index is not None:
+            df = index.partition(league, season)
+            return df[[c for c in columns if c in df.columns]] if columns else df
+
+        key = (league, season, tuple(columns) if columns else None)
+        return self._load_once(
+            "players",
+            key,
+            lambda: storage_load_players(league=league, season=season, columns=columns),
+            use_cache,
+        )
+
+    def player_index(self) -> PlayerIndex:
+        """
+        Group indexes over all players, built once per data version.
+
+        Its frame is the cached players frame (sorted by league, season and
+        team_id); lookups by partition, team, player id or name return
+        slices of it.
+        """
+        # Published already sorted, so workers mapping it skip the sort
+        return self._load_once(
+            "players",
+            "index",
+            lambda: PlayerIndex(
+                self._load_frame("players", lambda: PlayerIndex(storage_load_players()).frame)
+            ),
+        )
+
+    def leaderboards(self) -> Leaderboards:
+        """Per-metric rankings of every league/season, built once per data version."""
+        return self._load_once("players", "leaderboards", lambda: Leaderboards(self.player_index()))
+
+    def player_names(self) -> NameIndex:
+        """Player name resolution index, built once per data version."""
+        return self._load_once(
+            "players", "names", lambda: NameIndex.for_players(self.player_index().frame)
+        )
+
+    def team_names(self) -> NameIndex:
+        """Team name resolution index, built once per data version."""
+        return self._load_once("teams", "names", lambda: NameIndex.for_teams(self.load_teams()))
+
+    def percentiles(self) -> Percentiles:
+        """Per-metric distributions of every league/season, built once per data version."""
+        return self._load_once("players", "percentiles", lambda: Percentiles(self.player_index()))
+
+    def similarity_index(self) -> SimilarityIndex:
+        """
+        Player similarity index, built once per data version.
+
+        A rebuild for a new version reuses the standardized vectors of the
+        partitions that did not change.
+        """
+        def build() -> SimilarityIndex:
+            with self._lock:
+                entry = self._entries.get(("players", "similarity"))
+            return SimilarityIndex(self.player_index(), previous=entry[1] if entry else None)
+
+        return self._load_once("players", "similarity", build)
+
+    def team_aggregates(self) -> dict[tuple, dict]:
+        """Rotation aggregates of every (team_id, season), built once per data version."""
+        return self._load_once(
+            "players",
+            "team_aggregates",
+            lambda: compute_all_team_aggregates(self.player_index().frame),
+        )
+
+    def list_snapshots(self, dataset: str = "players") -> list[dict]:
+        """List the recorded snapshots of a dataset, oldest first."""
+        return storage_list_snapshots(dataset)
+
+    def player_deltas(
+        self,
+        start,
+        end,
+        league: Optional[str] = None,
+        season: Optional[int] = None,
+        columns: Optional[list[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Per-player stat changes between two snapshots.
+
+        Args:
+            start: Earlier timestamp or snapshot seq
+            end: Later timestamp or snapshot seq
+            league: Only this league
+            season: Only this season
+            columns: Stats to compare (default: all numeric columns)
+
+        Returns:
+            DataFrame with <stat>_before/_after/_delta columns per changed player
+        """
+        return storage_snapshot_deltas(
+            "players", start, end, league=league, season=season, columns=columns
+        )
 
     def load_teams(self, use_cache: bool = True) -> pd.DataFrame:
         """
@@ -98,12 +398,9 @@ class DataService:
         Returns:
             DataFrame with team data
         """
-        if use_cache and not self._teams_cache.empty:
-            return self._teams_cache
-
-        df = storage_load_teams()
-        self._teams_cache = df
-        return df
+        return self._load_once(
+            "teams", None, lambda: self._load_frame("teams", storage_load_teams), use_cache
+        )
 
     def load_schedule(self, use_cache: bool = True) -> pd.DataFrame:
         """
@@ -115,37 +412,107 @@ class DataService:
         Returns:
             DataFrame with schedule data
         """
-        if use_cache and not self._schedule_cache.empty:
-            return self._schedule_cache
+        return self._load_once(
+            "schedule", None, lambda: self._load_frame("schedule", storage_load_schedule), use_cache
+        )
 
-        df = storage_load_schedule()
-        self._schedule_cache = df
-        return df
+    def schedule_index(self) -> ScheduleIndex:
+        """Sorted schedule index, rebuilt when the schedule is reloaded."""
+        return self._load_once("schedule", "index", lambda: ScheduleIndex(self.load_schedule()))
+
+    def completed_games(self) -> pd.DataFrame:
+        """One row per completed game (see ratings.completed_games), per data version."""
+        return self._load_once("schedule", "games", lambda: completed_games(self.load_schedule()))
+
+    def ratings(self) -> RatingEngine:
+        """
+        Elo/SRS team ratings from the schedule's results, per data version.
+
+        A new version only rates the games that were added after the last
+        rated game of each league/season (partitions whose past changed are
+        replayed).
+        """
+        def build() -> RatingEngine:
+            with self._lock:
+                entry = self._entries.get(("schedule", "ratings"))
+            previous = entry[1] if entry else RatingEngine()
+            return previous.update(self.load_schedule())
+
+        return self._load_once("schedule", "ratings", build)
+
+    def standings(self) -> Standings:
+        """League tables of every league/season, built once per data version."""
+        return self._load_once("schedule", "standings", lambda: Standings(self.load_schedule()))
+
+    def next_game(self, team_id: str, now=None) -> Optional[dict]:
+        """Next scheduled game of a team (at or after now)."""
+        return self.schedule_index().next_game(team_id, now)
+
+    def games_between(self, team_id: str, start=None, end=None) -> pd.DataFrame:
+        """Games of a team with start <= date < end, ordered by date."""
+        return self.schedule_index().games_between(team_id, start, end)
+
+    def head_to_head(self, team_a_id: str, team_b_id: str) -> pd.DataFrame:
+        """Games between two teams, from team_a's side, ordered by date."""
+        return self.schedule_index().head_to_head(team_a_id, team_b_id)
+
+    def query(
+        self,
+        sql: str,
+        params: Optional[list] = None,
+        max_rows: Optional[int] = None,
+    ) -> QueryResult:
+        """
+        Run a read-only SQL query over the stored datasets.
+
+        The query runs on the parquet files directly (the caches are not
+        used) against the views players, teams and schedule.
+
+        Args:
+            sql: A single SELECT statement
+            params: Positional parameters for ? placeholders
+            max_rows: Row cap (defaults to settings)
+
+        Returns:
+            QueryResult streaming the result; close it if not read to the end
+
+        Raises:
+            QueryError: If the SQL is rejected or fails
+        """
+        return storage_query(
+            sql,
+            params,
+            max_rows=max_rows or settings.sql_query_max_rows,
+            timeout=settings.sql_query_timeout,
+        )
 
     def get_data_status(self) -> dict:
         """
         Get status of data files.
 
+        Counts come from parquet metadata (see storage.dataset_stats), so
+        this neither loads the datasets nor touches the caches.
+
         Returns:
             Dictionary with data file information
         """
-        players_df = self.load_players()
-        teams_df = self.load_teams()
-        schedule_df = self.load_schedule()
+        players = storage_dataset_stats("players")
+        teams = storage_dataset_stats("teams")
+        schedule = storage_dataset_stats("schedule")
 
         metadata = self.get_metadata()
 
         return {
-            "players_count": len(players_df),
-            "teams_count": len(teams_df),
-            "schedule_count": len(schedule_df),
-            "has_players": not players_df.empty,
-            "has_teams": not teams_df.empty,
-            "has_schedule": not schedule_df.empty,
+            "players_count": players["rows"],
+            "teams_count": teams["rows"],
+            "schedule_count": schedule["rows"],
+            "has_players": players["rows"] > 0,
+            "has_teams": teams["rows"] > 0,
+            "has_schedule": schedule["rows"] > 0,
             "last_fetched": metadata.get("last_fetched"),
-            "seasons_in_data": (
-                sorted(players_df["season"].unique().tolist())
-                if not players_df.empty
-                else []
-            ),
+            "data_version": self.data_version(),
+            "seasons_in_data": sorted({
+                p["season"] for p in players["partitions"]
+                if p["rows"] and p["season"] is not None
+            }),
         }
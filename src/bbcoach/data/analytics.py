@@ -3,7 +3,9 @@ import plotly.graph_objects as go
 from typing import List
 
 
-def create_radar_chart(player_stats: pd.DataFrame, metrics: List[str] = None):
+def create_radar_chart(
+    player_stats: pd.DataFrame, metrics: List[str] = None, percentiles=None
+):
     """
     Creates a radar chart comparing players based on provided stats.
 
@@ -12,6 +14,10 @@ def create_radar_chart(player_stats: pd.DataFrame, metrics: List[str] = None):
                                      Must have 'name' column and numeric columns for metrics.
         metrics (List[str]): List of column names to potentiall visualize.
                              Defaults to ['PPG', 'RPG', 'APG', 'SPG', '3P%'].
+        percentiles (Percentiles): League distributions to plot each stat as
+                                   the player's percentile in their league/season
+                                   (0-100, so stats of different scales compare).
+                                   Raw values are plotted without it.
     """
     if metrics is None:
         metrics = ["PPG", "RPG", "APG", "SPG", "3P%"]
@@ -23,22 +29,34 @@ def create_radar_chart(player_stats: pd.DataFrame, metrics: List[str] = None):
     if not available_metrics or player_stats.empty:
         return None
 
-    fig = go.Figure()
+    if percentiles is not None:
+        # One vectorized lookup for every player; raw values go in the hover
+        plotted = percentiles.lookup(player_stats, available_metrics)[0]
+        available_metrics = list(plotted.columns)
+        if not available_metrics:
+            return None
+        radial_range = [0, 100]
+    else:
+        plotted = player_stats[available_metrics]
+        radial_range = [0, plotted.max().max() * 1.1]
 
-    for i, row in player_stats.iterrows():
-        # Normalize or use raw? For now, raw values, but radar charts often need normalization
-        # to be fair (e.g. 30 PPG vs 2 SPG).
-        # Let's simple plot raw for now, knowing the scale difference might be an issue.
-        # Ideally we'd use percentiles, but we don't have league-wide context easily here.
+    fig = go.Figure()
 
-        values = [row[m] for m in available_metrics]
+    plot_metrics = available_metrics + [available_metrics[0]]
+    for (i, row), (_, values) in zip(player_stats.iterrows(), plotted.iterrows()):
+        values = values.tolist()
         # Close the polygon
         values.append(values[0])
-        plot_metrics = available_metrics + [available_metrics[0]]
+        raw = [row[m] for m in plot_metrics]
 
         fig.add_trace(
             go.Scatterpolar(
-                r=values, theta=plot_metrics, fill="toself", name=row["name"]
+                r=values,
+                theta=plot_metrics,
+                fill="toself",
+                name=row["name"],
+                customdata=raw,
+                hovertemplate="%{theta}: %{customdata}<extra>%{fullData.name}</extra>",
             )
         )
 
@@ -46,69 +64,71 @@ def create_radar_chart(player_stats: pd.DataFrame, metrics: List[str] = None):
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, player_stats[available_metrics].max().max() * 1.1],
+                range=radial_range,
             )
         ),
         showlegend=True,
-        title="Player Comparison",
+        title="Player Comparison (league percentile)" if percentiles is not None else "Player Comparison",
     )
     return fig
 
 
-def create_win_loss_trend(team_name: str):
-    """
-    Creates a trend line of cumulative wins/losses over a simulated season.
-    Mocks data for now as we don't have game logs.
+def create_win_loss_trend(team_name: str, history: pd.DataFrame):
     """
-    import numpy as np
-
-    # Simulate 30 games
-    games = 30
-
-    # deterministic seed based on team name length for consistency
-    np.random.seed(len(team_name))
+    Creates a trend line of cumulative wins minus losses over a season,
+    with the team's Elo rating after each game.
 
-    # Base win probability (0.3 to 0.7)
-    win_prob = 0.3 + (len(team_name) % 5) * 0.1
-
-    results = np.random.choice([1, 0], size=games, p=[win_prob, 1 - win_prob])
-    cumulative_wins = np.cumsum(results)
-    cumulative_losses = np.cumsum(1 - results)
-
-    # Net Score (Win - Loss)
-    net_score = cumulative_wins - cumulative_losses
+    Args:
+        team_name (str): Team name for the title.
+        history (pd.DataFrame): The team's rated games in date order
+                                (RatingEngine.history), with 'won' and 'elo' columns.
+    """
+    if history.empty:
+        return None
 
-    df = pd.DataFrame(
-        {
-            "Game": range(1, games + 1),
-            "Net Score": net_score,
-            "Result": ["Win" if r == 1 else "Loss" for r in results],
-        }
-    )
+    results = history["won"].astype(bool).to_numpy()
+    net_score = (2 * results.astype(int) - 1).cumsum()
+    games = list(range(1, len(history) + 1))
+    opponents = [
+        f"{'W' if won else 'L'} {pf:.0f}-{pa:.0f} vs {opp}"
+        for won, pf, pa, opp in zip(
+            results, history["points_for"], history["points_against"], history["opponent_id"]
+        )
+    ]
 
     fig = go.Figure()
 
     # Color based on value (Green for positive, Red for negative)
     fig.add_trace(
         go.Scatter(
-            x=df["Game"],
-            y=df["Net Score"],
+            x=games,
+            y=net_score,
             mode="lines+markers",
-            name="Net Performance",
+            name="Net Wins",
+            text=opponents,
             line=dict(color="#FF5722", width=3),
-            marker=dict(
-                size=8, color=["green" if r == "Win" else "red" for r in df["Result"]]
-            ),
+            marker=dict(size=8, color=["green" if r else "red" for r in results]),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=games,
+            y=history["elo"],
+            mode="lines",
+            name="Elo",
+            yaxis="y2",
+            line=dict(color="#2196F3", width=2, dash="dot"),
         )
     )
 
     fig.update_layout(
-        title=f"Season Momentum: {team_name} (Simulated)",
+        title=f"Season Momentum: {team_name}",
         xaxis_title="Game Number",
         yaxis_title="Net Wins (Wins - Losses)",
+        yaxis2=dict(title="Elo Rating", overlaying="y", side="right", showgrid=False),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        showlegend=False,
+        showlegend=True,
     )
 
     return fig
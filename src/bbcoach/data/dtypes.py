@@ -0,0 +1,135 @@
+"""
+Dtype Policy
+
+Compact in-memory dtypes for the frames returned by bbcoach.data.storage.
+
+Each frame kind has a schema mapping columns to a target dtype. Columns not
+in the schema follow the defaults: float64 becomes float32 and object
+columns holding only strings become Arrow-backed strings. int16 casts that
+would lose information (nulls, fractions, overflow) fall back to float32.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = "category"
+INT16 = "int16"
+FLOAT32 = "float32"
+
+# Arrow-backed strings with NaN missing values, so comparisons and masks
+# behave like the object columns they replace
+STRING = pd.StringDtype("pyarrow", na_value=np.nan)
+
+PLAYER_SCHEMA = {
+    "league": CATEGORY,
+    "team_id": CATEGORY,
+    "team_name": CATEGORY,
+    "name": STRING,  # Unique per player: categories would save nothing
+    "link": STRING,
+    "season": INT16,
+    "GP": INT16,
+    "G": INT16,
+    "GS": INT16,
+    "schema_version": INT16,
+}
+
+TEAM_SCHEMA = {
+    "league": CATEGORY,
+    "name": CATEGORY,
+    "season": INT16,
+}
+
+
+def _to_int16(series: pd.Series) -> pd.Series:
+    values = pd.to_numeric(series, errors="coerce")
+    non_null = values.dropna()
+    fits = non_null.empty or (
+        (non_null == np.round(non_null)).all()
+        and non_null.min() >= np.iinfo(np.int16).min
+        and non_null.max() <= np.iinfo(np.int16).max
+    )
+    # Missing values stay NaN (as in the float64 frames) rather than pd.NA
+    if not fits or non_null.size < values.size:
+        return values.astype(FLOAT32)
+    return values.astype(INT16)
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string"
+
+
+def apply_dtypes(df: pd.DataFrame, schema: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Cast a frame to compact dtypes.
+
+    Args:
+        df: Frame to cast (not modified)
+        schema: Column -> dtype overrides (PLAYER_SCHEMA, TEAM_SCHEMA, ...)
+
+    Returns:
+        New frame with compact dtypes
+    """
+    schema = schema or {}
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        target = schema.get(col)
+        if target == CATEGORY:
+            if series.dtype == object and not _is_string_column(series.dropna()):
+                columns[col] = series
+            else:
+                columns[col] = series.astype(CATEGORY)
+        elif target == INT16:
+            columns[col] = _to_int16(series)
+        elif target is not None:
+            columns[col] = series.astype(target)
+        elif series.dtype == np.float64:
+            columns[col] = series.astype(FLOAT32)
+        elif _is_string_column(series):
+            columns[col] = series.astype(STRING)
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def widen_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Widen float32 columns to float64 through their shortest repr.
+
+    A plain cast turns 12.3 into 12.300000190734863; going through the
+    repr keeps 12.3, so sums and JSON output match the float64 data.
+    """
+    float32_cols = [c for c in df.columns if df[c].dtype == np.float32]
+    if not float32_cols:
+        return df
+    out = df.copy()
+    for col in float32_cols:
+        out[col] = out[col].astype(str).astype(np.float64)
+    return out
+
+
+def to_records(df: pd.DataFrame) -> list[dict]:
+    """Convert a frame to JSON-friendly records (float32 widened, missing as None)."""
+    out = widen_floats(df).astype(object)
+    return out.where(out.notna(), None).to_dict(orient="records")
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """
+    Compare the memory footprint of a frame before and after apply_dtypes.
+
+    Returns:
+        Dictionary with rows, total bytes and bytes per row for both frames
+    """
+    rows = max(len(before), 1)
+    before_bytes = int(before.memory_usage(deep=True).sum())
+    after_bytes = int(after.memory_usage(deep=True).sum())
+    return {
+        "rows": len(before),
+        "before_bytes": before_bytes,
+        "after_bytes": after_bytes,
+        "before_bytes_per_row": before_bytes / rows,
+        "after_bytes_per_row": after_bytes / rows,
+        "reduction": 1 - after_bytes / before_bytes if before_bytes else 0.0,
+    }
@@ -0,0 +1,78 @@
+"""
+Leaderboards
+
+Per-metric rankings of every league/season partition, built once per data
+version so a top-N request is a slice of a presorted order.
+
+Only metrics in the METRICS catalog are ranked; anything else is rejected
+up front instead of being looked up in the frame.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.player_index import PlayerIndex
+
+# Rankable player stats and their display labels
+METRICS = {
+    "PPG": "Points per game",
+    "RPG": "Rebounds per game",
+    "ORPG": "Offensive rebounds per game",
+    "DRPG": "Defensive rebounds per game",
+    "APG": "Assists per game",
+    "SPG": "Steals per game",
+    "STPG": "Steals per game (Genius)",
+    "BPG": "Blocks per game",
+    "BLKPG": "Blocks per game (Genius)",
+    "TO": "Turnovers per game",
+    "TOPG": "Turnovers per game (Genius)",
+    "MIN": "Minutes per game",
+    "MPG": "Minutes per game (Genius)",
+    "EFF": "Efficiency",
+    "FG%": "Field goal %",
+    "2P%": "2-point %",
+    "3P%": "3-point %",
+    "FT%": "Free throw %",
+    "3PM": "3-pointers made",
+    "A/TO": "Assist to turnover ratio",
+    "+/- PG": "Plus/minus per game",
+    "GP": "Games played",
+}
+
+
+def is_metric(metric: str) -> bool:
+    return metric in METRICS
+
+
+class Leaderboards:
+    """
+    Rankings over the partitions of a PlayerIndex.
+
+    For every (league, season, metric) the row positions of players with a
+    value are kept sorted best first (ties in frame order); players without
+    a value are left out.
+    """
+
+    def __init__(self, index: PlayerIndex):
+        self.index = index
+        frame = index.frame
+        self.metrics = [m for m in METRICS if m in frame.columns]
+        self._orders: dict[tuple, np.ndarray] = {}
+
+        partitions = index.partition_positions()
+        for metric in self.metrics:
+            values = pd.to_numeric(frame[metric], errors="coerce").to_numpy(dtype=np.float64)
+            for (league, season), positions in partitions.items():
+                part = values[positions]
+                has_value = ~np.isnan(part)
+                order = np.argsort(-part[has_value], kind="stable")
+                self._orders[(league, season, metric)] = positions[has_value][order]
+
+    def top(self, league: str, season: Optional[int], metric: str, limit: int = 10) -> pd.DataFrame:
+        """The limit best players of a partition by metric (empty if unknown)."""
+        season = None if season is None else int(season)
+        order = self._orders.get((str(league), season, metric))
+        if order is None:
+            return self.index.frame.iloc[0:0]
+        return self.index.frame.iloc[order[: max(limit, 0)]]
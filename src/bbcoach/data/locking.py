@@ -0,0 +1,78 @@
+"""
+File Locking
+
+Advisory inter-process locks and atomic file replacement, so API workers,
+the Streamlit app and CLI scrapers can share data_storage/ safely.
+
+Locks use flock(2), which also excludes threads of the same process that
+open the lock file separately. On platforms without fcntl the locks are
+no-ops and only the atomic renames protect readers.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold an advisory lock on path for the duration of the block.
+
+    Args:
+        path: Lock file (created if missing)
+        shared: Take a shared (reader) lock instead of an exclusive one
+        blocking: Wait for the lock; otherwise yield False if it is taken
+
+    Yields:
+        True if the lock is held
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is None:
+            yield True
+            return
+
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write data to a temp file next to path, fsync it and rename it over path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_json(path: Path, data, **kwargs):
+    """Atomically replace path with data serialized as JSON."""
+    atomic_write_bytes(path, json.dumps(data, **kwargs).encode("utf-8"))
@@ -0,0 +1,102 @@
+"""
+Schema Migrations
+
+Versioned upgrades applied to rows at ingest time, so the read path is a
+plain columnar read.
+
+Each dataset has an ordered list of migrations: migration N upgrades rows
+from schema_version N-1 to N. Rows written before versioning carry no
+schema_version and count as version 0. New batches are upgraded by
+bbcoach.data.storage before they are written; data already on disk is
+upgraded once by storage.run_migrations.
+
+Usage:
+    python -m bbcoach.data.migrations
+"""
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.normalize import normalize_player_stats
+from bbcoach.data.schedule import prepare_schedule
+
+SCHEMA_VERSION_COLUMN = "schema_version"
+
+
+def _normalize_raw_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """v1: derive PPG/RPG/APG/MIN/TO/3P%/FG%/EFF from legacy raw_stats lists."""
+    if "raw_stats" not in df.columns:
+        return df
+    return normalize_player_stats(df)
+
+
+def _parse_schedule_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """v1: parse free-text dates into tz-aware datetimes (text kept as date_text)."""
+    return prepare_schedule(df)
+
+
+MIGRATIONS = {
+    "players": [_normalize_raw_stats],
+    "teams": [],
+    "schedule": [_parse_schedule_dates],
+}
+
+
+def _migrations(name: str) -> list:
+    # "players_genius" migrates like "players"
+    return MIGRATIONS.get(name, MIGRATIONS.get(name.split("_")[0], []))
+
+
+def schema_version(name: str) -> int:
+    """Current schema version of a dataset."""
+    return len(_migrations(name))
+
+
+def upgrade(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    Bring every row of df to the current schema version of dataset name.
+
+    Only rows below a migration's version go through it, so upgrading
+    already current rows is a no-op.
+
+    Returns:
+        Upgraded frame (same index order) with a schema_version column,
+        or df unchanged for datasets without migrations
+    """
+    migrations = _migrations(name)
+    if not migrations or df.empty:
+        return df
+
+    if SCHEMA_VERSION_COLUMN in df.columns:
+        versions = pd.to_numeric(df[SCHEMA_VERSION_COLUMN], errors="coerce").fillna(0)
+    else:
+        versions = pd.Series(0, index=df.index)
+
+    for version, migration in enumerate(migrations, start=1):
+        stale = (versions < version).to_numpy()
+        if not stale.any():
+            continue
+        migrated = migration(df[stale].copy())
+        if stale.all():
+            df = migrated
+        else:
+            # Restore the original row order (the index may hold duplicates)
+            order = np.concatenate([np.flatnonzero(~stale), np.flatnonzero(stale)])
+            df = pd.concat([df[~stale], migrated]).iloc[np.argsort(order, kind="stable")]
+
+    df[SCHEMA_VERSION_COLUMN] = len(migrations)
+    return df
+
+
+def main():
+    from bbcoach.data import storage
+
+    storage.migrate_legacy_files()
+    for name in MIGRATIONS:
+        if storage.run_migrations(name):
+            print(f"Migrated {name} to schema version {schema_version(name)}")
+        else:
+            print(f"{name} is at schema version {schema_version(name)}")
+
+
+if __name__ == "__main__":
+    main()
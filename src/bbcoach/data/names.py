@@ -0,0 +1,201 @@
+"""
+Name Resolution
+
+Finds player and team names in free text and resolves misspelled names,
+accent- and case-insensitively (see player_index.normalize_name).
+
+Mentions are found in one pass over the text with an Aho-Corasick
+automaton over every known name, matching whole words only and preferring
+the longest name at each position. Fuzzy lookups score names by shared
+character trigrams (Dice coefficient) with an inverted index, so a lookup
+only touches names that share a trigram with the query.
+
+Teams are also known by their name without generic words ("Högsbo" for
+"Högsbo Basket").
+"""
+from collections import deque
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.player_index import normalize_name
+
+# Words dropped from team names to give the short form people use
+GENERIC_TEAM_WORDS = {"basket", "basketball", "basketboll", "bk", "bbk", "bc", "ik", "if", "club"}
+
+MIN_SCORE = 0.4  # Still matches full names with two typos
+
+
+def trigrams(name: str) -> set[str]:
+    """Character trigrams of a normalized name, padded at the word edges."""
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def team_aliases(name: str) -> list[str]:
+    """Normalized forms a team is referred to by."""
+    full = normalize_name(name)
+    short = " ".join(w for w in full.split() if w not in GENERIC_TEAM_WORDS)
+    return [full] + ([short] if short and short != full else [])
+
+
+class _Automaton:
+    """Aho-Corasick automaton over a set of strings."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[str]] = [[]]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(pattern)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """Every (start, end, pattern) occurrence in text."""
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for pattern in self.out[node]:
+                matches.append((i + 1 - len(pattern), i + 1, pattern))
+        return matches
+
+
+class NameIndex:
+    """
+    Mention extraction and fuzzy lookup over named entities.
+
+    Args:
+        ids: Entity identifiers
+        names: Display name of each entity
+        kind: Entity kind reported in results ("player", "team")
+        aliases: Normalized aliases of each entity (default: its name)
+    """
+
+    def __init__(self, ids, names, kind: str, aliases: Optional[list[list[str]]] = None):
+        self.kind = kind
+        self.ids = [str(i) for i in ids]
+        self.names = [None if pd.isna(n) else str(n) for n in names]
+        if aliases is None:
+            aliases = [[normalize_name(n)] for n in self.names]
+
+        # Alias -> entities (several players can share a name)
+        self._entities: dict[str, list[int]] = {}
+        for entity, entity_aliases in enumerate(aliases):
+            for alias in entity_aliases:
+                if alias and entity not in self._entities.setdefault(alias, []):
+                    self._entities[alias].append(entity)
+        self._aliases = list(self._entities)
+        self._automaton = _Automaton(self._aliases)
+
+        # Trigram -> alias positions, and each alias's trigram count
+        postings: dict[str, list[int]] = {}
+        counts = []
+        for i, alias in enumerate(self._aliases):
+            grams = trigrams(alias)
+            counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(p, dtype=np.int64) for gram, p in postings.items()}
+        self._counts = np.array(counts, dtype=np.float64)
+
+    @classmethod
+    def for_players(cls, players_df: pd.DataFrame) -> "NameIndex":
+        """Players by id, named as in their latest season."""
+        if players_df.empty or not {"id", "name"} <= set(players_df.columns):
+            return cls([], [], "player")
+        latest = players_df
+        if "season" in players_df.columns:
+            latest = players_df.sort_values("season", kind="stable", na_position="first")
+        latest = latest.drop_duplicates("id", keep="last")
+        return cls(latest["id"], latest["name"], "player")
+
+    @classmethod
+    def for_teams(cls, teams_df: pd.DataFrame) -> "NameIndex":
+        """Teams by id, also known by their name without generic words."""
+        if teams_df.empty or not {"id", "name"} <= set(teams_df.columns):
+            return cls([], [], "team")
+        teams = teams_df.drop_duplicates("id", keep="last")
+        names = teams["name"].tolist()
+        return cls(teams["id"], names, "team", [team_aliases(n) for n in names])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _entity(self, entity: int, **extra) -> dict:
+        return {"kind": self.kind, "id": self.ids[entity], "name": self.names[entity], **extra}
+
+    def mentions(self, text: str) -> list[dict]:
+        """
+        Entities named in text (whole words, longest name first at
+        overlapping positions), in order of appearance.
+        """
+        text = normalize_name(text)
+        matches = sorted(self._automaton.find(text), key=lambda m: (m[0], m[0] - m[1]))
+        found = []
+        end = 0
+        seen = set()
+        for start, stop, alias in matches:
+            if start < end:
+                continue
+            if (start > 0 and text[start - 1].isalnum()) or (stop < len(text) and text[stop].isalnum()):
+                continue
+            end = stop
+            for entity in self._entities[alias]:
+                if entity not in seen:
+                    seen.add(entity)
+                    found.append(self._entity(entity, match=alias))
+        return found
+
+    def resolve(self, name: str, limit: int = 5, min_score: float = MIN_SCORE) -> list[dict]:
+        """
+        Entities whose name matches name, best first.
+
+        An exact (normalized) match scores 1.0; otherwise the score is the
+        Dice coefficient of the names' trigrams.
+        """
+        query = normalize_name(name)
+        if not query or not self._aliases:
+            return []
+        if query in self._entities:
+            return [self._entity(e, score=1.0) for e in self._entities[query]][:limit]
+
+        grams = [self._postings[g] for g in trigrams(query) if g in self._postings]
+        if not grams:
+            return []
+        shared = np.bincount(np.concatenate(grams), minlength=len(self._aliases))
+        scores = 2 * shared / (len(trigrams(query)) + self._counts)
+        candidates = np.flatnonzero(scores >= min_score)
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        results = {}
+        for alias in candidates:
+            for entity in self._entities[self._aliases[alias]]:
+                if entity not in results:
+                    results[entity] = float(scores[alias])
+            if len(results) >= limit:
+                break
+        return [self._entity(e, score=s) for e, s in list(results.items())[:limit]]
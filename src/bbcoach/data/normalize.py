@@ -0,0 +1,438 @@
+"""
+Stat Normalization
+
+Turns the legacy ``raw_stats`` lists (one scraped table row per player) into
+the numeric PPG/RPG/APG/MIN/TO/3P%/FG%/EFF columns the rest of the app uses.
+
+``normalize_player_stats`` is the columnar engine: it explodes ``raw_stats``
+into a dictionary-encoded 2-D string array once, parses every distinct token a
+single time and applies the totals-vs-averages heuristic and the sanity caps as
+masked array operations. ``normalize_player_stats_rowwise`` is the original per-row
+implementation, kept as the reference the engine is tested and benchmarked
+against.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Positions inside a raw_stats row (proballers table layout)
+PTS_IDX = 3
+REB_IDX = 4
+AST_IDX = 5
+GP_IDX = 6
+MIN_IDX = 8
+FG_PCT_IDX = 9
+THREE_PCT_IDX = 10
+TO_IDX = 18
+EFF_IDX = -4
+
+# Sanity caps: per-game values above these are scraping artefacts
+RPG_CAP = 20
+APG_CAP = 15
+MIN_CAP = 48
+
+_POSITIONS = [PTS_IDX, REB_IDX, AST_IDX, GP_IDX, MIN_IDX, FG_PCT_IDX, THREE_PCT_IDX, TO_IDX, EFF_IDX]
+
+
+def _raw_list(x):
+    """Return x if it is a non-empty list-like raw_stats row, else None."""
+    if x is not None and hasattr(x, "__len__") and not isinstance(x, str):
+        if len(x) > 0:
+            return x
+    return None
+
+
+def _to_list_array(raw: pd.Series) -> pa.ListArray:
+    """Convert the raw_stats column into an Arrow list<string> array."""
+    values = raw.to_numpy(dtype=object)
+    try:
+        arr = pa.array(values, from_pandas=True)
+        if pa.types.is_list(arr.type) and pa.types.is_string(arr.type.value_type):
+            return arr
+    except (pa.ArrowException, TypeError, ValueError):
+        pass
+
+    # Mixed or non-string cells: stringify element-wise like str(row[idx]) did
+    rows = []
+    for x in values:
+        x = _raw_list(x)
+        rows.append(None if x is None else [str(v) for v in x])
+    return pa.array(rows, type=pa.list_(pa.string()))
+
+
+def explode_raw_stats(
+    raw: pd.Series, positions: list[int]
+) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """
+    Explode raw_stats into a dictionary-encoded 2-D string array.
+
+    Args:
+        raw: Series of raw_stats lists (numpy arrays, lists, None or NaN)
+        positions: Row positions to extract; negative values count from the end
+
+    Returns:
+        Tuple of (lengths, codes, tokens). lengths holds the list length of
+        each row (0 when there is no usable raw row). codes has shape
+        (len(raw), len(positions)) and indexes into tokens, with -1 for
+        out-of-range cells.
+    """
+    arr = _to_list_array(raw)
+    lengths = pc.list_value_length(arr).fill_null(0).to_numpy(zero_copy_only=False)
+    lengths = lengths.astype(np.int64)
+    starts = arr.offsets.to_numpy()[:-1].astype(np.int64)
+
+    # Gather the cells we need, position by position, as one flat take
+    n_rows, n_cols = len(raw), len(positions)
+    take_idx = np.zeros((n_rows, n_cols), dtype=np.int64)
+    valid = np.zeros((n_rows, n_cols), dtype=bool)
+    for j, pos in enumerate(positions):
+        if pos >= 0:
+            valid[:, j] = lengths > pos
+            take_idx[:, j] = starts + pos
+        else:
+            valid[:, j] = lengths >= -pos
+            take_idx[:, j] = starts + lengths + pos
+
+    # Null elements stringify as "None" with str(), which never parses
+    values = arr.values.fill_null("None")
+    idx = pa.array(take_idx.ravel(), mask=~valid.ravel())
+    if len(values) == 0:
+        return lengths, np.full((n_rows, n_cols), -1, dtype=np.int64), []
+
+    encoded = pc.take(values, idx).dictionary_encode()
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+    tokens = encoded.dictionary.to_pylist()
+    return lengths, codes.reshape(n_rows, n_cols), tokens
+
+
+class _Tokens:
+    """Parsed view of a 2-D code array; every distinct token is parsed once."""
+
+    def __init__(self, codes: np.ndarray, tokens: list[str]):
+        # One extra slot at the end describes missing cells (code -1)
+        n = len(tokens) + 1
+        value = np.zeros(n)
+        ok = np.zeros(n, dtype=bool)
+        pct_value = np.zeros(n)
+        pct_ok = np.zeros(n, dtype=bool)
+        has_pct = np.zeros(n, dtype=bool)
+        has_dot = np.zeros(n, dtype=bool)
+        is_dash = np.zeros(n, dtype=bool)
+        present = np.ones(n, dtype=bool)
+        present[-1] = False
+
+        for i, token in enumerate(tokens):
+            has_pct[i] = "%" in token
+            has_dot[i] = "." in token
+            is_dash[i] = token == "-"
+            try:
+                value[i] = float(token)
+                ok[i] = True
+            except ValueError:
+                pass
+            if has_pct[i]:
+                try:
+                    pct_value[i] = float(token.replace("%", ""))
+                    pct_ok[i] = True
+                except ValueError:
+                    pass
+
+        self.value = value[codes]
+        self.ok = ok[codes]
+        self.pct_value = pct_value[codes]
+        self.pct_ok = pct_ok[codes]
+        self.has_pct = has_pct[codes]
+        self.has_dot = has_dot[codes]
+        self.is_dash = is_dash[codes]
+        self.present = present[codes]
+
+
+def round1(x):
+    """
+    Vectorized equivalent of Python's ``round(x, 1)``.
+
+    ``np.round`` multiplies by 10 in floating point, which can push values
+    such as 0.15 onto a .5 tie and round them the wrong way. Here x * 10 is
+    computed exactly as a rounded sum plus its error term, so ties are only
+    broken by rint when the decimal value really is a tie.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(over="ignore", invalid="ignore"):
+        a = x * 8.0
+        b = x * 2.0
+        y = a + b
+        bb = y - a
+        err = (a - (y - bb)) + (b - bb)
+        r = np.rint(y)
+        tie = np.abs(y - r) == 0.5
+        r = np.where(tie & (err > 0), np.floor(y) + 1.0, r)
+        r = np.where(tie & (err < 0), np.floor(y), r)
+        return np.where(np.isfinite(y), r / 10.0, x)
+
+
+def _plain(t: _Tokens, j: int) -> np.ndarray:
+    """extract_stat semantics: '%' or '-' or unparsable -> 0.0."""
+    return np.where(t.ok[:, j] & ~t.has_pct[:, j], t.value[:, j], 0.0)
+
+
+def _percent(t: _Tokens, j: int) -> np.ndarray:
+    """extract_stat semantics for percentage columns ('45.5%' -> 45.5)."""
+    pct = np.where(t.pct_ok[:, j], t.pct_value[:, j], 0.0)
+    return np.where(t.has_pct[:, j], pct, _plain(t, j))
+
+
+def _games(t: _Tokens, j_gp: int) -> tuple[np.ndarray, np.ndarray]:
+    """GP value and a mask of rows where reading GP raises."""
+    dash = t.is_dash[:, j_gp]
+    gp = np.where(dash, 0.0, t.value[:, j_gp])
+    gp_err = ~t.present[:, j_gp] | (~dash & ~t.ok[:, j_gp])
+    return gp, gp_err
+
+
+def _smart_ppg(t: _Tokens, j_pts: int, j_gp: int) -> np.ndarray:
+    """Points per game, dividing totals rows by GP."""
+    dash = t.is_dash[:, j_pts]
+    pts = np.where(dash, 0.0, t.value[:, j_pts])
+    pts_err = t.has_pct[:, j_pts] | (~dash & ~t.ok[:, j_pts])
+    is_integer_string = ~t.has_dot[:, j_pts] & ~dash
+    gp, gp_err = _games(t, j_gp)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_game = round1(pts / gp)
+    is_total = (gp > 1) & ((pts > 40) | (is_integer_string & (pts > 20)))
+    # Fallback sanity check for 100.0 PPG
+    is_total |= (pts >= 99.0) & (gp > 5)
+
+    out = np.where(is_total, per_game, pts)
+    # Rows shorter than GP_IDX + 1 never had usable stats
+    return np.where(gp_err | pts_err, 0.0, out)
+
+
+def _smart_stat(t: _Tokens, j: int, j_pts: int, j_gp: int) -> np.ndarray:
+    """Per-game stat, divided by GP when the PTS cell looks like a total."""
+    present = t.present[:, j]
+    dash = t.is_dash[:, j]
+    val = np.where(dash, 0.0, t.value[:, j])
+    val_err = ~dash & ~t.ok[:, j]
+    val = np.where(t.has_pct[:, j], 0.0, val)
+
+    gp, gp_err = _games(t, j_gp)
+    pts_dash = t.is_dash[:, j_pts]
+    looks_total = (gp > 1) & ~t.has_dot[:, j_pts] & ~pts_dash
+    pts_err = looks_total & ~t.ok[:, j_pts]
+    is_total = looks_total & t.ok[:, j_pts] & (t.value[:, j_pts] > 20)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_game = round1(val / gp)
+    out = np.where(is_total, per_game, val)
+
+    failed = ~t.has_pct[:, j] & (val_err | gp_err | pts_err)
+    return np.where(~present | failed, 0.0, out)
+
+
+def _merge(df: pd.DataFrame, col: str, has_raw: np.ndarray, parsed: np.ndarray) -> pd.Series:
+    """Use parsed values for raw rows and the existing column (or 0.0) elsewhere."""
+    if col in df.columns:
+        fallback = df[col]
+    else:
+        fallback = pd.Series(0.0, index=df.index)
+    return pd.Series(parsed, index=df.index).where(has_raw, fallback)
+
+
+def normalize_player_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive numeric stat columns from raw_stats (columnar engine).
+
+    Rows without a usable raw_stats list keep their existing stat columns.
+    Output is identical to normalize_player_stats_rowwise.
+
+    Args:
+        df: Players DataFrame containing a raw_stats column
+
+    Returns:
+        The same DataFrame with GP, PPG, RPG, APG, MIN, TO, 3P%, FG%, EFF,
+        SPG and BPG columns filled in
+    """
+    if "name" in df.columns:
+        df["name"] = df["name"].astype(str).str.strip()
+
+    lengths, codes, tokens = explode_raw_stats(df["raw_stats"], _POSITIONS)
+    has_raw = lengths > 0
+    t = _Tokens(codes, tokens)
+    j = {pos: k for k, pos in enumerate(_POSITIONS)}
+
+    df["GP"] = _merge(df, "GP", has_raw, _plain(t, j[GP_IDX]))
+    df["PPG"] = _merge(df, "PPG", has_raw, _smart_ppg(t, j[PTS_IDX], j[GP_IDX]))
+
+    def smart(idx):
+        return _smart_stat(t, j[idx], j[PTS_IDX], j[GP_IDX])
+
+    df["RPG"] = _merge(df, "RPG", has_raw, smart(REB_IDX))
+    df["RPG"] = df["RPG"].mask(df["RPG"] > RPG_CAP, 0.0)
+    df["APG"] = _merge(df, "APG", has_raw, smart(AST_IDX))
+    df["APG"] = df["APG"].mask(df["APG"] > APG_CAP, 0.0)
+    df["MIN"] = _merge(df, "MIN", has_raw, smart(MIN_IDX))
+    df["MIN"] = df["MIN"].mask(df["MIN"] > MIN_CAP, 0.0)
+
+    # Consistency Check: PPG vs MIN
+    min_played = df["MIN"].to_numpy(dtype=np.float64)
+    ppg = df["PPG"]
+    implausible = (min_played > 1) & (ppg.to_numpy(dtype=np.float64) > min_played * 2.5)
+    df["PPG"] = ppg.mask(implausible, pd.Series(round1(min_played * 2), index=df.index))
+
+    df["TO"] = _merge(df, "TO", has_raw, smart(TO_IDX))
+    df["3P%"] = _merge(df, "3P%", has_raw, _percent(t, j[THREE_PCT_IDX]))
+    df["FG%"] = _merge(df, "FG%", has_raw, _percent(t, j[FG_PCT_IDX]))
+    df["EFF"] = _merge(df, "EFF", has_raw, _plain(t, j[EFF_IDX]))
+
+    if "SPG" not in df.columns:
+        df["SPG"] = 0.0
+    if "BPG" not in df.columns:
+        df["BPG"] = 0.0
+
+    return df
+
+
+def normalize_player_stats_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Original row-by-row normalization (reference implementation).
+
+    Kept for tests and benchmarks; use normalize_player_stats instead.
+    """
+    # Expected raw indices: 3:PPG, 4:RPG, 5:APG, 10:3P%
+
+    # Clean names first
+    if "name" in df.columns:
+        df["name"] = df["name"].astype(str).str.strip()
+
+    def extract_stat(row, idx, is_percent=False):
+        try:
+            val = str(row[idx])
+            if "%" in val:
+                if is_percent:
+                    return float(val.replace("%", ""))
+                return 0.0  # Percent where number expected
+
+            if val == "-":
+                return 0.0
+
+            return float(val)
+        except Exception:
+            return 0.0
+
+    # Helper wrapper to apply only if raw stats exist
+    def smart_apply(row, func, col_name):
+        raw = _raw_list(row.get("raw_stats"))
+        if raw is not None and len(raw) > 0:
+            return func(raw)
+        # Return existing value if available, else 0.0
+        return row.get(col_name, 0.0)
+
+    # Pre-calculate GP to identify Totals
+    df["GP"] = df.apply(
+        lambda r: smart_apply(r, lambda x: extract_stat(x, 6), "GP"), axis=1
+    )
+
+    def smart_parse_ppg(raw_list):
+        """
+        Detects if a row is 'Totals' (integers) or 'Averages' (floats).
+        If Total and GP > 1, returns Total / GP.
+        """
+        try:
+            if len(raw_list) <= 6:
+                return 0.0
+
+            row = raw_list
+
+            raw_pts = str(row[3])
+            if "%" in raw_pts:
+                return 0.0  # Bad row (Shooting stats)
+
+            pts = float(raw_pts) if raw_pts != "-" else 0.0
+
+            # Heuristic for Total:
+            is_integer_string = "." not in raw_pts and raw_pts != "-"
+            gp = float(row[6]) if row[6] != "-" else 0.0
+
+            if gp > 1 and (pts > 40 or (is_integer_string and pts > 20)):
+                # Likely a total
+                return round(pts / gp, 1)
+
+            # Fallback Sanity Check for 100.0 PPG
+            if pts >= 99.0 and gp > 5:
+                return round(pts / gp, 1)
+
+            return pts
+        except Exception:
+            return 0.0
+
+    # General function for other stats (RPG, APG)
+    def get_stat_smart(raw_list, idx):
+        if len(raw_list) <= idx:
+            return 0.0
+        try:
+            raw_val = str(raw_list[idx])
+            if "%" in raw_val:
+                return 0.0
+            val = float(raw_val) if raw_val != "-" else 0.0
+
+            # Check if total row based on PTS (idx 3)
+            raw_pts = str(raw_list[3])
+            gp = float(raw_list[6]) if raw_list[6] != "-" else 0.0
+
+            if gp > 1 and "." not in raw_pts and raw_pts != "-" and float(raw_pts) > 20:
+                return round(val / gp, 1)
+
+            return val
+        except Exception:
+            return 0.0
+
+    df["PPG"] = df.apply(
+        lambda r: smart_apply(r, lambda x: smart_parse_ppg(x), "PPG"), axis=1
+    )
+
+    df["RPG"] = df.apply(
+        lambda r: smart_apply(r, lambda x: get_stat_smart(x, 4), "RPG"), axis=1
+    )
+    df["RPG"] = df.apply(lambda row: 0.0 if row["RPG"] > 20 else row["RPG"], axis=1)
+
+    df["APG"] = df.apply(
+        lambda r: smart_apply(r, lambda x: get_stat_smart(x, 5), "APG"), axis=1
+    )
+    df["APG"] = df.apply(lambda row: 0.0 if row["APG"] > 15 else row["APG"], axis=1)
+
+    df["MIN"] = df.apply(
+        lambda r: smart_apply(r, lambda x: get_stat_smart(x, 8), "MIN"), axis=1
+    )
+    df["MIN"] = df.apply(lambda row: 0.0 if row["MIN"] > 48 else row["MIN"], axis=1)
+
+    def check_ppg_min(row):
+        ppg = row.get("PPG", 0.0)
+        min_played = row.get("MIN", 0.0)
+        if min_played > 1 and ppg > (min_played * 2.5):
+            return round(min_played * 2, 1)
+        return ppg
+
+    df["PPG"] = df.apply(check_ppg_min, axis=1)
+
+    df["TO"] = df.apply(
+        lambda r: smart_apply(r, lambda x: get_stat_smart(x, 18), "TO"), axis=1
+    )
+
+    df["3P%"] = df.apply(
+        lambda r: smart_apply(r, lambda x: extract_stat(x, 10, True), "3P%"), axis=1
+    )
+    df["FG%"] = df.apply(
+        lambda r: smart_apply(r, lambda x: extract_stat(x, 9, True), "FG%"), axis=1
+    )
+    df["EFF"] = df.apply(
+        lambda r: smart_apply(r, lambda x: extract_stat(x, -4), "EFF"), axis=1
+    )
+
+    if "SPG" not in df.columns:
+        df["SPG"] = 0.0
+    if "BPG" not in df.columns:
+        df["BPG"] = 0.0
+
+    return df
@@ -0,0 +1,99 @@
+"""
+Percentiles
+
+League-wide distributions of every ranked metric, built once per data
+version so a player's percentile or z-score within their league/season is
+a binary search instead of a pass over the partition.
+
+Percentiles are percentile ranks of the value within its partition (the
+share of players below it, counting ties as half), so 50 is the median
+player. Higher values always rank higher, turnovers included.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.leaderboards import METRICS
+from bbcoach.data.player_index import PlayerIndex
+
+
+class Percentiles:
+    """
+    Sorted values, mean and standard deviation of each (league, season,
+    metric) over the partitions of a PlayerIndex. Players without a value
+    are not part of the distribution.
+    """
+
+    def __init__(self, index: PlayerIndex):
+        frame = index.frame
+        self.metrics = [m for m in METRICS if m in frame.columns]
+        self._sorted: dict[tuple, np.ndarray] = {}
+        self._moments: dict[tuple, tuple[float, float]] = {}
+
+        partitions = index.partition_positions()
+        for metric in self.metrics:
+            values = pd.to_numeric(frame[metric], errors="coerce").to_numpy(dtype=np.float64)
+            for (league, season), positions in partitions.items():
+                part = values[positions]
+                part = np.sort(part[~np.isnan(part)])
+                if len(part):
+                    self._sorted[(league, season, metric)] = part
+                    self._moments[(league, season, metric)] = (part.mean(), part.std())
+
+    def _percentiles(self, key: tuple, values: np.ndarray) -> np.ndarray:
+        dist = self._sorted.get(key)
+        if dist is None:
+            return np.full(len(values), np.nan)
+        below = np.searchsorted(dist, values, side="left")
+        at_or_below = np.searchsorted(dist, values, side="right")
+        ranks = 100.0 * (below + at_or_below) / (2 * len(dist))
+        return np.where(np.isnan(values), np.nan, ranks)
+
+    def _zscores(self, key: tuple, values: np.ndarray) -> np.ndarray:
+        mean, std = self._moments.get(key, (np.nan, np.nan))
+        if std == 0:
+            return np.where(np.isnan(values), np.nan, 0.0)
+        return (values - mean) / std
+
+    def percentile(self, league: str, season: int, metric: str, value: float) -> Optional[float]:
+        """Percentile rank (0-100) of value in a partition, None if unknown."""
+        key = (str(league), int(season), metric)
+        rank = self._percentiles(key, np.array([value], dtype=np.float64))[0]
+        return None if np.isnan(rank) else float(rank)
+
+    def zscore(self, league: str, season: int, metric: str, value: float) -> Optional[float]:
+        """Standard score of value in a partition, None if unknown."""
+        key = (str(league), int(season), metric)
+        z = self._zscores(key, np.array([value], dtype=np.float64))[0]
+        return None if np.isnan(z) else float(z)
+
+    def lookup(
+        self, players: pd.DataFrame, metrics: Optional[list[str]] = None
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Percentiles and z-scores of players within their own league/season.
+
+        Args:
+            players: Player rows with league and season columns
+            metrics: Metrics to look up (default: every ranked metric)
+
+        Returns:
+            (percentiles, z_scores) frames indexed like players, one column
+            per metric (NaN where the value or the partition is missing)
+        """
+        metrics = [m for m in (metrics or self.metrics) if m in self.metrics and m in players.columns]
+        percentiles = pd.DataFrame(np.nan, index=players.index, columns=metrics)
+        zscores = percentiles.copy()
+        if players.empty or not {"league", "season"} <= set(players.columns):
+            return percentiles, zscores
+
+        groups = players.groupby(["league", "season"], observed=True, sort=False).indices
+        for (league, season), positions in groups.items():
+            for j, metric in enumerate(metrics):
+                values = pd.to_numeric(players[metric].iloc[positions], errors="coerce")
+                values = values.to_numpy(dtype=np.float64)
+                key = (str(league), int(season), metric)
+                percentiles.iloc[positions, j] = self._percentiles(key, values)
+                zscores.iloc[positions, j] = self._zscores(key, values)
+        return percentiles, zscores
@@ -0,0 +1,162 @@
+"""
+Player Index
+
+Group indexes over a loaded players frame, so per-team, per-partition and
+per-player lookups cost O(group size) instead of a mask over every row.
+
+Rows are ordered once by (league, season, team_id); a partition or a team's
+season roster is then a contiguous slice of the frame (a view, no copy).
+Player ids and names map to their few row positions.
+"""
+import unicodedata
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+SORT_KEYS = ["league", "season", "team_id"]
+
+_Rows = Union[slice, np.ndarray]
+
+
+def normalize_name(name) -> str:
+    """Lookup form of a player name: casefolded, accents and extra spaces removed."""
+    if not isinstance(name, str):
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def _season_key(season) -> Optional[int]:
+    return None if pd.isna(season) else int(season)
+
+
+def _as_rows(positions: np.ndarray) -> _Rows:
+    """A slice when the positions are contiguous, else the positions themselves."""
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+
+def _positions(rows: _Rows) -> np.ndarray:
+    return np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+
+
+def _groups(frame: pd.DataFrame, keys: list[str], key_fn) -> dict:
+    if frame.empty or any(k not in frame.columns for k in keys):
+        return {}
+    indices = frame.groupby(keys, observed=True, sort=False, dropna=False).indices
+    groups = {}
+    for key, positions in indices.items():
+        if not isinstance(key, tuple):
+            key = (key,)
+        groups[key_fn(key)] = _as_rows(np.sort(positions))
+    return groups
+
+
+class PlayerIndex:
+    """
+    Sorted players frame with group indexes on (league, season),
+    (team_id, season), player id and normalized name.
+
+    Lookups return rows of ``frame``; unknown keys give an empty frame.
+    """
+
+    def __init__(self, players_df: pd.DataFrame):
+        df = players_df
+        keys = [k for k in SORT_KEYS if k in df.columns]
+        if keys and len(df):
+            order = np.lexsort([_sort_codes(df[k]) for k in reversed(keys)])
+            if not (order == np.arange(len(df))).all():
+                df = df.iloc[order]
+        # A sorted frame with a default index is used as is (no copy)
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)
+        self.frame = df
+
+        self._partitions = _groups(
+            self.frame, ["league", "season"], lambda k: (str(k[0]), _season_key(k[1]))
+        )
+        self._teams = _groups(
+            self.frame, ["team_id", "season"], lambda k: (str(k[0]), _season_key(k[1]))
+        )
+        self._ids = _groups(self.frame, ["id"], lambda k: str(k[0]))
+
+        self._names: dict[str, _Rows] = {}
+        if "name" in self.frame.columns:
+            # Categorical names are normalized once per distinct name
+            names = self.frame["name"].map(normalize_name).astype(object).fillna("")
+            self._names = _groups(names.to_frame(), ["name"], lambda k: k[0])
+            self._names.pop("", None)
+
+        self._team_seasons: dict[str, list[Optional[int]]] = {}
+        for team_id, season in self._teams:
+            self._team_seasons.setdefault(team_id, []).append(season)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _rows(self, rows: Optional[_Rows]) -> pd.DataFrame:
+        if rows is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[rows]
+
+    def partition(self, league: Optional[str] = None, season: Optional[int] = None) -> pd.DataFrame:
+        """Players of one league/season partition, or of all matching ones when either is None."""
+        if league is not None and season is not None:
+            return self._rows(self._partitions.get((str(league), _season_key(season))))
+        return self._take([
+            rows for (lg, s), rows in self._partitions.items()
+            if (league is None or lg == str(league)) and (season is None or s == season)
+        ])
+
+    def team(self, team_id, season: Optional[int] = None) -> pd.DataFrame:
+        """A team's roster in a season, or in every season when season is None."""
+        if season is not None:
+            return self._rows(self._teams.get((str(team_id), _season_key(season))))
+        seasons = self._team_seasons.get(str(team_id), [])
+        return self._take([self._teams[(str(team_id), s)] for s in seasons])
+
+    def player(self, player_id) -> pd.DataFrame:
+        """Rows of one player id (one per team and season played)."""
+        return self._rows(self._ids.get(str(player_id)))
+
+    def by_name(self, name: str) -> pd.DataFrame:
+        """Rows whose name matches after normalize_name."""
+        return self._rows(self._names.get(normalize_name(name)))
+
+    def by_names(self, names: Iterable[str]) -> pd.DataFrame:
+        """Rows matching any of the names, in frame order."""
+        keys = {normalize_name(n) for n in names}
+        return self._take([self._names[k] for k in keys if k in self._names])
+
+    def partition_positions(self) -> dict[tuple, np.ndarray]:
+        """Row positions of every (league, season) partition."""
+        return {key: _positions(rows) for key, rows in self._partitions.items()}
+
+    def leagues(self) -> list[str]:
+        return sorted({league for league, _ in self._partitions})
+
+    def seasons(self, league: Optional[str] = None) -> list[int]:
+        """Seasons with players, newest first."""
+        return sorted(
+            {s for lg, s in self._partitions if s is not None and (league is None or lg == league)},
+            reverse=True,
+        )
+
+    def _take(self, groups: list[_Rows]) -> pd.DataFrame:
+        if not groups:
+            return self.frame.iloc[0:0]
+        if len(groups) == 1:
+            return self.frame.iloc[groups[0]]
+        positions = np.concatenate([_positions(g) for g in groups])
+        return self.frame.iloc[np.sort(positions)]
+
+
+def _sort_codes(series: pd.Series) -> np.ndarray:
+    """Sortable integer codes for a key column, missing values last."""
+    codes, _ = pd.factorize(series, sort=True)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = np.iinfo(np.int64).max
+    return codes
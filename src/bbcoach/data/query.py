@@ -0,0 +1,190 @@
+"""
+SQL Query Engine
+
+Read-only SQL over the data_storage datasets, run by DuckDB directly on the
+parquet files (no pandas frames are built).
+
+Each dataset is a view resolving its base/delta files the way storage reads
+them (last writer wins on the dedupe keys), with league and season taken
+from the hive partitions:
+
+    SELECT season, team_name, avg(PPG) FROM players GROUP BY ALL
+
+Only a single SELECT statement is accepted, and the connection can only
+read files under DATA_DIR.
+"""
+import threading
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pyarrow as pa
+
+from bbcoach.data import storage
+
+QUERY_DATASETS = ("players", "teams", "schedule")
+
+BATCH_ROWS = 64 * 1024
+
+
+class QueryError(ValueError):
+    """Raised for SQL the engine refuses to run."""
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _view_sql(name: str, paths: list[str]) -> str:
+    files = ", ".join(_quote(str(Path(p).resolve())) for p in paths)
+    scan = (
+        f"read_parquet([{files}], hive_partitioning = true, union_by_name = true, "
+        f"filename = true, hive_types = {{'league': VARCHAR, 'season': BIGINT}})"
+    )
+    keys = ", ".join(f'"{k}"' for k in storage._dedupe_keys(name))
+    if not keys:
+        return f"CREATE VIEW {name} AS SELECT * EXCLUDE (filename) FROM {scan}"
+    # Newest file wins, as in storage._read_files
+    return f"""
+        CREATE VIEW {name} AS
+        SELECT * EXCLUDE (filename, _rank) FROM (
+            SELECT *, row_number() OVER (
+                PARTITION BY {keys}
+                ORDER BY regexp_extract(filename, '-(\\d{{20}})-', 1) DESC, filename DESC
+            ) AS _rank
+            FROM {scan}
+        ) WHERE _rank = 1
+    """
+
+
+def _connect(files: dict[str, list[str]]):
+    import duckdb
+
+    con = duckdb.connect()
+    for name, paths in files.items():
+        con.execute(_view_sql(name, paths))
+    data_dir = str(storage.DATA_DIR.resolve())
+    con.execute(f"SET allowed_directories = [{_quote(data_dir + '/')}]")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def _check_read_only(con, sql: str):
+    import duckdb
+
+    try:
+        statements = con.extract_statements(sql)
+    except duckdb.Error as e:
+        raise QueryError(str(e)) from e
+    if len(statements) != 1:
+        raise QueryError("Exactly one SQL statement is allowed")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryError("Only SELECT queries are allowed")
+
+
+class QueryResult:
+    """
+    Streaming result of a query, read as Arrow record batches on demand.
+
+    The datasets' read locks and the DuckDB connection are held until the
+    result is exhausted or closed, so a compaction cannot delete files
+    mid-scan. Compaction and migrations wait on those locks: close a result
+    that is abandoned (or use it as a context manager).
+    """
+
+    def __init__(self, reader: pa.RecordBatchReader, stack: ExitStack, max_rows: Optional[int]):
+        self.schema = reader.schema
+        self._reader = reader
+        self._stack = stack
+        self._max_rows = max_rows
+
+    def __iter__(self) -> Iterator[pa.RecordBatch]:
+        import duckdb
+
+        try:
+            remaining = self._max_rows
+            for batch in self._reader:
+                if remaining is not None:
+                    if remaining <= 0:
+                        break
+                    batch = batch.slice(0, remaining)
+                    remaining -= batch.num_rows
+                yield batch
+        except (duckdb.Error, pa.ArrowException, OSError) as e:
+            # DuckDB errors raised mid-stream surface through Arrow's C stream
+            raise QueryError(str(e)) from e
+        finally:
+            self.close()
+
+    def read_all(self) -> pa.Table:
+        return pa.Table.from_batches(list(self), schema=self.schema)
+
+    def close(self):
+        """Release the read locks and the connection (idempotent)."""
+        self._stack.close()
+
+    def __enter__(self) -> "QueryResult":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def query(
+    sql: str,
+    params: Optional[list] = None,
+    max_rows: Optional[int] = None,
+    timeout: Optional[float] = None,
+    batch_rows: int = BATCH_ROWS,
+) -> QueryResult:
+    """
+    Run a read-only SQL query and stream the result as Arrow record batches.
+
+    Args:
+        sql: A single SELECT statement over players, teams and schedule
+        params: Positional parameters for ? placeholders
+        max_rows: Stop after this many rows
+        timeout: Interrupt the query after this many seconds
+        batch_rows: Rows per record batch
+
+    Returns:
+        QueryResult over the result (holding read locks until closed)
+
+    Raises:
+        QueryError: If the SQL is not a single SELECT or fails to run
+    """
+    import duckdb
+
+    datasets = [name for name in QUERY_DATASETS if storage.dataset_exists(name)]
+    for name in datasets:
+        storage._prepare_dataset(name)
+
+    stack = ExitStack()
+    try:
+        # The file set is fixed while the read locks are held
+        files = {}
+        for name in datasets:
+            stack.enter_context(storage._read_lock(name))
+            paths = storage._list_files(name)
+            if paths:
+                files[name] = paths
+        con = _connect(files)
+        stack.callback(con.close)
+        _check_read_only(con, sql)
+
+        if timeout is not None:
+            timer = threading.Timer(timeout, con.interrupt)
+            timer.daemon = True
+            timer.start()
+            stack.callback(timer.cancel)
+
+        reader = con.execute(sql, params or []).to_arrow_reader(batch_rows)
+    except duckdb.Error as e:
+        stack.close()
+        raise QueryError(str(e)) from e
+    except BaseException:
+        stack.close()
+        raise
+
+    return QueryResult(reader, stack, max_rows)
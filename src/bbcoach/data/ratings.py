@@ -0,0 +1,279 @@
+"""
+Team Ratings
+
+Elo and SRS (simple rating system) ratings of every team from the
+completed games in the schedule, with each team's game-by-game rating
+history.
+
+Elo is updated game by game in date order with a margin-of-victory
+multiplier; SRS is the least-squares fit of rating differences (plus a
+home-court term) to game margins. Both are per league/season.
+
+Ratings are kept per partition. RatingEngine.update() only touches the
+partitions whose completed games changed: games dated after the last one
+rated are applied on top of the current ratings, and a partition is only
+replayed from the start if a game was removed or added in the past.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.schedule import NAT_LAST, SCHEDULE_TZ, date_keys, game_scores, parse_dates
+
+ELO_INITIAL = 1500.0
+ELO_K = 20.0
+ELO_HOME_ADVANTAGE = 60.0  # Elo points
+
+GAME_KEYS = ["date_key", "home_id", "away_id"]
+
+
+def completed_games(schedule_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per completed game, ordered by date (undated games last).
+
+    Schedule rows list each game from both teams' sides; rows with a known
+    home_away give the home and away team, otherwise the game is taken as
+    played on a neutral court.
+
+    Returns:
+        Frame with league, season, date_key, home_id, away_id, home_points,
+        away_points and neutral columns
+    """
+    columns = ["league", "season"] + GAME_KEYS + ["home_points", "away_points", "neutral"]
+    if schedule_df.empty or not {"team_id", "opponent_id"} <= set(schedule_df.columns):
+        return pd.DataFrame(columns=columns)
+
+    points_for, points_against = game_scores(schedule_df)
+    done = ~np.isnan(points_for) & ~np.isnan(points_against)
+    rows = schedule_df[done]
+    points_for, points_against = points_for[done], points_against[done]
+
+    team = rows["team_id"].astype(str).to_numpy()
+    opponent = rows["opponent_id"].astype(str).to_numpy()
+    if "home_away" in rows.columns:
+        side = rows["home_away"].astype(str).to_numpy()
+        neutral = (side != "Home") & (side != "Away")
+        flip = (side == "Away") | (neutral & (team > opponent))
+    else:
+        neutral = np.ones(len(rows), dtype=bool)
+        flip = team > opponent
+
+    games = pd.DataFrame({
+        "league": rows["league"].astype(str).to_numpy() if "league" in rows.columns else "",
+        "season": pd.to_numeric(rows["season"], errors="coerce").to_numpy() if "season" in rows.columns else np.nan,
+        "date_key": date_keys(parse_dates(rows["date"])) if "date" in rows.columns else np.zeros(len(rows), dtype=np.int64),
+        "home_id": np.where(flip, opponent, team),
+        "away_id": np.where(flip, team, opponent),
+        "home_points": np.where(flip, points_against, points_for),
+        "away_points": np.where(flip, points_for, points_against),
+        "neutral": neutral,
+    }, columns=columns)
+    games = games.drop_duplicates(subset=["league", "season"] + GAME_KEYS)
+    return games.sort_values("date_key", kind="stable").reset_index(drop=True)
+
+
+def _game_keys(games: pd.DataFrame) -> list[tuple]:
+    """Identity of each game; a corrected score makes it a different game."""
+    return list(zip(
+        games["date_key"], games["home_id"], games["away_id"],
+        games["home_points"], games["away_points"],
+    ))
+
+
+def elo_probability(rating_a: float, rating_b: float, home_advantage: float = 0.0) -> float:
+    """Elo win probability of team a (home_advantage in Elo points, for a)."""
+    return 1.0 / (1.0 + 10 ** (-(rating_a + home_advantage - rating_b) / 400))
+
+
+def _season_key(season) -> Optional[int]:
+    return None if pd.isna(season) else int(season)
+
+
+class _Partition:
+    """Ratings state of one league/season."""
+
+    def __init__(self):
+        self.keys: set = set()
+        self.last_date = np.iinfo(np.int64).min  # date_key of the last rated game
+        self.elo: dict[str, float] = {}
+        self.history: dict[str, list[dict]] = {}
+        self.games = pd.DataFrame()
+        self.srs: dict[str, float] = {}
+
+    def copy(self) -> "_Partition":
+        state = _Partition()
+        state.keys = set(self.keys)
+        state.last_date = self.last_date
+        state.elo = dict(self.elo)
+        # Lists are copied when a team plays again (see apply)
+        state.history = dict(self.history)
+        state.games = self.games
+        return state
+
+    def apply(self, games: pd.DataFrame):
+        """Rate games (in date order) on top of the current ratings."""
+        touched = set()
+        for game in games.itertuples(index=False):
+            home, away = game.home_id, game.away_id
+            for team in (home, away):
+                if team not in touched:
+                    self.history[team] = list(self.history.get(team, []))
+                    touched.add(team)
+            r_home = self.elo.get(home, ELO_INITIAL)
+            r_away = self.elo.get(away, ELO_INITIAL)
+            advantage = 0.0 if game.neutral else ELO_HOME_ADVANTAGE
+            expected = elo_probability(r_home, r_away, advantage)
+            margin = game.home_points - game.away_points
+            won = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+            # Bigger wins move ratings more, less so for heavy favourites
+            winner_edge = (r_home + advantage - r_away) * (1 if margin >= 0 else -1)
+            multiplier = (abs(margin) + 3) ** 0.8 / (7.5 + 0.006 * winner_edge)
+            change = ELO_K * multiplier * (won - expected)
+            self.elo[home] = r_home + change
+            self.elo[away] = r_away - change
+
+            for team, opponent, points_for, points_against, rating in (
+                (home, away, game.home_points, game.away_points, self.elo[home]),
+                (away, home, game.away_points, game.home_points, self.elo[away]),
+            ):
+                self.history[team].append({
+                    "date_key": game.date_key,
+                    "opponent_id": opponent,
+                    "points_for": points_for,
+                    "points_against": points_against,
+                    "won": points_for > points_against,
+                    "elo": rating,
+                })
+            self.last_date = max(self.last_date, game.date_key)
+        self.keys.update(_game_keys(games))
+        self.games = pd.concat([self.games, games], ignore_index=True) if len(self.games) else games
+        self.srs = _fit_srs(self.games)
+
+
+def _fit_srs(games: pd.DataFrame) -> dict[str, float]:
+    """Least-squares team ratings (mean 0) from game margins and home court."""
+    if games.empty:
+        return {}
+    codes, teams = pd.factorize(np.concatenate([games["home_id"], games["away_id"]]))
+    n_games, n_teams = len(games), len(teams)
+    rows = np.arange(n_games)
+    design = np.zeros((n_games + 1, n_teams + 1))
+    design[rows, codes[:n_games]] = 1.0
+    design[rows, codes[n_games:]] = -1.0
+    design[rows, n_teams] = ~games["neutral"].to_numpy(dtype=bool)
+    design[n_games, :n_teams] = 1.0  # Ratings sum to zero
+    margins = np.append((games["home_points"] - games["away_points"]).to_numpy(dtype=np.float64), 0.0)
+    solution = np.linalg.lstsq(design, margins, rcond=None)[0]
+    return dict(zip(teams, solution[:n_teams]))
+
+
+class RatingEngine:
+    """
+    Elo and SRS ratings per (league, season), built from schedule results.
+
+    Engines are not modified once built: update() returns a new engine
+    sharing the states of unchanged partitions, so readers of the previous
+    one are unaffected.
+    """
+
+    def __init__(self):
+        self._partitions: dict[tuple, _Partition] = {}
+        # Games rated and partitions replayed by the update that built this engine
+        self.applied = 0
+        self.replayed = 0
+
+    def update(self, schedule_df: pd.DataFrame) -> "RatingEngine":
+        """Ratings for a new schedule, reusing this engine's work."""
+        engine = RatingEngine()
+        games = completed_games(schedule_df)
+        for (league, season), part in games.groupby(["league", "season"], dropna=False, sort=False):
+            key = (league, _season_key(season))
+            part_keys = _game_keys(part)
+            keys = set(part_keys)
+            state = self._partitions.get(key)
+            if state is not None and keys == state.keys:
+                engine._partitions[key] = state
+                continue
+
+            if state is not None:
+                new = part[np.array([k not in state.keys for k in part_keys], dtype=bool)]
+            # Removed games or games before the last rated one change
+            # every later rating: replay the partition
+            if state is None or not state.keys <= keys or (new["date_key"] < state.last_date).any():
+                state, new = _Partition(), part
+                engine.replayed += 1
+            else:
+                state = state.copy()
+            state.apply(new)
+            engine.applied += len(new)
+            engine._partitions[key] = state
+        return engine
+
+    def _find(self, team_id, season: Optional[int], league: Optional[str] = None) -> Optional[tuple]:
+        """Latest partition (of a season/league if given) the team played in."""
+        keys = [
+            key for key, state in self._partitions.items()
+            if str(team_id) in state.elo
+            and (season is None or key[1] == int(season))
+            and (league is None or key[0] == league)
+        ]
+        return max(keys, key=lambda k: (k[1] is not None, k[1] or 0)) if keys else None
+
+    def ratings(self, season: Optional[int] = None, league: Optional[str] = None) -> pd.DataFrame:
+        """Team ratings table, best Elo first."""
+        records = []
+        for (lg, s), state in self._partitions.items():
+            if (season is not None and s != int(season)) or (league is not None and lg != league):
+                continue
+            for team, elo in state.elo.items():
+                history = state.history[team]
+                wins = sum(g["won"] for g in history)
+                records.append({
+                    "team_id": team, "league": lg, "season": s, "elo": elo,
+                    "srs": state.srs.get(team, 0.0), "games": len(history),
+                    "wins": wins, "losses": len(history) - wins,
+                })
+        columns = ["team_id", "league", "season", "elo", "srs", "games", "wins", "losses"]
+        table = pd.DataFrame(records, columns=columns)
+        return table.sort_values("elo", ascending=False, kind="stable").reset_index(drop=True)
+
+    def team_rating(self, team_id, season: Optional[int] = None) -> Optional[dict]:
+        """A team's current ratings in a season (default: its latest)."""
+        key = self._find(team_id, season)
+        if key is None:
+            return None
+        state = self._partitions[key]
+        history = state.history[str(team_id)]
+        wins = sum(g["won"] for g in history)
+        return {
+            "team_id": str(team_id), "league": key[0], "season": key[1],
+            "elo": state.elo[str(team_id)], "srs": state.srs.get(str(team_id), 0.0),
+            "games": len(history), "wins": wins, "losses": len(history) - wins,
+        }
+
+    def history(self, team_id, season: Optional[int] = None) -> pd.DataFrame:
+        """A team's rated games in a season (default: its latest), in date order."""
+        columns = ["date", "opponent_id", "points_for", "points_against", "won", "elo"]
+        key = self._find(team_id, season)
+        if key is None:
+            return pd.DataFrame(columns=columns)
+        history = pd.DataFrame(self._partitions[key].history[str(team_id)])
+        keys = history.pop("date_key").to_numpy(dtype=np.int64)
+        dates = pd.Series(pd.to_datetime(keys, utc=True).tz_convert(SCHEDULE_TZ))
+        history.insert(0, "date", dates.where(keys != NAT_LAST))
+        return history[columns]
+
+    def win_probability(self, team_a_id, team_b_id, season: Optional[int] = None, home: Optional[str] = None) -> Optional[float]:
+        """
+        Elo win probability of team a over team b.
+
+        Args:
+            home: "a" or "b" for the home team (default: neutral court)
+        """
+        a = self.team_rating(team_a_id, season)
+        b = self.team_rating(team_b_id, season)
+        if a is None or b is None:
+            return None
+        advantage = {"a": ELO_HOME_ADVANTAGE, "b": -ELO_HOME_ADVANTAGE}.get(home, 0.0)
+        return elo_probability(a["elo"], b["elo"], advantage)
@@ -0,0 +1,180 @@
+"""
+Schedule
+
+Date parsing for scraped schedule rows and a sorted index answering team
+schedule queries by binary search.
+
+Schedule rows store ``date`` as a timezone-aware datetime64 (parsed at
+ingest, see bbcoach.data.migrations) and the scraped text as ``date_text``.
+Rows are kept sorted by (league, season, team_id, date).
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SCHEDULE_TZ = "Europe/Stockholm"  # SBF games are listed in local time
+
+SORT_KEYS = ["league", "season", "team_id", "date"]
+
+NAT_LAST = np.iinfo(np.int64).max  # date_keys value of undated games
+
+
+def parse_dates(text: pd.Series, tz: str = SCHEDULE_TZ) -> pd.Series:
+    """
+    Parse scraped date strings into timezone-aware timestamps.
+
+    Unparseable values ("Unknown", "TBD", ...) become NaT. Naive times are
+    taken as local time in tz.
+    """
+    if isinstance(text.dtype, pd.DatetimeTZDtype):
+        return text.dt.tz_convert(tz)
+    parsed = pd.to_datetime(text, errors="coerce", format="mixed")
+    if getattr(parsed.dt, "tz", None) is None:
+        return parsed.dt.tz_localize(tz, ambiguous="NaT", nonexistent="shift_forward")
+    return parsed.dt.tz_convert(tz)
+
+
+def prepare_schedule(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the date column of raw schedule rows (keeping the text as date_text).
+    """
+    if "date" not in df.columns:
+        return df
+    if isinstance(df["date"].dtype, pd.DatetimeTZDtype):
+        if "date_text" not in df.columns:
+            df["date_text"] = None
+        return df
+    if "date_text" not in df.columns:
+        df["date_text"] = df["date"]
+    df["date"] = parse_dates(df["date"])
+    return df
+
+
+def sort_schedule(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows by (league, season, team_id, date), undated games last."""
+    keys = [k for k in SORT_KEYS if k in df.columns]
+    if not keys:
+        return df
+    return df.sort_values(keys, kind="stable", na_position="last").reset_index(drop=True)
+
+
+def game_scores(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Points scored and allowed in each schedule row, from the row team's side.
+
+    ``result`` is the final score as "<home>-<away>" on both rows of a game;
+    rows with ``home_away`` "Away" are swapped. Unplayed games ("Scheduled")
+    and unparseable results are NaN.
+
+    Returns:
+        (points_for, points_against) float arrays aligned with df
+    """
+    if df.empty or "result" not in df.columns:
+        return np.full(len(df), np.nan), np.full(len(df), np.nan)
+    parts = df["result"].astype(str).str.extract(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+    first = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=np.float64)
+    second = pd.to_numeric(parts[1], errors="coerce").to_numpy(dtype=np.float64)
+    if "home_away" in df.columns:
+        away = (df["home_away"].astype(str) == "Away").to_numpy()
+        return np.where(away, second, first), np.where(away, first, second)
+    return first, second
+
+
+def date_keys(dates: pd.Series) -> np.ndarray:
+    """int64 nanoseconds since epoch, NaT sorted last."""
+    values = pd.DatetimeIndex(dates).as_unit("ns").asi8.copy()
+    values[dates.isna().to_numpy()] = NAT_LAST
+    return values
+
+
+def _as_key(ts) -> int:
+    if ts is None:
+        return NAT_LAST
+    ts = pd.Timestamp(ts)
+    if ts.tz is None:
+        ts = ts.tz_localize(SCHEDULE_TZ)
+    return ts.as_unit("ns").value
+
+
+class ScheduleIndex:
+    """
+    Sorted views over a schedule frame for per-team queries.
+
+    Rows are ordered once by (team_id, date) and by (team_id, opponent_id,
+    date); each query is then two binary searches and a slice instead of a
+    boolean mask over the whole frame.
+    """
+
+    def __init__(self, schedule_df: pd.DataFrame):
+        df = schedule_df.reset_index(drop=True)
+        if df.empty or "team_id" not in df.columns:
+            df = pd.DataFrame(columns=["team_id", "opponent_id", "date"])
+        df = prepare_schedule(df.copy())
+        if "opponent_id" not in df.columns:
+            df["opponent_id"] = None
+        self.frame = df
+
+        teams = df["team_id"].astype(str).to_numpy()
+        opponents = df["opponent_id"].astype(str).to_numpy()
+        codes, uniques = pd.factorize(np.concatenate([teams, opponents]), sort=True)
+        team_codes = codes[: len(df)].astype(np.int64)
+        opp_codes = codes[len(df):].astype(np.int64)
+        dates = date_keys(df["date"]) if len(df) else np.empty(0, dtype=np.int64)
+
+        self._codes = {team: i for i, team in enumerate(uniques)}
+
+        by_team = np.lexsort((dates, team_codes))
+        self._team_frame = df.iloc[by_team].reset_index(drop=True)
+        self._team_keys = team_codes[by_team]
+        self._team_dates = dates[by_team]
+
+        pair_codes = team_codes * (len(uniques) + 1) + opp_codes
+        by_pair = np.lexsort((dates, pair_codes))
+        self._pair_frame = df.iloc[by_pair].reset_index(drop=True)
+        self._pair_keys = pair_codes[by_pair]
+        self._n_codes = len(uniques) + 1
+
+    def __len__(self) -> int:
+        return len(self._team_frame)
+
+    def _team_slice(self, team_id) -> slice:
+        code = self._codes.get(str(team_id))
+        if code is None:
+            return slice(0, 0)
+        lo = np.searchsorted(self._team_keys, code, side="left")
+        hi = np.searchsorted(self._team_keys, code, side="right")
+        return slice(int(lo), int(hi))
+
+    def games_between(self, team_id, start=None, end=None) -> pd.DataFrame:
+        """
+        Games of a team with start <= date < end, ordered by date.
+
+        Without bounds all games are returned, undated games last.
+        """
+        team = self._team_slice(team_id)
+        dates = self._team_dates[team]
+        lo = 0 if start is None else int(np.searchsorted(dates, _as_key(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _as_key(end), side="left"))
+        return self._team_frame.iloc[team.start + lo : team.start + hi]
+
+    def next_game(self, team_id, now=None) -> Optional[dict]:
+        """First game of a team dated at or after now (default: current time)."""
+        now = pd.Timestamp.now(tz=SCHEDULE_TZ) if now is None else now
+        team = self._team_slice(team_id)
+        dates = self._team_dates[team]
+        i = int(np.searchsorted(dates, _as_key(now), side="left"))
+        if i >= len(dates) or dates[i] == NAT_LAST:
+            return None
+        return self._team_frame.iloc[team.start + i].to_dict()
+
+    def head_to_head(self, team_a, team_b) -> pd.DataFrame:
+        """Games of team_a against team_b (from team_a's side), ordered by date."""
+        code_a = self._codes.get(str(team_a))
+        code_b = self._codes.get(str(team_b))
+        if code_a is None or code_b is None:
+            return self._pair_frame.iloc[0:0]
+        key = code_a * self._n_codes + code_b
+        lo = int(np.searchsorted(self._pair_keys, key, side="left"))
+        hi = int(np.searchsorted(self._pair_keys, key, side="right"))
+        return self._pair_frame.iloc[lo:hi]
@@ -0,0 +1,116 @@
+"""
+Shared Dataset
+
+Loaded frames published once as uncompressed Arrow IPC files under
+DATA_DIR/_shared/ and memory-mapped by every process that reads them.
+
+Several API workers then share one copy of the data through the page
+cache instead of each holding its own, and a worker starting after the
+first one maps the file instead of re-reading parquet. Numeric columns are
+zero-copy, read-only views of the mapping; categorical codes and list
+cells are materialized.
+
+Files are named <name>-<version>.arrow after the storage.dataset_version
+token, so a new save publishes a new file; older versions are removed when
+it is published (processes that still map them keep a valid mapping).
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from bbcoach.data import storage
+from bbcoach.data.dtypes import STRING
+from bbcoach.data.locking import file_lock
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = "_shared"
+
+_TYPES = {pa.string(): STRING, pa.large_string(): STRING}
+
+# Schema metadata key listing string columns that were plain object columns
+_OBJECT_COLUMNS = b"bbcoach.object_columns"
+
+
+def _shared_dir() -> Path:
+    return storage.DATA_DIR / SHARED_DIR
+
+
+def _path(name: str, version: str) -> Path:
+    return _shared_dir() / f"{name}-{version}.arrow"
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Float NaNs stay values (not nulls) so the columns map back zero-copy
+    columns = [
+        pa.array(df[col].to_numpy(), from_pandas=False) if df[col].dtype.kind == "f" else table.column(col)
+        for col in table.column_names
+    ]
+    # Strings map back as STRING; remember the columns that were object
+    object_columns = [
+        col for col in table.column_names
+        if df[col].dtype == object and pa.types.is_string(table.schema.field(col).type)
+    ]
+    metadata = {**(table.schema.metadata or {}), _OBJECT_COLUMNS: json.dumps(object_columns).encode()}
+    return pa.Table.from_arrays(columns, schema=table.schema.with_metadata(metadata))
+
+
+def publish(name: str, version: str, df: pd.DataFrame) -> Path:
+    """Write df as the shared copy of dataset name at version."""
+    path = _path(name, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = _to_table(df)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp.replace(path)
+
+    for old in _shared_dir().glob(f"{name}-*.arrow"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+def open_shared(name: str, version: str) -> Optional[pd.DataFrame]:
+    """Memory-map the shared copy of dataset name at version, if published."""
+    path = _path(name, version)
+    try:
+        source = pa.memory_map(str(path))
+    except FileNotFoundError:
+        return None
+    table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas(split_blocks=True, types_mapper=_TYPES.get)
+    for col in json.loads((table.schema.metadata or {}).get(_OBJECT_COLUMNS, b"[]")):
+        df[col] = df[col].astype(object)
+    return df
+
+
+def shared_frame(name: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Map the shared copy of a dataset's current version, building and
+    publishing it first if no process has yet.
+
+    Args:
+        name: Dataset name
+        build: Loads the frame to publish (called by one process per version)
+    """
+    version = storage.dataset_version(name)
+    df = open_shared(name, version)
+    if df is not None:
+        return df
+
+    storage.ensure_data_dir()
+    with file_lock(storage.DATA_DIR / f".{name}.shared.lock"):
+        # Another worker may have published while we waited
+        df = open_shared(name, version)
+        if df is not None:
+            return df
+        publish(name, version, build())
+        logger.info(f"Published shared {name} dataset (version {version})")
+    return open_shared(name, version)
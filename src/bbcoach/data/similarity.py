@@ -0,0 +1,154 @@
+"""
+Player Similarity
+
+Nearest-neighbour search over standardized per-player stat vectors, for
+"find players like X" scouting questions.
+
+Each stat is standardized within its league/season partition, so a vector
+describes how a player stands out in their own league and players compare
+across leagues and seasons. A missing stat counts as the partition mean.
+Queries are one vectorized distance computation over the candidate rows.
+
+Partitions whose stats did not change keep their standardized block when
+the index is rebuilt for a new data version (see SimilarityIndex.previous).
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.player_index import PlayerIndex
+
+# Compared stats and the columns filling them in when missing (the Genius
+# scraper's names for the same stats)
+FEATURES = {
+    "PPG": (),
+    "RPG": (),
+    "APG": (),
+    "MIN": ("MPG",),
+    "FG%": (),
+    "3P%": (),
+    "TO": ("TOPG",),
+    "EFF": (),
+    "SPG": ("STPG",),
+    "BPG": ("BLKPG",),
+}
+
+
+def feature_matrix(frame: pd.DataFrame) -> np.ndarray:
+    """Raw FEATURES of every row (NaN where missing), one column per feature."""
+    columns = []
+    for feature, aliases in FEATURES.items():
+        values = pd.Series(np.nan, index=frame.index)
+        for col in (feature,) + aliases:
+            if col in frame.columns:
+                values = values.fillna(pd.to_numeric(frame[col], errors="coerce").astype(np.float64))
+        columns.append(values.to_numpy(dtype=np.float64))
+    return np.column_stack(columns)
+
+
+def _standardize(raw: np.ndarray) -> np.ndarray:
+    """Z-scores of each column over its non-missing values (missing as 0)."""
+    present = ~np.isnan(raw)
+    counts = np.maximum(present.sum(axis=0), 1)
+    filled = np.where(present, raw, 0.0)
+    mean = filled.sum(axis=0) / counts
+    centered = np.where(present, raw - mean, 0.0)
+    std = np.sqrt((centered ** 2).sum(axis=0) / counts)
+    return centered / np.where(std > 0, std, 1.0)
+
+
+class SimilarityIndex:
+    """
+    Standardized stat vectors of every player row of a PlayerIndex.
+
+    Args:
+        index: Players to search
+        previous: Index of an earlier data version; partitions with the same
+            raw stats reuse its standardized blocks
+    """
+
+    def __init__(self, index: PlayerIndex, previous: Optional["SimilarityIndex"] = None):
+        self.index = index
+        raw = feature_matrix(index.frame)
+        self.vectors = np.zeros_like(raw)
+        self._ids = (
+            index.frame["id"].astype(str).to_numpy() if "id" in index.frame.columns
+            else np.full(len(index), "", dtype=object)
+        )
+        self._partitions = index.partition_positions()
+        self._blocks: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+        self.reused = 0
+
+        for key, positions in self._partitions.items():
+            block = raw[positions]
+            old = previous._blocks.get(key) if previous is not None else None
+            if old is not None and np.array_equal(old[0], block, equal_nan=True):
+                scaled = old[1]
+                self.reused += 1
+            else:
+                scaled = _standardize(block)
+            self._blocks[key] = (block, scaled)
+            self.vectors[positions] = scaled
+
+    def _candidates(
+        self, league: Optional[str], season: Optional[int], min_games: Optional[int]
+    ) -> np.ndarray:
+        parts = [
+            positions for (lg, s), positions in self._partitions.items()
+            if (league is None or lg == str(league)) and (season is None or s == int(season))
+        ]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        positions = np.sort(np.concatenate(parts))
+        if min_games and "GP" in self.index.frame.columns:
+            games = pd.to_numeric(self.index.frame["GP"], errors="coerce").to_numpy()[positions]
+            positions = positions[games >= min_games]
+        return positions
+
+    def similar_players(
+        self,
+        player_id: str,
+        k: int = 10,
+        season: Optional[int] = None,
+        league: Optional[str] = None,
+        target_season: Optional[int] = None,
+        min_games: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        The k player rows closest to a player.
+
+        Args:
+            player_id: Player to match
+            k: Number of players to return
+            season: The player's season to match (default: their latest)
+            league: Only search this league (default: all)
+            target_season: Only search this season (default: all)
+            min_games: Only return players with at least this many games
+
+        Returns:
+            Player rows nearest first with a "distance" column (empty if the
+            player is unknown); the player's own rows are left out
+        """
+        rows = self.index.player(player_id)
+        if season is not None:
+            rows = rows[rows["season"] == season]
+        if rows.empty or k <= 0:
+            return self.index.frame.iloc[0:0].assign(distance=pd.Series(dtype=np.float64))
+
+        # Latest season; the team the player played most for if several
+        order = rows.sort_values(
+            ["season"] + (["GP"] if "GP" in rows.columns else []), ascending=False, kind="stable"
+        )
+        query = self.vectors[self.index.frame.index.get_loc(order.index[0])]
+
+        candidates = self._candidates(league, target_season, min_games)
+        candidates = candidates[self._ids[candidates] != str(player_id)]
+
+        distances = np.sqrt(((self.vectors[candidates] - query) ** 2).sum(axis=1))
+        if len(candidates) > k:
+            nearest = np.argpartition(distances, k)[:k]
+        else:
+            nearest = np.arange(len(candidates))
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return self.index.frame.iloc[candidates[nearest]].assign(distance=distances[nearest])
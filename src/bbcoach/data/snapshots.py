@@ -0,0 +1,111 @@
+"""
+Snapshots
+
+Row diffing for the snapshot history kept by bbcoach.data.storage.
+
+Every save records a snapshot holding only the rows that are new or whose
+values changed. Reading a dataset as of a point in time merges the
+snapshots up to it (last writer wins), so no full copies are stored.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns never reported as stat deltas
+_NON_STAT_COLUMNS = {"season", "schema_version"}
+
+
+def _comparable(series: pd.Series) -> pd.Series:
+    """List-like cells (e.g. raw_stats) as tuples so == compares whole values."""
+    if series.dtype != object:
+        return series
+    return series.map(lambda v: tuple(v) if isinstance(v, (list, np.ndarray)) else v)
+
+
+def _differs(new: pd.Series, current: pd.Series) -> np.ndarray:
+    new, current = _comparable(new), _comparable(current)
+    both_missing = (new.isna() & current.isna()).to_numpy()
+    equal = (new == current).fillna(False).to_numpy(dtype=bool)
+    return ~(equal | both_missing)
+
+
+def changed_rows(new: pd.DataFrame, current: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    Rows of new that are not in current or differ from it in any column.
+
+    A column missing on one side counts as null there, matching how a save
+    replaces the whole stored row.
+
+    Args:
+        new: Incoming rows (unique on keys)
+        current: Stored rows of the same partitions
+        keys: Columns identifying a row
+    """
+    if current.empty or new.empty or not keys:
+        return new
+
+    current = current.drop_duplicates(subset=keys, keep="last")
+    merged = new.reset_index(drop=True).merge(
+        current, on=keys, how="left", suffixes=("", "__current"), indicator=True
+    )
+    changed = (merged["_merge"] == "left_only").to_numpy()
+
+    for col in new.columns.union(current.columns):
+        if col in keys:
+            continue
+        if col in new.columns and col in current.columns:
+            changed |= _differs(merged[col], merged[f"{col}__current"])
+        else:
+            changed |= merged[col].notna().to_numpy()
+
+    return new.iloc[np.flatnonzero(changed)]
+
+
+def stat_deltas(
+    before: pd.DataFrame,
+    after: pd.DataFrame,
+    keys: list[str],
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Per-row changes of numeric columns between two states.
+
+    Args:
+        before: Rows at the earlier snapshot
+        after: Rows changed since then (as of the later snapshot)
+        keys: Columns identifying a row
+        columns: Stats to compare (default: numeric columns of after)
+
+    Returns:
+        One row per changed key with the keys, name (if present) and
+        <stat>_before, <stat>_after and <stat>_delta columns. Rows new
+        since the earlier snapshot have null _before values.
+    """
+    if columns is None:
+        columns = [
+            c for c in after.columns
+            if c not in keys and c not in _NON_STAT_COLUMNS
+            and pd.api.types.is_numeric_dtype(after[c])
+        ]
+    columns = [c for c in columns if c in after.columns]
+    labels = [c for c in ["name"] if c in after.columns and c not in keys]
+
+    old = before[[c for c in keys + columns if c in before.columns]] if not before.empty else None
+    out = after[keys + labels + columns].reset_index(drop=True)
+    if old is not None:
+        old = old.drop_duplicates(subset=keys, keep="last")
+        out = out.merge(old, on=keys, how="left", suffixes=("", "__before"))
+
+    result = out[keys + labels].copy()
+    for col in columns:
+        after_values = pd.to_numeric(out[col], errors="coerce")
+        before_col = f"{col}__before"
+        if before_col in out.columns:
+            before_values = pd.to_numeric(out[before_col], errors="coerce")
+        else:
+            before_values = pd.Series(np.nan, index=out.index)
+        result[f"{col}_before"] = before_values
+        result[f"{col}_after"] = after_values
+        result[f"{col}_delta"] = after_values - before_values
+    return result
@@ -0,0 +1,136 @@
+"""
+Standings
+
+League tables from the schedule's completed games: W-L, home/away splits,
+point differential, last-N form and the current streak of every team.
+
+All of it comes from grouped operations over one row per team per game
+(see ratings.completed_games), computed once per data version; a league
+table is then a dictionary lookup.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.ratings import completed_games
+
+FORM_GAMES = 5
+
+COLUMNS = [
+    "rank", "team_id", "team_name", "games", "wins", "losses", "win_pct",
+    "games_behind", "home_wins", "home_losses", "away_wins", "away_losses",
+    "points_for", "points_against", "point_diff", "form", "streak",
+]
+
+
+def team_games(games: pd.DataFrame) -> pd.DataFrame:
+    """completed_games rows from both teams' sides, in date order per team."""
+    home = pd.DataFrame({
+        "league": games["league"],
+        "season": games["season"],
+        "date_key": games["date_key"],
+        "team_id": games["home_id"],
+        "points_for": games["home_points"],
+        "points_against": games["away_points"],
+        "venue": np.where(games["neutral"], "neutral", "home"),
+    })
+    away = pd.DataFrame({
+        "league": games["league"],
+        "season": games["season"],
+        "date_key": games["date_key"],
+        "team_id": games["away_id"],
+        "points_for": games["away_points"],
+        "points_against": games["home_points"],
+        "venue": np.where(games["neutral"], "neutral", "away"),
+    })
+    rows = pd.concat([home, away], ignore_index=True)
+    rows["won"] = rows["points_for"] > rows["points_against"]
+    return rows.sort_values(["league", "season", "team_id", "date_key"], kind="stable").reset_index(drop=True)
+
+
+def compute_standings(
+    schedule_df: pd.DataFrame, form_games: int = FORM_GAMES
+) -> dict[tuple, pd.DataFrame]:
+    """
+    League tables of every (league, season) with completed games.
+
+    Teams are ranked by win percentage, then point differential. form is
+    the last form_games results oldest first ("WWLWL"); streak is the
+    current run ("W3", "L1").
+
+    Returns:
+        {(league, season): table with COLUMNS}
+    """
+    games = completed_games(schedule_df)
+    if games.empty:
+        return {}
+    rows = team_games(games)
+    keys = ["league", "season", "team_id"]
+    by_team = rows.groupby(keys, sort=False)
+
+    won = rows["won"].to_numpy()
+    lost = ~won
+    flags = pd.DataFrame({
+        "wins": won,
+        "losses": lost,
+        "home_wins": won & (rows["venue"] == "home").to_numpy(),
+        "home_losses": lost & (rows["venue"] == "home").to_numpy(),
+        "away_wins": won & (rows["venue"] == "away").to_numpy(),
+        "away_losses": lost & (rows["venue"] == "away").to_numpy(),
+    }).astype(np.int64)
+    table = pd.concat([rows[keys + ["points_for", "points_against"]], flags], axis=1)
+    table = table.groupby(keys, sort=False).sum()
+    table["games"] = by_team.size()
+    table["point_diff"] = table["points_for"] - table["points_against"]
+    table["win_pct"] = table["wins"] / table["games"]
+
+    # Last results and current streak from the date-ordered rows
+    letters = pd.Series(np.where(won, "W", "L"), index=rows.index)
+    table["form"] = letters[by_team.cumcount(ascending=False) < form_games].groupby(
+        [rows[k] for k in keys], sort=False
+    ).agg("".join)
+    run = (letters != letters.groupby([rows[k] for k in keys]).shift()).cumsum()
+    run_length = run.groupby(run).cumcount() + 1
+    last = by_team.tail(1).index
+    streaks = letters[last] + run_length[last].astype(str)
+    table["streak"] = pd.Series(streaks.to_numpy(), index=pd.MultiIndex.from_frame(rows.loc[last, keys]))
+
+    names = {}
+    if "team_name" in schedule_df.columns:
+        named = schedule_df.dropna(subset=["team_name"])
+        names = dict(zip(named["team_id"].astype(str), named["team_name"].astype(str)))
+
+    standings = {}
+    for (league, season), part in table.reset_index().groupby(["league", "season"], sort=False, dropna=False):
+        part = part.sort_values(
+            ["win_pct", "point_diff", "team_id"], ascending=[False, False, True], kind="stable"
+        ).reset_index(drop=True)
+        leader = part.iloc[0]
+        part["games_behind"] = ((leader["wins"] - part["wins"]) + (part["losses"] - leader["losses"])) / 2
+        part["rank"] = np.arange(1, len(part) + 1)
+        part["team_name"] = part["team_id"].map(names)
+        season = None if pd.isna(season) else int(season)
+        standings[(str(league), season)] = part[COLUMNS]
+    return standings
+
+
+class Standings:
+    """League tables by (league, season), built once per data version."""
+
+    def __init__(self, schedule_df: pd.DataFrame):
+        self._tables = compute_standings(schedule_df)
+
+    def table(self, league: str, season: int) -> pd.DataFrame:
+        """A league/season table (empty if it has no completed games)."""
+        table = self._tables.get((str(league), int(season)))
+        return pd.DataFrame(columns=COLUMNS) if table is None else table
+
+    def team(self, team_id, season: int) -> Optional[dict]:
+        """A team's row in its season's table."""
+        for (league, s), table in self._tables.items():
+            if s == int(season):
+                row = table[table["team_id"] == str(team_id)]
+                if len(row):
+                    return {"league": league, "season": s, **row.iloc[0].to_dict()}
+        return None
@@ -1,267 +1,857 @@
-import pandas as pd
+import atexit
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from bbcoach.data.dtypes import PLAYER_SCHEMA, TEAM_SCHEMA, apply_dtypes
+from bbcoach.data.locking import atomic_write_bytes, file_lock
+from bbcoach.data.migrations import SCHEMA_VERSION_COLUMN, schema_version, upgrade
+from bbcoach.data.schedule import SORT_KEYS as SCHEDULE_SORT_KEYS, sort_schedule
+from bbcoach.data.snapshots import changed_rows, stat_deltas
 
 DATA_DIR = Path("data_storage")
 
+DEFAULT_LEAGUE = "Men"  # Legacy data predates the Women's league
+
+# Datasets are hive-partitioned: <DATA_DIR>/<name>/league=<league>/season=<season>/
+PARTITION_SCHEMA = pa.schema([("league", pa.string()), ("season", pa.int64())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+# Dedupe keys per dataset (league and season are implied by the partition)
+DEDUPE_KEYS = {
+    "players": ["id", "season", "team_id", "league"],
+    "teams": ["id", "season", "league"],
+    "schedule": ["team_id", "date", "opponent", "season", "league"],
+}
+
+# Row order within data files (and of loaded frames)
+SORT_KEYS = {
+    "schedule": SCHEDULE_SORT_KEYS,
+}
+
+# Each partition holds base-<seq> files plus append-only delta-<seq> files.
+# Reads merge them in seq order (last writer wins); compaction folds the
+# deltas into a new base once either threshold is hit.
+COMPACT_MAX_DELTAS = 16
+COMPACT_MAX_DELTA_BYTES = 16 * 1024 * 1024
+
+# Every save also records a snapshot of the rows it changed under
+# <DATA_DIR>/<name>/_snapshots/ (skipped by dataset discovery), catalogued in
+# _snapshots/_manifest.json. Snapshot files are never compacted.
+SNAPSHOT_DIR = "_snapshots"
+
+# Attempts (and pause between them) at taking the exclusive read lock to
+# delete files a compaction made obsolete
+GC_ATTEMPTS = 5
+GC_RETRY_SECONDS = 0.01
+
+_seq_lock = threading.Lock()
+_last_seq = 0
+_compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bbcoach-compact")
+# Finish pending compactions before the interpreter tears down pyarrow's
+# native threads (exiting with one running aborts the process)
+atexit.register(_compactor.shutdown, wait=True)
+
 
 def ensure_data_dir():
     if not DATA_DIR.exists():
         DATA_DIR.mkdir(parents=True)
 
 
-def save_teams(teams_data: list[dict], filename="teams.parquet"):
-    ensure_data_dir()
-    df = pd.DataFrame(teams_data)
-    path = DATA_DIR / filename
-    if path.exists():
-        existing_df = pd.read_parquet(path)
-        # simplistic merge: concat and drop duplicates
-        # Include league in subset if available
-        subset = ["id", "season"]
-        if "league" in df.columns:
-            subset.append("league")
+def _dataset_name(filename: str) -> str:
+    """Map a legacy filename ("players.parquet") to its dataset name ("players")."""
+    return Path(filename).stem
 
-        df = pd.concat([existing_df, df]).drop_duplicates(subset=subset, keep="last")
 
-    df.to_parquet(path)
-    print(f"Saved {len(df)} teams to {path}")
+def _dataset_dir(name: str) -> Path:
+    return DATA_DIR / name
 
 
-def save_players(players_data: list[dict], filename="players.parquet"):
-    ensure_data_dir()
-    df = pd.DataFrame(players_data)
-    path = DATA_DIR / filename
-    if path.exists():
-        existing_df = pd.read_parquet(path)
-        # Include league in subset if available
-        subset = ["id", "season", "team_id"]
-        if "league" in df.columns or "league" in existing_df.columns:
-            subset.append("league")
-
-        df = pd.concat([existing_df, df]).drop_duplicates(subset=subset, keep="last")
-
-    df.to_parquet(path)
-    print(f"Saved {len(df)} players to {path}")
-
-
-def load_teams() -> pd.DataFrame:
-    path = DATA_DIR / "teams.parquet"
-    if path.exists():
-        df = pd.read_parquet(path)
-        if "league" not in df.columns:
-            df["league"] = "Men"  # Default to Men for legacy data
-        return df
-    return pd.DataFrame()
+def _snapshot_dir(name: str) -> Path:
+    return _dataset_dir(name) / SNAPSHOT_DIR
 
 
-def load_players() -> pd.DataFrame:
-    path = DATA_DIR / "players.parquet"
-    if path.exists():
-        df = pd.read_parquet(path)
-
-        # Default league if missing
-        if "league" not in df.columns:
-            df["league"] = "Men"
-
-        # Pre-process raw stats into columns if they exist
-        if "raw_stats" in df.columns:
-            # We need to extract stats. The logic is similar to app.py
-            # Expected raw indices: 3:PPG, 4:RPG, 5:APG, 10:3P%
-
-            # Clean names first
-            if "name" in df.columns:
-                df["name"] = df["name"].astype(str).str.strip()
-
-            def extract_stat(row, idx, is_percent=False):
-                try:
-                    val = str(row[idx])
-                    if "%" in val:
-                        if is_percent:
-                            return float(val.replace("%", ""))
-                        return 0.0  # Percent where number expected
-
-                    if val == "-":
-                        return 0.0
-
-                    return float(val)
-                except Exception:
-                    return 0.0
-
-            # Helper to safely get raw stats list
-            def get_raw(x):
-                # Handle lists and numpy arrays (from parquet)
-                if x is not None and hasattr(x, "__len__") and not isinstance(x, str):
-                    if len(x) > 0:
-                        return x
-                return None
-
-            # Only apply logic where raw_stats is valid
-            # If raw_stats is missing (new data), we trust the existing columns (PPG, etc.)
-
-            # Helper wrapper to apply only if raw stats exist
-            def smart_apply(row, func, col_name):
-                raw = get_raw(row.get("raw_stats"))
-                if raw is not None and len(raw) > 0:
-                    return func(raw)
-                # Return existing value if available, else 0.0
-                return row.get(col_name, 0.0)
-
-            # Pre-calculate GP to identify Totals
-            # df["GP"] = df["raw_stats"].apply(lambda x: extract_stat(x, 6)) # OLD
-            df["GP"] = df.apply(
-                lambda r: smart_apply(r, lambda x: extract_stat(x, 6), "GP"), axis=1
-            )
+def _dedupe_keys(name: str) -> list[str]:
+    # "players_genius" dedupes like "players"
+    return DEDUPE_KEYS.get(name, DEDUPE_KEYS.get(name.split("_")[0], []))
 
-            def smart_parse_ppg(raw_list):
-                """
-                Detects if a row is 'Totals' (integers) or 'Averages' (floats).
-                If Total and GP > 1, returns Total / GP.
-                """
-                try:
-                    if len(raw_list) <= 6:
-                        return 0.0
-
-                    row = raw_list  # Alias for clarity in logic copy-paste
-
-                    raw_pts = str(row[3])
-                    if "%" in raw_pts:
-                        return 0.0  # Bad row (Shooting stats)
-
-                    pts = float(raw_pts) if raw_pts != "-" else 0.0
-
-                    # Heuristic for Total:
-                    is_integer_string = "." not in raw_pts and raw_pts != "-"
-                    gp = float(row[6]) if row[6] != "-" else 0.0
-
-                    if gp > 1 and (pts > 40 or (is_integer_string and pts > 20)):
-                        # Likely a total
-                        return round(pts / gp, 1)
-
-                    # Fallback Sanity Check for 100.0 PPG
-                    if pts >= 99.0 and gp > 5:
-                        return round(pts / gp, 1)
-
-                    return pts
-                except Exception:
-                    return 0.0
-
-            # General function for other stats (RPG, APG)
-            def get_stat_smart(raw_list, idx):
-                if len(raw_list) <= idx:
-                    return 0.0
-                try:
-                    raw_val = str(raw_list[idx])
-                    if "%" in raw_val:
-                        return 0.0
-                    val = float(raw_val) if raw_val != "-" else 0.0
-
-                    # Check if total row based on PTS (idx 3)
-                    raw_pts = str(raw_list[3])
-                    gp = float(raw_list[6]) if raw_list[6] != "-" else 0.0
-
-                    if (
-                        gp > 1
-                        and "." not in raw_pts
-                        and raw_pts != "-"
-                        and float(raw_pts) > 20
-                    ):
-                        return round(val / gp, 1)
-
-                    return val
-                except Exception:
-                    return 0.0
-
-            # Apply Smart Parse
-            df["PPG"] = df.apply(
-                lambda r: smart_apply(r, lambda x: smart_parse_ppg(x), "PPG"), axis=1
-            )
 
-            # RPG
-            df["RPG"] = df.apply(
-                lambda r: smart_apply(r, lambda x: get_stat_smart(x, 4), "RPG"), axis=1
-            )
-            # Sanity Cap for RPG
-            df["RPG"] = df.apply(
-                lambda row: 0.0 if row["RPG"] > 20 else row["RPG"], axis=1
-            )
+def _sort_keys(name: str) -> list[str]:
+    return SORT_KEYS.get(name, SORT_KEYS.get(name.split("_")[0], []))
 
-            # APG
-            df["APG"] = df.apply(
-                lambda r: smart_apply(r, lambda x: get_stat_smart(x, 5), "APG"), axis=1
-            )
-            # Sanity Cap for APG
-            df["APG"] = df.apply(
-                lambda row: 0.0 if row["APG"] > 15 else row["APG"], axis=1
-            )
 
-            # MIN
-            df["MIN"] = df.apply(
-                lambda r: smart_apply(r, lambda x: get_stat_smart(x, 8), "MIN"), axis=1
-            )
-            # Sanity Cap for MIN
-            df["MIN"] = df.apply(
-                lambda row: 0.0 if row["MIN"] > 48 else row["MIN"], axis=1
-            )
+def _lock_path(name: str, role: str) -> Path:
+    return DATA_DIR / f".{name}.{role}.lock"
 
-            # Consistency Check: PPG vs MIN
-            def check_ppg_min(row):
-                ppg = row.get("PPG", 0.0)
-                min_played = row.get("MIN", 0.0)
-                if min_played > 1 and ppg > (min_played * 2.5):
-                    return round(min_played * 2, 1)
-                return ppg
 
-            df["PPG"] = df.apply(check_ppg_min, axis=1)
+def _write_lock(name: str):
+    """
+    Exclusive per-dataset lock held while allocating a seq and writing files.
 
-            df["TO"] = df.apply(
-                lambda r: smart_apply(r, lambda x: get_stat_smart(x, 18), "TO"), axis=1
-            )
+    Readers never take it, so appends don't pause the API.
+    """
+    return file_lock(_lock_path(name, "write"))
 
-            # Percentages
-            df["3P%"] = df.apply(
-                lambda r: smart_apply(r, lambda x: extract_stat(x, 10, True), "3P%"),
-                axis=1,
-            )
-            df["FG%"] = df.apply(
-                lambda r: smart_apply(r, lambda x: extract_stat(x, 9, True), "FG%"),
-                axis=1,
-            )
-            df["EFF"] = df.apply(
-                lambda r: smart_apply(r, lambda x: extract_stat(x, -4), "EFF"), axis=1
-            )
 
-            # Additional simple column checks
-            if "SPG" not in df.columns:
-                df["SPG"] = 0.0
-            if "BPG" not in df.columns:
-                df["BPG"] = 0.0
+def _read_lock(name: str, shared: bool = True, blocking: bool = True):
+    """
+    Per-dataset lock held by readers (shared) while listing and reading files.
+
+    Only deleting files needs it exclusively, and compaction never waits for it.
+    """
+    return file_lock(_lock_path(name, "read"), shared=shared, blocking=blocking)
 
-        return df
 
+def _next_seq(name: str) -> str:
+    """
+    Monotonic, sortable sequence number for new data files.
+
+    The last seq is persisted per dataset so it stays monotonic across
+    processes and clock adjustments. Call with the dataset's write lock held.
+    """
+    global _last_seq
+    seq_path = DATA_DIR / f".{name}.seq"
+    try:
+        stored = int(seq_path.read_text() or 0)
+    except (FileNotFoundError, ValueError):
+        stored = 0
+    with _seq_lock:
+        _last_seq = max(time.time_ns(), _last_seq + 1, stored + 1)
+        seq = _last_seq
+    atomic_write_bytes(seq_path, str(seq).encode())
+    return f"{seq:020d}"
+
+
+def _file_seq(path: str) -> str:
+    """Sequence number of a data file; files without one sort first."""
+    parts = Path(path).name.split("-")
+    if len(parts) >= 3 and parts[0] in ("base", "delta", "snap"):
+        return parts[1]
+    return "0" * 20
+
+
+def dataset_exists(name: str) -> bool:
+    """Check whether a dataset (or its not yet migrated legacy file) exists."""
+    return _dataset_dir(name).exists() or (DATA_DIR / f"{name}.parquet").exists()
+
+
+def dataset_mtime(name: str) -> Optional[float]:
+    """Modification time of the most recently written file in a dataset."""
+    _prepare_dataset(name)
+    root = _dataset_dir(name)
+    if not root.exists():
+        return None
+    mtimes = [p.stat().st_mtime for p in root.rglob("*.parquet")]
+    return max(mtimes, default=None)
+
+
+def dataset_version(name: str) -> str:
+    """
+    Cheap token that changes whenever a dataset's stored rows may have changed.
+
+    Built from the last allocated seq (bumped by every save), the recorded
+    schema version and the stat of a not yet migrated legacy file, so it
+    costs a few small reads and no listing. Compaction keeps the rows and
+    the seq, so it does not change the token. Pending layout and schema
+    migrations run first, so loading does not change the token either.
+    """
+    _prepare_dataset(name)
+    parts = []
+    for suffix in ("seq", "schema"):
+        try:
+            parts.append((DATA_DIR / f".{name}.{suffix}").read_text().strip() or "0")
+        except FileNotFoundError:
+            parts.append("0")
+    try:
+        legacy = (DATA_DIR / f"{name}.parquet").stat()
+        parts.append(f"{legacy.st_mtime_ns}.{legacy.st_size}")
+    except FileNotFoundError:
+        parts.append("0")
+    return "-".join(parts)
+
+
+def _with_partition_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Make sure league/season exist so every row has a partition."""
+    if "league" not in df.columns:
+        df["league"] = DEFAULT_LEAGUE
+    else:
+        df["league"] = df["league"].fillna(DEFAULT_LEAGUE)
+    if "season" not in df.columns:
+        df["season"] = None
+    df["season"] = pd.array(df["season"], dtype="Int64")
+    return df
+
+
+def _partition_filter(league: Optional[str] = None, season: Optional[int] = None):
+    expr = None
+    if league is not None:
+        expr = ds.field("league") == league
+    if season is not None:
+        season_expr = ds.field("season") == int(season)
+        expr = season_expr if expr is None else expr & season_expr
+    return expr
+
+
+def _partition_expr(league: str, season: Optional[int]):
+    """Expression matching exactly one partition (season may be null)."""
+    if season is None:
+        return (ds.field("league") == league) & ds.field("season").is_null()
+    return _partition_filter(league, season)
+
+
+def _list_files(name: str, expr=None, snapshots: bool = False) -> list[str]:
+    """Data (or snapshot) files of the matching partitions, ordered by seq."""
+    root = _snapshot_dir(name) if snapshots else _dataset_dir(name)
+    if not root.exists():
+        return []
+    # Only the partition columns: listing must not open any file, since a
+    # concurrent compaction may delete it in the meantime
+    dataset = ds.dataset(root, schema=PARTITION_SCHEMA, format="parquet", partitioning=PARTITIONING)
+    paths = [f.path for f in dataset.get_fragments(filter=expr)]
+    return sorted(paths, key=lambda p: (_file_seq(p), Path(p).name))
+
+
+def _list_partitions(name: str) -> set[tuple]:
+    """All (league, season) partitions of a dataset."""
+    root = _dataset_dir(name)
+    if not root.exists():
+        return set()
+    dataset = ds.dataset(root, schema=PARTITION_SCHEMA, format="parquet", partitioning=PARTITIONING)
+    partitions = set()
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        partitions.add((keys.get("league"), keys.get("season")))
+    return partitions
+
+
+def _key_filter(schema: pa.Schema, keys: list[str], match: pd.DataFrame):
+    """
+    Expression keeping the rows whose first key takes a value of match's.
+
+    It may keep extra rows (only one key is checked); None if no key can
+    be filtered on.
+    """
+    key = next((k for k in keys if k in schema.names and k in match.columns), None)
+    if key is None:
+        return None
+    values = match[key]
+    try:
+        present = pa.array(values.dropna().drop_duplicates(), from_pandas=True)
+        expr = ds.field(key).isin(present.cast(schema.field(key).type))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return None
+    if values.isna().any():
+        expr = expr | ds.field(key).is_null()
+    return expr
+
+
+def _read_files(
+    root: Path,
+    paths: list[str],
+    columns: Optional[list[str]],
+    keys: list[str],
+    match: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Read data files in seq order and resolve duplicate keys (last writer wins).
+
+    Files written at different times may carry different columns (e.g. legacy
+    raw_stats), so the schema is unified over the given files only.
+
+    Args:
+        match: Only read rows sharing key values with these rows (the filter
+            is pushed into the scan, and may keep a few extra rows)
+    """
+    schemas = [ds.dataset(p, format="parquet").schema for p in paths]
+    schema = pa.unify_schemas(schemas + [PARTITION_SCHEMA], promote_options="permissive")
+    row_filter = _key_filter(schema, keys, match) if match is not None else None
+
+    # Only partitions holding several files can contain duplicate keys
+    needs_merge = len({str(Path(p).parent) for p in paths}) < len(paths)
+    keys = [k for k in keys if k in schema.names] if needs_merge else []
+    read_columns = columns
+    if columns is not None:
+        read_columns = [c for c in columns if c in schema.names]
+        read_columns += [k for k in keys if k not in read_columns]
+
+    def scan(files):
+        dataset = ds.dataset(
+            files,
+            schema=schema,
+            format="parquet",
+            partitioning=PARTITIONING,
+            partition_base_dir=str(root),
+        )
+        return dataset.to_table(columns=read_columns, filter=row_filter)
+
+    if keys:
+        # One table per file keeps the seq order explicit for keep="last"
+        table = pa.concat_tables([scan([p]) for p in paths])
+    else:
+        table = scan(paths)
+
+    df = table.to_pandas()
+    if keys:
+        df = df.drop_duplicates(subset=keys, keep="last").reset_index(drop=True)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+    if "season" in df.columns and not df["season"].isna().any():
+        df["season"] = df["season"].astype("int64")
+    return df
+
+
+def _read_dataset(
+    name: str,
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """Read a dataset, touching only the matching partitions and columns."""
+    expr = _partition_filter(league, season)
+    for attempt in range(3):
+        with _read_lock(name):
+            paths = _list_files(name, expr)
+            if not paths:
+                return pd.DataFrame()
+            try:
+                return _read_files(_dataset_dir(name), paths, columns, _dedupe_keys(name))
+            except FileNotFoundError:
+                # Files removed without the read lock (no fcntl); list again
+                if attempt == 2:
+                    raise
     return pd.DataFrame()
 
-def save_schedule(schedule_data: list[dict], filename="schedule.parquet"):
+
+def _write_files(df: pd.DataFrame, name: str, kind: str, seq: str, snapshots: bool = False):
+    """
+    Write one <kind>-<seq> file into every partition present in df.
+
+    Files are written under a hidden name, which dataset discovery skips, and
+    renamed into place once complete so readers never see a partial file.
+    """
+    keys = [k for k in _sort_keys(name) if k in df.columns]
+    if keys:
+        df = df.sort_values(keys, kind="stable", na_position="last")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    written = []
+    ds.write_dataset(
+        table,
+        _snapshot_dir(name) if snapshots else _dataset_dir(name),
+        format="parquet",
+        partitioning=PARTITIONING,
+        existing_data_behavior="overwrite_or_ignore",
+        basename_template=f".{kind}-{seq}-{{i}}.parquet",
+        file_visitor=lambda f: written.append(Path(f.path)),
+    )
+    for path in written:
+        path.rename(path.with_name(path.name[1:]))
+
+
+def _append_delta(df: pd.DataFrame, name: str) -> int:
+    """
+    Append the new or changed rows of a batch as delta and snapshot files.
+
+    Cost depends on the batch and the partitions it touches, not the dataset.
+
+    Returns:
+        Number of rows written
+    """
     ensure_data_dir()
-    if not schedule_data:
+    df = _with_partition_columns(upgrade(df, name))
+    keys = [k for k in _dedupe_keys(name) if k in df.columns]
+    if keys:
+        df = df.drop_duplicates(subset=keys, keep="last")
+
+    with _write_lock(name):
+        # A seq is only allocated once rows changed, so a save that changes
+        # nothing keeps the dataset version (and the caches keyed on it)
+        if keys:
+            df, seq = _record_snapshot(df, name, keys)
+        elif not df.empty:
+            seq = _next_seq(name)
+        if df.empty:
+            return 0
+        _write_files(df, name, "delta", seq)
+
+    touched = df[["league", "season"]].drop_duplicates()
+    for league, season in touched.itertuples(index=False):
+        season = None if pd.isna(season) else int(season)
+        if _needs_compaction(name, league, season):
+            _compactor.submit(compact_partition, name, league, season)
+    return len(df)
+
+
+def _record_snapshot(df: pd.DataFrame, name: str, keys: list[str]) -> tuple[pd.DataFrame, Optional[str]]:
+    """
+    Write the rows of df that differ from the stored rows as a new snapshot.
+
+    Only the stored rows sharing keys with df are read (every stored column
+    is compared, since a save replaces the whole row). The first snapshot of
+    a partition also records its existing rows as a baseline, dated by the
+    partition's newest data file, which reads the whole partition once.
+    Call with the dataset's write lock held.
+
+    Returns:
+        The changed rows and the seq allocated for them (None if no row
+        changed)
+    """
+    changed = []
+    entries = []
+    for (league, season), part in df.groupby(["league", "season"], dropna=False, sort=False):
+        season = None if pd.isna(season) else int(season)
+        expr = _partition_expr(league, season)
+        current = pd.DataFrame()
+        # Compaction deletes folded files under the exclusive read lock
+        with _read_lock(name):
+            paths = _list_files(name, expr)
+            baseline = bool(paths) and not _list_files(name, expr, snapshots=True)
+            if paths:
+                match = None if baseline else part
+                current = _read_files(_dataset_dir(name), paths, None, keys, match)
+        if baseline:
+            baseline_seq = _file_seq(paths[-1])
+            _write_files(_with_partition_columns(current), name, "snap", baseline_seq, snapshots=True)
+            entries.append(_manifest_entry(baseline_seq, len(current), [(league, season)], baseline=True))
+        changed.append(changed_rows(part, current, keys))
+
+    changed = pd.concat(changed) if changed else df.iloc[0:0]
+    seq = None
+    if not changed.empty:
+        seq = _next_seq(name)
+        _write_files(changed, name, "snap", seq, snapshots=True)
+        partitions = changed[["league", "season"]].drop_duplicates().itertuples(index=False)
+        entries.append(_manifest_entry(seq, len(changed), partitions))
+    if entries:
+        _append_manifest(name, entries)
+    return changed, seq
+
+
+def _manifest_entry(seq: str, rows: int, partitions, baseline: bool = False) -> dict:
+    return {
+        "seq": seq,
+        "timestamp": pd.Timestamp(int(seq), unit="ns", tz="UTC").isoformat(),
+        "rows": rows,
+        "partitions": [
+            {"league": league, "season": None if pd.isna(season) else int(season)}
+            for league, season in partitions
+        ],
+        "baseline": baseline,
+    }
+
+
+def _append_manifest(name: str, entries: list[dict]):
+    path = _snapshot_dir(name) / "_manifest.json"
+    manifest = list_snapshots(name)
+    manifest.extend(entries)
+    manifest.sort(key=lambda e: e["seq"])
+    atomic_write_bytes(path, json.dumps(manifest, indent=1).encode("utf-8"))
+
+
+def _needs_compaction(name: str, league: str, season: Optional[int]) -> bool:
+    deltas = [
+        Path(p)
+        for p in _list_files(name, _partition_expr(league, season))
+        if Path(p).name.startswith("delta-")
+    ]
+    if len(deltas) >= COMPACT_MAX_DELTAS:
+        return True
+    return sum(p.stat().st_size for p in deltas if p.exists()) >= COMPACT_MAX_DELTA_BYTES
+
+
+def _fold_partition(
+    name: str, league: str, season: Optional[int], transform=None, wait_for_readers=False
+) -> bool:
+    """
+    Rewrite a partition's files as one base file. Call with the compact lock held.
+
+    Args:
+        transform: Optional function applied to the folded frame
+        wait_for_readers: Block until the folded files can be deleted
+            instead of leaving them for the next compaction
+    """
+    # Listing under the write lock guarantees every later delta gets a
+    # higher seq than the new base
+    with _write_lock(name):
+        paths = _list_files(name, _partition_expr(league, season))
+    if not paths or (len(paths) == 1 and transform is None):
+        return False
+
+    seq = _file_seq(paths[-1])
+    df = _read_files(_dataset_dir(name), paths, None, _dedupe_keys(name))
+    if transform is not None:
+        df = transform(df)
+    with _write_lock(name):
+        _write_files(_with_partition_columns(df), name, "base", seq)
+
+    obsolete = [p for p in paths if not Path(p).name.startswith(f"base-{seq}-")]
+    attempts = 1 if wait_for_readers else GC_ATTEMPTS
+    for attempt in range(attempts):
+        with _read_lock(name, shared=False, blocking=wait_for_readers) as exclusive:
+            if exclusive:
+                for p in obsolete:
+                    Path(p).unlink(missing_ok=True)
+                break
+        time.sleep(GC_RETRY_SECONDS)
+    return True
+
+
+def compact_partition(name: str, league: str, season: Optional[int]) -> bool:
+    """
+    Fold a partition's base and delta files into a single new base file.
+
+    Deltas appended while the compaction runs are left in place; they sort
+    after the new base, so reads still see them win. Folded files are only
+    deleted once no reader holds the read lock; if readers stay busy they
+    are left behind (they sort before the new base, so they are harmless)
+    and removed by the next compaction. Only one process compacts a
+    dataset at a time.
+
+    Returns:
+        True if files were folded
+    """
+    with file_lock(_lock_path(name, "compact"), blocking=False) as held:
+        if not held:
+            return False
+        return _fold_partition(name, league, season)
+
+
+def compact_dataset(name: str, force: bool = False) -> int:
+    """
+    Compact the partitions of a dataset.
+
+    Args:
+        name: Dataset name ("players", "teams", "schedule")
+        force: Also compact partitions below the thresholds
+
+    Returns:
+        Number of partitions compacted
+    """
+    compacted = 0
+    for league, season in _list_partitions(name):
+        if force or _needs_compaction(name, league, season):
+            compacted += compact_partition(name, league, season)
+    return compacted
+
+
+def wait_for_compaction():
+    """Block until background compactions submitted so far have finished."""
+    _compactor.submit(lambda: None).result()
+
+
+def _migrate_legacy_file(name: str):
+    """
+    One-shot migration of a monolithic <name>.parquet into the partitioned layout.
+
+    Legacy rows are written as the oldest base files, so rows already in the
+    dataset win over them. The legacy file is staged as
+    <name>.parquet.migrating (so an interrupted run resumes) and kept as
+    <name>.parquet.migrated afterwards.
+    """
+    legacy = DATA_DIR / f"{name}.parquet"
+    staged = DATA_DIR / f"{name}.parquet.migrating"
+    if not legacy.exists() and not staged.exists():
         return
 
-    df = pd.DataFrame(schedule_data)
-    path = DATA_DIR / filename
+    with _write_lock(name):
+        # Another process may have migrated while we waited for the lock
+        if legacy.exists():
+            legacy.rename(staged)
+        elif not staged.exists():
+            return
+
+        df = pd.read_parquet(staged)
+        if not df.empty:
+            df = _with_partition_columns(upgrade(df, name))
+            keys = [k for k in _dedupe_keys(name) if k in df.columns]
+            if keys:
+                df = df.drop_duplicates(subset=keys, keep="last")
+            _write_files(df, name, "base", "0" * 20)
+
+        staged.rename(DATA_DIR / f"{name}.parquet.migrated")
+    print(f"Migrated {len(df)} rows from {name}.parquet to {_dataset_dir(name)}")
+
+
+def migrate_legacy_files():
+    """Migrate every monolithic parquet file in DATA_DIR to the partitioned layout."""
+    for name in DEDUPE_KEYS:
+        _migrate_legacy_file(name)
+
+
+def _stored_schema_version(name: str) -> int:
+    try:
+        return int((DATA_DIR / f".{name}.schema").read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def run_migrations(name: str) -> bool:
+    """
+    Upgrade the rows stored in a dataset to its current schema version.
+
+    Runs once per version: every partition is rewritten through
+    migrations.upgrade and the version is recorded in DATA_DIR/.<name>.schema.
+    Readers are paused only while the stale files are deleted, so they
+    never mix upgraded and stale rows.
+
+    Returns:
+        True if a migration ran
+    """
+    target = schema_version(name)
+    if _stored_schema_version(name) >= target:
+        return False
+
+    with file_lock(_lock_path(name, "compact")):
+        if _stored_schema_version(name) >= target:
+            return False
+        for league, season in _list_partitions(name):
+            _fold_partition(
+                name, league, season,
+                transform=lambda df: upgrade(df, name),
+                wait_for_readers=True,
+            )
+        ensure_data_dir()
+        atomic_write_bytes(DATA_DIR / f".{name}.schema", str(target).encode())
+    return True
+
+
+def _partition_rows(name: str, league: str, season: Optional[int]) -> int:
+    """Row count of a partition from footers, reading only key columns if it has deltas."""
+    with _read_lock(name):
+        paths = _list_files(name, _partition_expr(league, season))
+        if len(paths) <= 1:
+            return sum(pq.read_metadata(p).num_rows for p in paths)
+        keys = _dedupe_keys(name)
+        return len(_read_files(_dataset_dir(name), paths, keys, keys))
+
+
+def dataset_stats(name: str) -> dict:
+    """
+    Row counts of a dataset per partition, without loading it.
+
+    Counts come from parquet footers (a compacted partition is one file) or
+    from its key columns, and are kept in DATA_DIR/.<name>.stats.json for
+    the dataset version they were computed at, so repeated calls only read
+    that file.
+
+    Returns:
+        Dictionary with total rows and [{league, season, rows}] partitions
+    """
+    version = dataset_version(name)
+    path = DATA_DIR / f".{name}.stats.json"
+    try:
+        stats = json.loads(path.read_text())
+        if stats.get("version") == version:
+            return stats
+    except (FileNotFoundError, ValueError):
+        pass
+
+    partitions = [
+        {"league": league, "season": season, "rows": _partition_rows(name, league, season)}
+        for league, season in sorted(_list_partitions(name), key=lambda p: (p[0], p[1] or 0))
+    ]
+    stats = {
+        "version": version,
+        "rows": sum(p["rows"] for p in partitions),
+        "partitions": partitions,
+    }
+    if DATA_DIR.exists():
+        atomic_write_bytes(path, json.dumps(stats, indent=1).encode("utf-8"))
+    return stats
+
+
+def list_snapshots(name: str = "players") -> list[dict]:
+    """
+    Snapshots recorded for a dataset, oldest first.
+
+    Each entry has seq (usable as as_of), timestamp (UTC), rows changed,
+    partitions touched and whether it is a baseline of pre-existing rows.
+    """
+    path = _snapshot_dir(name) / "_manifest.json"
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return []
+
+
+def _as_of_seq(as_of) -> str:
+    """Snapshot seq (20 digits) or timestamp (naive means UTC) -> seq bound."""
+    if isinstance(as_of, str) and len(as_of) == 20 and as_of.isdigit():
+        return as_of
+    ts = pd.Timestamp(as_of)
+    if ts.tz is None:
+        ts = ts.tz_localize("UTC")
+    return f"{ts.as_unit('ns').value:020d}"
+
+
+def _read_snapshots(
+    name: str,
+    after: Optional[str],
+    upto: str,
+    league: Optional[str],
+    season: Optional[int],
+    columns: Optional[list[str]],
+    match: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Merge the snapshot files with after < seq <= upto (last writer wins).
+
+    match restricts the read to rows sharing keys with it (see _read_files).
+    """
+    paths = [
+        p for p in _list_files(name, _partition_filter(league, season), snapshots=True)
+        if (after is None or _file_seq(p) > after) and _file_seq(p) <= upto
+    ]
+    if not paths:
+        return pd.DataFrame()
+    if columns is not None:
+        # upgrade() needs each row's schema version
+        columns = list(dict.fromkeys(columns + [SCHEMA_VERSION_COLUMN]))
+    df = _read_files(_snapshot_dir(name), paths, columns, _dedupe_keys(name), match)
+    # Older snapshots may predate the current schema
+    return upgrade(df, name)
+
+
+def load_as_of(
+    name: str,
+    as_of,
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read a dataset as it was at a point in time.
+
+    Only the changed-row snapshots up to as_of are merged; no full copies
+    exist on disk.
+
+    Args:
+        name: Dataset name ("players", "teams", "schedule")
+        as_of: Timestamp (naive means UTC) or a snapshot seq from list_snapshots
+    """
+    _prepare_dataset(name)
+    return _read_snapshots(name, None, _as_of_seq(as_of), league, season, columns)
+
+
+def snapshot_deltas(
+    name: str,
+    start,
+    end,
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Per-row stat changes between two points in time.
+
+    Only rows changed after start (up to end) are compared, against their
+    values as of start.
+
+    Args:
+        start, end: Timestamps or snapshot seqs
+        columns: Stats to compare (default: all numeric columns)
+
+    Returns:
+        Keys, name and <stat>_before/_after/_delta columns per changed row
+    """
+    _prepare_dataset(name)
+    start_seq, end_seq = _as_of_seq(start), _as_of_seq(end)
+    changes = _read_snapshots(name, start_seq, end_seq, league, season, None)
+    if changes.empty:
+        return pd.DataFrame()
+    # Earlier values of the changed rows only, and only the compared stats
+    keys = _dedupe_keys(name)
+    compared = list(changes.columns) if columns is None else keys + list(columns)
+    before = _read_snapshots(name, None, start_seq, league, season, compared, match=changes)
+    return stat_deltas(before, changes, keys, columns)
+
+
+def _prepare_dataset(name: str):
+    """Bring a dataset to the current layout and schema before first use."""
+    _migrate_legacy_file(name)
+    run_migrations(name)
 
-    if path.exists():
-        existing_df = pd.read_parquet(path)
-        # simplistic merge: concat and drop duplicates
-        df = pd.concat([existing_df, df]).drop_duplicates(
-            subset=["team_id", "date", "opponent"],
-            keep="last",  # Drop exact duplicates but keep new
-        )
 
-    df.to_parquet(path)
-    print(f"Saved {len(df)} schedule items to {path}")
+def save_teams(teams_data: list[dict], filename="teams.parquet"):
+    name = _dataset_name(filename)
+    _prepare_dataset(name)
+    count = _append_delta(pd.DataFrame(teams_data), name)
+    print(f"Saved {count} teams to {_dataset_dir(name)}")
 
 
-def load_schedule() -> pd.DataFrame:
-    path = DATA_DIR / "schedule.parquet"
-    if path.exists():
-        return pd.read_parquet(path)
-    return pd.DataFrame()
+def save_players(players_data: list[dict], filename="players.parquet"):
+    name = _dataset_name(filename)
+    _prepare_dataset(name)
+    count = _append_delta(pd.DataFrame(players_data), name)
+    print(f"Saved {count} players to {_dataset_dir(name)}")
+
+
+def load_teams(
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+    compact: bool = True,
+) -> pd.DataFrame:
+    _prepare_dataset("teams")
+    df = _read_dataset("teams", league=league, season=season, columns=columns)
+    return apply_dtypes(df, TEAM_SCHEMA) if compact else df
+
+
+def load_players(
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+    compact: bool = True,
+    as_of=None,
+) -> pd.DataFrame:
+    """
+    Load players, optionally only one league/season partition and a subset of columns.
+
+    Stats are normalized when saved (see bbcoach.data.migrations), so this
+    is a plain columnar read. With as_of (timestamp or snapshot seq) the
+    players are read as they were at that time.
+
+    With compact=True (the default) the frame uses the dtypes of
+    bbcoach.data.dtypes.PLAYER_SCHEMA (categorical keys, int16 counts,
+    float32 stats); pass compact=False for the stored float64/object dtypes.
+    """
+    if as_of is not None:
+        df = load_as_of("players", as_of, league=league, season=season, columns=columns)
+    else:
+        _prepare_dataset("players")
+        df = _read_dataset("players", league=league, season=season, columns=columns)
+    return apply_dtypes(df, PLAYER_SCHEMA) if compact else df
+
+
+def save_schedule(schedule_data: list[dict], filename="schedule.parquet"):
+    if not schedule_data:
+        return
+
+    name = _dataset_name(filename)
+    _prepare_dataset(name)
+    count = _append_delta(pd.DataFrame(schedule_data), name)
+    print(f"Saved {count} schedule items to {_dataset_dir(name)}")
+
+
+def load_schedule(
+    league: Optional[str] = None,
+    season: Optional[int] = None,
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load schedule rows sorted by (league, season, team_id, date).
+
+    ``date`` is a timezone-aware datetime (NaT when the scraped text, kept in
+    ``date_text``, could not be parsed).
+    """
+    _prepare_dataset("schedule")
+    df = _read_dataset("schedule", league=league, season=season, columns=columns)
+    # Files are sorted individually; merged reads need one more pass
+    return sort_schedule(df)
@@ -0,0 +1,182 @@
+"""
+Monte Carlo game simulation.
+
+Draws whole games for a matchup in batched NumPy draws (no per-game loop)
+and summarizes them as a win probability and score quantiles.
+
+Each team's expected score is its offense scaled by the opponent's
+defense. Offense is the team's rotation PPG from the aggregate table,
+blended toward the points it actually scored in the season's completed
+games as those accumulate. Defense is the points a team allows relative
+to its league's average (1.0 without games). Score spread is the spread
+of the league's game scores around each team's average, or
+DEFAULT_SCORE_SD without results.
+
+Results are the ratings.completed_games frame, which callers build once
+per schedule version.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from bbcoach.data.standings import team_games
+
+DEFAULT_SIMULATIONS = 100_000
+DEFAULT_SCORE_SD = 11.0  # Typical spread of a team's points per game
+PRIOR_GAMES = 5  # Games after which schedule results and rotation PPG weigh equally
+MIN_SD_GAMES = 10  # Completed team-games needed to fit the spread
+OVERTIME_FRACTION = 5 / 40  # A 5-minute overtime of a 40-minute game
+MAX_OVERTIMES = 4
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _season_results(
+    games: Optional[pd.DataFrame], season, league: Optional[str], team_ids: tuple
+) -> tuple[pd.DataFrame, Optional[str]]:
+    """
+    A league/season's completed games from both teams' sides.
+
+    Without a league, the league the teams played the season in is used.
+
+    Returns:
+        (frame of team_id, points_for, points_against; the league)
+    """
+    columns = ["team_id", "points_for", "points_against"]
+    if games is None or games.empty:
+        return pd.DataFrame(columns=columns), league
+    games = games[games["season"] == season]
+    if league is None:
+        played = games[games["home_id"].isin(team_ids) | games["away_id"].isin(team_ids)]
+        league = played["league"].mode().iloc[0] if len(played) else None
+    games = games[games["league"] == league]
+    if games.empty:
+        return pd.DataFrame(columns=columns), league
+    return team_games(games)[columns], league
+
+
+def fit_matchup(
+    aggregates, games, team_a_id, team_b_id, season, league: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Score model of a matchup.
+
+    Args:
+        aggregates: Table from compute_all_team_aggregates
+        games: Frame from ratings.completed_games (results are used when
+            present), or None
+        team_a_id: First team ID
+        team_b_id: Second team ID
+        season: Season year
+        league: League whose results are used (default: the teams' league)
+
+    Returns:
+        {"mean_a", "mean_b", "sd", "games_a", "games_b", "league"} or None
+        if either team has neither aggregates nor results
+    """
+    results, league = _season_results(games, season, league, (str(team_a_id), str(team_b_id)))
+    points = results.groupby("team_id")[["points_for", "points_against"]]
+    means = points.mean()
+    counts = points.size()
+    league_mean = results["points_for"].mean() if len(results) else np.nan
+
+    def team_model(team_id):
+        team_id = str(team_id)
+        stats = aggregates.get((team_id, int(season)))
+        rotation_ppg = stats["total_ppg"] if stats else np.nan
+        games = int(counts.get(team_id, 0))
+        if games == 0:
+            return rotation_ppg, 1.0, 0
+        weight = games / (games + PRIOR_GAMES)
+        scored = means.at[team_id, "points_for"]
+        offense = scored if np.isnan(rotation_ppg) else weight * scored + (1 - weight) * rotation_ppg
+        defense = weight * means.at[team_id, "points_against"] / league_mean + (1 - weight)
+        return offense, defense, games
+
+    offense_a, defense_a, games_a = team_model(team_a_id)
+    offense_b, defense_b, games_b = team_model(team_b_id)
+    if np.isnan(offense_a) or np.isnan(offense_b):
+        return None
+
+    sd = DEFAULT_SCORE_SD
+    if len(results) >= MIN_SD_GAMES:
+        residuals = results["points_for"] - results.groupby("team_id")["points_for"].transform("mean")
+        sd = float(np.sqrt((residuals ** 2).mean())) or DEFAULT_SCORE_SD
+
+    return {
+        "mean_a": float(offense_a * defense_b),
+        "mean_b": float(offense_b * defense_a),
+        "sd": sd,
+        "games_a": games_a,
+        "games_b": games_b,
+        "league": league,
+    }
+
+
+def simulate_games(
+    mean_a: float, mean_b: float, sd: float,
+    simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = 0,
+) -> dict:
+    """
+    Simulate games between two teams with normally distributed scores.
+
+    Tied games go to 5-minute overtimes (drawn for all tied games at once);
+    ties left after MAX_OVERTIMES are settled by a coin flip.
+
+    Returns:
+        Win probabilities, expected scores, score and margin quantiles and
+        the overtime rate
+    """
+    rng = np.random.default_rng(seed)
+    means = np.array([mean_a, mean_b])
+    scores = np.maximum(np.rint(rng.normal(means, sd, size=(simulations, 2))), 0)
+
+    tied = np.flatnonzero(scores[:, 0] == scores[:, 1])
+    overtime = len(tied)
+    for _ in range(MAX_OVERTIMES):
+        if not len(tied):
+            break
+        extra = rng.normal(means * OVERTIME_FRACTION, sd * np.sqrt(OVERTIME_FRACTION), size=(len(tied), 2))
+        scores[tied] += np.maximum(np.rint(extra), 0)
+        tied = tied[scores[tied, 0] == scores[tied, 1]]
+    if len(tied):
+        scores[tied, rng.integers(0, 2, size=len(tied))] += 1
+
+    margin = scores[:, 0] - scores[:, 1]
+    win_a = float((margin > 0).mean())
+
+    def quantiles(values: np.ndarray) -> dict:
+        return {f"p{round(q * 100)}": float(v) for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))}
+
+    return {
+        "simulations": simulations,
+        "seed": seed,
+        "win_probability_a": win_a,
+        "win_probability_b": 1.0 - win_a,
+        "expected_score_a": float(scores[:, 0].mean()),
+        "expected_score_b": float(scores[:, 1].mean()),
+        "score_quantiles_a": quantiles(scores[:, 0]),
+        "score_quantiles_b": quantiles(scores[:, 1]),
+        "margin_quantiles": quantiles(margin),
+        "overtime_rate": overtime / simulations,
+    }
+
+
+def simulate_matchup(
+    aggregates, games, team_a_id, team_b_id, season,
+    simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = 0,
+    league: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Fit a matchup's score model and simulate it.
+
+    Returns:
+        simulate_games' summary plus the fitted "model", or None if the
+        matchup cannot be fit
+    """
+    model = fit_matchup(aggregates, games, team_a_id, team_b_id, season, league)
+    if model is None:
+        return None
+    summary = simulate_games(model["mean_a"], model["mean_b"], model["sd"], simulations, seed)
+    summary["model"] = model
+    return summary
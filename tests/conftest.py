@@ -0,0 +1,107 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.dtypes import PLAYER_SCHEMA, apply_dtypes  # noqa: E402
+
+
+def _game(day, home, away, home_points, away_points, season=2025):
+    # The scraper lists each game from both sides with the "home-away" score
+    result = "Scheduled" if home_points is None else f"{home_points}-{away_points}"
+    date = f"Oct {day}, {season}, 6:00 PM"
+    common = {"date": date, "result": result, "league": "Men", "season": season}
+    return [
+        {**common, "team_id": home, "opponent_id": away, "home_away": "Home"},
+        {**common, "team_id": away, "opponent_id": home, "home_away": "Away"},
+    ]
+
+
+def _schedule(*games):
+    return pd.DataFrame([row for g in games for row in g])
+
+
+@pytest.fixture
+def game():
+    """Schedule rows of one game: game(day, home, away, home_points, away_points, season=2025)."""
+    return _game
+
+
+@pytest.fixture
+def schedule():
+    """Schedule frame of game() rows: schedule(*games)."""
+    return _schedule
+
+
+@pytest.fixture
+def season_games():
+    """Four completed Men's 2025 games between teams 1-3 (team 1 wins all of its)."""
+    return [
+        _game(1, "1", "2", 80, 70),
+        _game(3, "2", "3", 75, 72),
+        _game(5, "3", "1", 60, 90),
+        _game(7, "1", "3", 85, 65),
+    ]
+
+
+@pytest.fixture
+def roster_players():
+    """Eleven-player Men's rosters of teams 0-3 over two seasons."""
+    rng = np.random.default_rng(1)
+    rows = []
+    for team in range(4):
+        for season in (2024, 2025):
+            # Team 3 is early in the 2025 season (nobody has 8 games yet)
+            max_gp = 4 if (team, season) == (3, 2025) else 20
+            for i in range(11):
+                rows.append({
+                    "id": f"p{team}{i}",
+                    "name": f" Player {team}-{i} ",
+                    "team_id": str(team),
+                    "season": season,
+                    "league": "Men",
+                    "PPG": float(rng.integers(0, 250)) / 10,
+                    "RPG": float(rng.integers(0, 100)) / 10,
+                    "APG": float(rng.integers(0, 80)) / 10,
+                    "GP": int(rng.integers(1, max_gp)),
+                    "MIN": float(rng.integers(50, 350)) / 10,
+                    "FG%": float(rng.integers(300, 600)) / 10,
+                    "3P%": float(rng.integers(200, 450)) / 10,
+                    "TO": float(rng.integers(0, 40)) / 10,
+                    "EFF": float(rng.integers(0, 200)) / 10,
+                })
+    df = pd.DataFrame(rows)
+    df.loc[5, "PPG"] = df.loc[6, "PPG"]  # tie in the scoring order
+    df.loc[30, "name"] = None  # skipped by the row-wise parser
+    return apply_dtypes(df, PLAYER_SCHEMA)
+
+
+@pytest.fixture
+def synthetic_players():
+    """
+    Factory of seeded random player frames over two leagues and two seasons.
+
+    synthetic_players(n, seed=0, teams=4, stats={"PPG": 25, "RPG": 10},
+    decimals=1, missing=(3, 7)) draws each stat uniformly from [0, high),
+    rounded to decimals, and blanks PPG on the missing rows. Rows have
+    PLAYER_SCHEMA dtypes.
+    """
+    def make(n, seed=0, teams=4, stats=None, decimals=1, missing=(3, 7)):
+        rng = np.random.default_rng(seed)
+        players = pd.DataFrame({
+            "id": [f"p{i}" for i in range(n)],
+            "name": [f"Player {i}" for i in range(n)],
+            "team_id": [str(i % teams) for i in range(n)],
+            "season": [2024 + i % 2 for i in range(n)],
+            "league": ["Men" if i % 3 else "Women" for i in range(n)],
+            "GP": rng.integers(1, 20, n),
+        })
+        for stat, high in (stats or {"PPG": 25, "RPG": 10}).items():
+            players[stat] = rng.uniform(0, high, n).round(decimals)
+        players.loc[list(missing), "PPG"] = np.nan
+        return apply_dtypes(players, PLAYER_SCHEMA)
+
+    return make
@@ -0,0 +1,69 @@
+import sys
+import os
+import math
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.analysis import (  # noqa: E402
+    compute_all_team_aggregates,
+    compute_matchup_matrix,
+    get_team_aggregates,
+    get_team_aggregates_rowwise,
+    predict_matchup,
+)
+
+
+def same(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-12) or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+def test_vectorized_matches_rowwise(roster_players):
+    df = roster_players
+    aggregates = compute_all_team_aggregates(df)
+    assert len(aggregates) == 8
+    for (team_id, season), stats in aggregates.items():
+        expected = get_team_aggregates_rowwise(df, team_id, season)
+        assert stats.keys() == expected.keys()
+        for key, value in expected.items():
+            if key in ("rotation", "top_8"):
+                assert len(stats[key]) == len(value)
+                for got, want in zip(stats[key], value):
+                    assert all(same(got[k], want[k]) for k in want)
+            else:
+                assert same(stats[key], value), (team_id, season, key)
+        assert len(stats["top_8"]) <= 8
+
+
+def test_single_team_lookup_and_matchup(roster_players):
+    df = roster_players
+    aggregates = compute_all_team_aggregates(df)
+    assert get_team_aggregates(df, "1", 2025) == aggregates[("1", 2025)]
+    assert get_team_aggregates(None, "1", 2025, aggregates) is aggregates[("1", 2025)]
+    assert get_team_aggregates(None, "9", 2025, aggregates) is None
+    assert predict_matchup(df, "0", "1", 2025) == predict_matchup(None, "0", "1", 2025, aggregates)
+
+
+def test_teams_without_stats():
+    df = pd.DataFrame({"id": ["a", "b"], "name": ["A", "B"], "team_id": ["1", "1"], "season": [2025, 2025]})
+    stats = compute_all_team_aggregates(df)[("1", 2025)]
+    assert stats["roster_size"] == 2
+    assert stats["top_scorer"] == "N/A"
+    assert stats["rotation"] == []
+    assert compute_all_team_aggregates(pd.DataFrame()) == {}
+
+
+def test_matchup_matrix_matches_pairwise_edges(roster_players):
+    df = roster_players
+    aggregates = compute_all_team_aggregates(df)
+    teams, edges = compute_matchup_matrix(aggregates, ["0", "1", "2", "9"], 2025)
+    assert teams == ["0", "1", "2"]
+    for i, a in enumerate(teams):
+        for j, b in enumerate(teams):
+            stats_a, stats_b = aggregates[(a, 2025)], aggregates[(b, 2025)]
+            assert same(edges["scoring"][i, j], stats_a["total_ppg"] - stats_b["total_ppg"])
+            assert same(edges["ball_security"][i, j], stats_b["total_to"] - stats_a["total_to"])
+    assert (edges["three_point"] == -edges["three_point"].T).all()
+    assert compute_matchup_matrix(aggregates, [], 2025)[1]["scoring"].shape == (0, 0)
@@ -0,0 +1,68 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.analysis import compute_all_team_aggregates  # noqa: E402
+from bbcoach.core.analytics_service import AnalyticsService, ResultCache  # noqa: E402
+
+
+def make_service(players):
+    data_service = MagicMock()
+    data_service.team_aggregates.return_value = compute_all_team_aggregates(players)
+    data_service.data_version.return_value = "v1"
+    return AnalyticsService(data_service), data_service
+
+
+def test_matchup_predictions_are_cached_per_data_version(roster_players):
+    service, data_service = make_service(roster_players)
+    first = service.predict_matchup("0", "1", 2025)
+    assert "DEEP MATCHUP ANALYSIS" in first
+    assert service.predict_matchup("0", "1", 2025) is first
+    assert service.predict_matchup_multi_season("0", "1") is not None
+    assert data_service.team_aggregates.call_count == 2
+
+    info = service.matchup_cache.info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 2, 2)
+
+    # A new data version drops the old entries
+    data_service.data_version.return_value = "v2"
+    assert service.predict_matchup("0", "1", 2025) == first
+    assert data_service.team_aggregates.call_count == 3
+    assert service.matchup_cache.info()["size"] == 1
+
+
+def test_unknown_teams_are_not_cached(roster_players):
+    service, data_service = make_service(roster_players)
+    assert service.predict_matchup("8", "9", 2025) is None
+    assert service.predict_matchup("8", "9", 2025) is None
+    assert service.matchup_cache.info()["size"] == 0
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2)
+    cache.get_or_compute(("a",), "v", lambda: 1)
+    cache.get_or_compute(("b",), "v", lambda: 2)
+    cache.get_or_compute(("a",), "v", lambda: 0)
+    cache.get_or_compute(("c",), "v", lambda: 3)
+    assert cache.get_or_compute(("a",), "v", lambda: 0) == 1
+    assert cache.get_or_compute(("b",), "v", lambda: 0) == 0
+    assert cache.info()["size"] == 2
+
+
+def test_matchup_matrix_payload(roster_players):
+    service, data_service = make_service(roster_players)
+    data_service.load_teams.return_value = pd.DataFrame({
+        "id": ["0", "1", "2", "3"], "name": ["A", "B", "C", "D"],
+        "season": [2025] * 4, "league": ["Men"] * 4,
+    })
+    matrix = service.matchup_matrix(2025, "Men")
+    assert [t["name"] for t in matrix["teams"]] == ["A", "B", "C", "D"]
+    scoring = matrix["edges"]["scoring"]
+    assert len(scoring) == 4 and all(len(row) == 4 for row in scoring)
+    assert scoring[0][0] == 0
+    assert scoring[0][1] == -scoring[1][0]
+    assert service.matchup_matrix(2030, "Men") is None
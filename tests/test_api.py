@@ -17,10 +17,12 @@ mock_teams_df = pd.DataFrame({"id": ["t1"], "name": ["Test Team"], "season": [20
 mock_schedule_df = pd.DataFrame([{"game": 1}])
 
 import api.main
+from bbcoach.data.player_index import PlayerIndex
 
 api.main.data_service.load_players = MagicMock(return_value=mock_players_df)
 api.main.data_service.load_teams = MagicMock(return_value=mock_teams_df)
 api.main.data_service.load_schedule = MagicMock(return_value=mock_schedule_df)
+api.main.data_service.player_index = MagicMock(return_value=PlayerIndex(mock_players_df))
 
 client = TestClient(api.main.app)
 
@@ -61,3 +63,102 @@ def test_get_model_info():
     """Test getting coach model information"""
     response = client.get("/api/coach/model-info")
     assert response.status_code == 200
+
+def test_get_player_deltas():
+    """Test per-player deltas between snapshots"""
+    deltas = pd.DataFrame({"id": ["p1"], "name": ["Test"], "PPG_before": [10.0], "PPG_after": [12.0], "PPG_delta": [2.0]})
+    with patch.object(api.main.data_service, "player_deltas", MagicMock(return_value=deltas)):
+        response = client.get("/api/stats/player-deltas?start=2025-01-01&end=2025-02-01&metrics=PPG")
+    assert response.status_code == 200
+    assert response.json()["players"][0]["PPG_delta"] == 2.0
+
+def test_get_snapshots_unknown_dataset():
+    """Only known datasets can be listed"""
+    response = client.get("/api/data/snapshots?dataset=../secrets")
+    assert response.status_code == 404
+
+def test_query_disabled_by_default():
+    """The SQL endpoint is off unless enabled in settings"""
+    response = client.post("/api/data/query", json={"sql": "SELECT 1"})
+    assert response.status_code == 403
+
+def test_query_streams_arrow():
+    """Query results come back as an Arrow IPC stream"""
+    import pyarrow as pa
+    table = pa.table({"name": ["Test"], "PPG": [10.0]})
+    with patch.object(api.main.settings, "sql_query_enabled", True), \
+            patch.object(api.main.data_service, "query", MagicMock(return_value=table.to_reader())):
+        response = client.post("/api/data/query", json={"sql": "SELECT name, PPG FROM players"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert pa.ipc.open_stream(response.content).read_all().equals(table)
+
+
+def test_query_stream_closes_result():
+    """The query result is closed once the response is sent"""
+    import pyarrow as pa
+    result = MagicMock(wraps=pa.table({"id": [1, 2]}).to_reader())
+    result.schema = pa.schema([("id", pa.int64())])
+    with patch.object(api.main.settings, "sql_query_enabled", True), \
+            patch.object(api.main.data_service, "query", MagicMock(return_value=result)):
+        response = client.post("/api/data/query", json={"sql": "SELECT id FROM players"})
+    assert response.status_code == 200
+    result.close.assert_called_once()
+
+def test_top_players_unknown_metric():
+    """Metrics outside the catalog are rejected"""
+    response = client.get("/api/stats/top-players?season=2024&metric=name")
+    assert response.status_code == 400
+    assert "PPG" in client.get("/api/stats/metrics").json()["metrics"]
+
+def test_analytics_cache_info():
+    """Matchup cache counters are exposed"""
+    info = client.get("/api/analytics/cache").json()
+    assert {"hits", "misses", "size", "maxsize"} <= info.keys()
+
+def test_compare_players_includes_percentiles():
+    """Compared players carry their league percentiles"""
+    response = client.post("/api/stats/compare-players", json={"player_names": ["Test"], "season": 2024})
+    assert response.status_code == 200
+    player = response.json()[0]
+    assert player["percentiles"]["PPG"] == 50.0
+    assert player["z_scores"]["PPG"] == 0.0
+
+def test_similar_players_unknown_player():
+    """Similarity search 404s for unknown players"""
+    with patch.object(api.main.analytics_service, "similar_players", MagicMock(return_value=None)):
+        response = client.get("/api/stats/player/missing/similar")
+    assert response.status_code == 404
+
+def test_simulate_matchup_validates_count():
+    """Simulation counts are bounded"""
+    response = client.post(
+        "/api/analytics/simulate-matchup",
+        json={"team_a_id": "1", "team_b_id": "2", "season": 2025, "simulations": 10**9},
+    )
+    assert response.status_code == 422
+
+def test_rating_history_unknown_team():
+    """Teams without rated games 404"""
+    with patch.object(api.main.analytics_service, "get_rating_history", MagicMock(return_value=[])):
+        response = client.get("/api/analytics/ratings/missing/history")
+    assert response.status_code == 404
+
+def test_get_standings():
+    """Standings are served per league and season"""
+    with patch.object(api.main.analytics_service, "get_standings", MagicMock(return_value=[{"team_id": "1", "rank": 1}])):
+        response = client.get("/api/stats/standings?season=2025")
+    assert response.status_code == 200
+    assert response.json()["standings"][0]["rank"] == 1
+
+
+def test_resolve_name():
+    """Name lookups are validated and served"""
+    matches = [{"kind": "player", "id": "1", "name": "Erik Jönsson", "score": 0.6}]
+    with patch.object(api.main.analytics_service, "resolve_name", MagicMock(return_value=matches)) as resolve:
+        response = client.get("/api/stats/names/resolve?q=erik+jonsen")
+    assert response.status_code == 200
+    assert response.json()["matches"] == matches
+    resolve.assert_called_once_with("erik jonsen", "player", 5)
+
+    assert client.get("/api/stats/names/resolve?q=x&kind=coach").status_code == 422
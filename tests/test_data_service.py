@@ -0,0 +1,165 @@
+import sys
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.core.data_service import DataService  # noqa: E402
+from bbcoach.data import shared  # noqa: E402
+from bbcoach.data.dtypes import STRING  # noqa: E402
+from bbcoach.data.storage import DATA_DIR, load_players, load_teams, save_players, save_teams  # noqa: E402
+import bbcoach.data.storage as storage  # noqa: E402
+
+
+@pytest.fixture(scope="function")
+def clean_data_dir():
+    # Setup
+    if DATA_DIR.exists():
+        shutil.rmtree(DATA_DIR)
+    yield
+    # Teardown
+    if DATA_DIR.exists():
+        shutil.rmtree(DATA_DIR)
+
+
+def test_data_service_reloads_on_version_change(clean_data_dir):
+    service = DataService()
+    with patch("bbcoach.core.data_service.storage_load_players", wraps=load_players) as loader:
+        assert service.load_players().empty
+        assert service.load_players().empty
+        assert loader.call_count == 1  # the empty result is cached
+
+        save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+        assert len(service.load_players()) == 1
+        assert len(service.load_players()) == 1
+        assert loader.call_count == 2
+
+
+def test_data_service_single_flight_load(clean_data_dir):
+    save_players([{"id": f"p{i}", "name": f"Player {i}", "team_id": "1", "season": 2023} for i in range(10)])
+    service = DataService()
+
+    def slow_load(*args, **kwargs):
+        time.sleep(0.2)
+        return load_players(*args, **kwargs)
+
+    start = threading.Barrier(100)
+
+    def request(_):
+        start.wait()
+        return service.load_players()
+
+    with patch("bbcoach.core.data_service.storage_load_players", side_effect=slow_load) as loader:
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            frames = list(pool.map(request, range(100)))
+
+    assert loader.call_count == 1
+    assert all(df is frames[0] for df in frames)
+    assert len(frames[0]) == 10
+
+
+def test_data_service_serves_previous_version_during_reload(clean_data_dir):
+    save_teams([{"id": "1", "name": "Team A", "season": 2023}])
+    service = DataService()
+    old = service.load_teams()
+    save_teams([{"id": "2", "name": "Team B", "season": 2023}])
+
+    loading, release = threading.Event(), threading.Event()
+
+    def blocked_load():
+        loading.set()
+        release.wait(5)
+        return load_teams()
+
+    with patch("bbcoach.core.data_service.storage_load_teams", side_effect=blocked_load):
+        reloader = threading.Thread(target=service.load_teams)
+        reloader.start()
+        assert loading.wait(5)
+        assert service.load_teams() is old  # not blocked by the reload
+        release.set()
+        reloader.join()
+
+    assert len(service.load_teams()) == 2
+
+
+def test_data_status_does_not_load(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    service = DataService()
+    with patch("bbcoach.core.data_service.storage_load_players") as loader:
+        status = service.get_data_status()
+    assert loader.call_count == 0
+    assert status["players_count"] == 1
+    assert status["seasons_in_data"] == [2023]
+    assert not status["has_teams"]
+
+
+def test_data_service_reload_swaps_in_background(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    save_teams([{"id": "1", "name": "Team A", "season": 2023}])
+    service = DataService()
+    old_players = service.load_players()
+    old_index = service.player_index()
+    old_teams = service.load_teams()
+    assert service.reload() == 0  # nothing changed
+
+    save_players([{"id": "p2", "name": "Player 2", "team_id": "1", "season": 2023}])
+    loading, release = threading.Event(), threading.Event()
+
+    def blocked_load(*args, **kwargs):
+        loading.set()
+        release.wait(5)
+        return load_players(*args, **kwargs)
+
+    with patch("bbcoach.core.data_service.storage_load_players", side_effect=blocked_load) as loader:
+        reloader = threading.Thread(target=service.reload)
+        reloader.start()
+        assert loading.wait(5)
+        # Requests during the rebuild are served the previous version
+        assert service.load_players() is old_players
+        assert service.player_index() is old_index
+        release.set()
+        reloader.join()
+
+        assert loader.call_count == 1
+        assert len(service.load_players()) == 2
+        assert service.player_index() is not old_index
+        assert loader.call_count == 1
+    assert service.load_teams() is old_teams  # unchanged dataset kept
+
+
+def test_shared_dataset_is_mapped_once(clean_data_dir):
+    save_players([
+        {"id": f"p{i}", "name": f"Player {i}", "team_id": str(i % 3), "season": 2023, "PPG": float(i)}
+        for i in range(12)
+    ])
+    with patch("bbcoach.core.data_service.settings.shared_dataset", True):
+        first = DataService().load_players()
+        version = storage.dataset_version("players")
+        assert shared._path("players", version).exists()
+
+        # A second worker maps the published copy instead of reading parquet
+        with patch("bbcoach.core.data_service.storage_load_players") as loader:
+            second = DataService().load_players()
+        assert loader.call_count == 0
+
+    pd.testing.assert_frame_equal(first, second)
+    ppg = second["PPG"].to_numpy()
+    assert not ppg.flags.owndata and not ppg.flags.writeable
+    assert np.array_equal(second["PPG"].to_numpy(), first["PPG"].to_numpy())
+    assert second["team_id"].dtype == "category"
+    assert second["name"].dtype == STRING
+
+    # A new version replaces the old file
+    save_players([{"id": "p99", "name": "Player 99", "team_id": "1", "season": 2023}])
+    shared.shared_frame("players", load_players)
+    assert [p.name for p in (DATA_DIR / shared.SHARED_DIR).glob("players-*.arrow")] == [
+        f"players-{storage.dataset_version('players')}.arrow"
+    ]
@@ -0,0 +1,79 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.dtypes import (  # noqa: E402
+    PLAYER_SCHEMA,
+    STRING,
+    apply_dtypes,
+    memory_report,
+    to_records,
+)
+
+
+def make_players():
+    return pd.DataFrame(
+        {
+            "id": ["p1", "p2", "p3"],
+            "name": ["Anna", "Bea", "Cleo"],
+            "team_id": ["1", "1", "2"],
+            "league": ["Women", "Women", "Men"],
+            "season": [2025, 2025, 2024],
+            "GP": [10.0, 12.0, 3.0],
+            "PPG": [12.3, 7.1, np.nan],
+            "raw_stats": [["1", "Anna"], ["2", "Bea"], ["3", "Cleo"]],
+        }
+    )
+
+
+def test_apply_dtypes_schema():
+    df = apply_dtypes(make_players(), PLAYER_SCHEMA)
+
+    assert df["league"].dtype == "category"
+    assert df["team_id"].dtype == "category"
+    assert df["season"].dtype == np.int16
+    assert df["GP"].dtype == np.int16
+    assert df["PPG"].dtype == np.float32
+    assert df["id"].dtype == STRING
+    assert df["name"].dtype == STRING
+    assert df["raw_stats"].dtype == object
+
+
+def test_int16_falls_back_to_float32():
+    raw = make_players()
+    raw["GP"] = [10.0, np.nan, 2.5]
+    df = apply_dtypes(raw, PLAYER_SCHEMA)
+
+    assert df["GP"].dtype == np.float32
+    assert df["GP"].isna().sum() == 1
+
+
+def test_filters_match_uncompacted_frame():
+    raw = make_players()
+    df = apply_dtypes(raw, PLAYER_SCHEMA)
+
+    def select(frame):
+        mask = (frame["season"] == 2025) & (frame["league"] == "Women") & frame["name"].isin(["Anna"])
+        return frame[mask]["id"].tolist()
+
+    assert select(df) == select(raw) == ["p1"]
+    assert df[df["team_id"] == "missing"].empty
+
+
+def test_to_records_keeps_short_floats():
+    records = to_records(apply_dtypes(make_players(), PLAYER_SCHEMA))
+
+    assert records[0]["PPG"] == 12.3
+    assert records[2]["PPG"] is None
+    assert records[0]["season"] == 2025
+
+
+def test_memory_report():
+    raw = make_players()
+    report = memory_report(raw, apply_dtypes(raw, PLAYER_SCHEMA))
+
+    assert report["rows"] == 3
+    assert report["before_bytes_per_row"] == report["before_bytes"] / 3
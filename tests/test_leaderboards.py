@@ -0,0 +1,36 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.leaderboards import Leaderboards, METRICS  # noqa: E402
+from bbcoach.data.player_index import PlayerIndex  # noqa: E402
+
+
+@pytest.fixture
+def players(synthetic_players):
+    return synthetic_players(40)
+
+
+@pytest.fixture
+def boards(players):
+    return Leaderboards(PlayerIndex(players))
+
+
+def test_top_matches_full_sort(players, boards):
+    for league in ["Men", "Women"]:
+        for season in [2024, 2025]:
+            part = players[(players["league"] == league) & (players["season"] == season)]
+            expected = part.dropna(subset=["PPG"]).sort_values("PPG", ascending=False, kind="stable")
+            top = boards.top(league, season, "PPG", 5)
+            assert top["PPG"].tolist() == expected["PPG"].astype("float32").head(5).tolist()
+            assert top["PPG"].notna().all()
+
+
+def test_unknown_metric_and_partition(boards):
+    assert "PPG" in METRICS and "name" not in METRICS
+    assert boards.metrics == ["PPG", "RPG", "GP"]
+    assert boards.top("Men", 2024, "APG").empty
+    assert boards.top("Men", 1999, "PPG").empty
+    assert boards.top("Men", 2024, "PPG", 0).empty
@@ -0,0 +1,71 @@
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.names import NameIndex, team_aliases  # noqa: E402
+
+
+def make_players():
+    return pd.DataFrame({
+        "id": ["1", "1", "2", "3", "4", "5"],
+        "name": ["Erik Jonson", "Erik Jönsson", "John Smith", "John Smithson", "Anna Öberg", "John Smith"],
+        "season": [2024, 2025, 2025, 2025, 2025, 2024],
+    })
+
+
+def make_teams():
+    return pd.DataFrame({"id": ["10", "11"], "name": ["Högsbo Basket", "BC Luleå"]})
+
+
+def test_mentions_are_accent_insensitive_whole_words():
+    names = NameIndex.for_players(make_players())
+    found = names.mentions("How does erik jonsson compare to ANNA OBERG?")
+    assert [(m["id"], m["name"]) for m in found] == [("1", "Erik Jönsson"), ("4", "Anna Öberg")]
+    # Not inside another word
+    assert names.mentions("Banna oberg") == []
+
+
+def test_mentions_prefer_longest_name():
+    names = NameIndex.for_players(make_players())
+    found = names.mentions("is john smithson better than john smith")
+    assert found[0]["id"] == "3"
+    assert {m["id"] for m in found[1:]} == {"2", "5"}
+    assert found[0]["match"] == "john smithson"
+
+
+def test_players_named_as_latest_season():
+    names = NameIndex.for_players(make_players())
+    assert len(names) == 5
+    assert names.mentions("erik jonson") == []
+
+
+def test_resolve_exact_and_fuzzy():
+    names = NameIndex.for_players(make_players())
+    exact = names.resolve("JOHN SMITH")
+    assert sorted((m["id"], m["score"]) for m in exact) == [("2", 1.0), ("5", 1.0)]
+
+    fuzzy = names.resolve("Erik Jonsen")
+    assert fuzzy[0]["id"] == "1"
+    assert 0.4 <= fuzzy[0]["score"] < 1.0
+    assert [m["score"] for m in fuzzy] == sorted((m["score"] for m in fuzzy), reverse=True)
+
+    assert names.resolve("Zlatan") == []
+    assert names.resolve("") == []
+
+
+def test_team_aliases():
+    assert team_aliases("Högsbo Basket") == ["hogsbo basket", "hogsbo"]
+    names = NameIndex.for_teams(make_teams())
+    assert names.resolve("hogsbo")[0]["name"] == "Högsbo Basket"
+    assert names.resolve("Lulea")[0]["id"] == "11"
+    assert [m["kind"] for m in names.mentions("Luleå at Högsbo")] == ["team", "team"]
+
+
+def test_empty_index():
+    names = NameIndex.for_players(pd.DataFrame())
+    assert len(names) == 0
+    assert names.mentions("John Smith") == []
+    assert names.resolve("John Smith") == []
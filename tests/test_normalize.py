@@ -0,0 +1,98 @@
+import sys
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.normalize import (  # noqa: E402
+    normalize_player_stats,
+    normalize_player_stats_rowwise,
+    round1,
+)
+
+STAT_COLUMNS = ["GP", "PPG", "RPG", "APG", "MIN", "TO", "3P%", "FG%", "EFF", "SPG", "BPG"]
+
+# Tokens seen in scraped tables plus the awkward ones the heuristics trip on
+TOKENS = [
+    "-", "0", "1", "2", "3", "7", "12", "25", "42", "99", "120", "310",
+    "0.15", "2.675", "3.0", "4.5", "10.2", "21.7", "45.5", "101.0",
+    "45%", "33.3%", "x%", "abc", "", "nan", " 12 ", "-0", "1e2",
+]
+
+
+def make_players(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = {
+            "id": str(i),
+            "name": f" Player {i} ",
+            "team_id": str(i % 12),
+            "season": 2024,
+            "league": "Men",
+        }
+        kind = rng.random()
+        if kind < 0.15:
+            # Newer rows: no raw_stats, trust the stat columns
+            row["raw_stats"] = None
+            row["PPG"] = rng.choice([np.nan, 12.3, 0.0])
+            row["RPG"] = rng.choice([25.0, 4.0])
+            row["MIN"] = rng.choice([3.0, 50.0, 20.0])
+        else:
+            length = rng.choice([0, 3, 5, 6, 7, 9, 12, 19, 22, 24])
+            row["raw_stats"] = np.array(
+                [rng.choice(TOKENS) for _ in range(length)], dtype=object
+            )
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def assert_bit_identical(a, b):
+    for col in STAT_COLUMNS:
+        x = a[col].to_numpy(dtype=np.float64)
+        y = b[col].to_numpy(dtype=np.float64)
+        assert np.array_equal(x.view(np.int64), y.view(np.int64)), col
+    assert a["name"].tolist() == b["name"].tolist()
+
+
+def test_matches_rowwise_reference():
+    df = make_players(3000)
+    expected = normalize_player_stats_rowwise(df.copy())
+    actual = normalize_player_stats(df.copy())
+    assert_bit_identical(actual, expected)
+
+
+def test_matches_rowwise_reference_with_non_string_cells():
+    df = make_players(500, seed=3)
+    df.at[0, "raw_stats"] = ["P", None, 7, 30, "5", 2.5, 3, None, 20]
+    df.at[1, "raw_stats"] = "not a list"
+    expected = normalize_player_stats_rowwise(df.copy())
+    actual = normalize_player_stats(df.copy())
+    assert_bit_identical(actual, expected)
+
+
+def test_totals_row_is_divided_by_games():
+    df = pd.DataFrame(
+        [{"id": "1", "name": "P", "raw_stats": ["P", "-", "-", "42", "10", "3.0", "2"]}]
+    )
+    out = normalize_player_stats(df)
+    assert out.iloc[0]["PPG"] == 21.0
+    assert out.iloc[0]["RPG"] == 5.0
+    assert out.iloc[0]["APG"] == 1.5
+
+
+def test_round1_matches_python_round():
+    rng = np.random.default_rng(1)
+    values = np.concatenate(
+        [
+            rng.uniform(-100, 100, 20000),
+            np.arange(0, 100, 0.05),
+            np.array([0.15, 0.25, 0.35, 2.675, 1.45, -0.05, np.nan, np.inf]),
+        ]
+    )
+    expected = np.array([round(float(v), 1) for v in values])
+    actual = round1(values)
+    np.testing.assert_array_equal(actual.view(np.int64), expected.view(np.int64))
@@ -0,0 +1,51 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.analytics import create_radar_chart  # noqa: E402
+from bbcoach.data.percentiles import Percentiles  # noqa: E402
+from bbcoach.data.player_index import PlayerIndex  # noqa: E402
+
+
+@pytest.fixture
+def players(synthetic_players):
+    # Whole-number stats, so ranks tie
+    return synthetic_players(60, decimals=0)
+
+
+@pytest.fixture
+def engine(players):
+    return Percentiles(PlayerIndex(players))
+
+
+def test_lookup_matches_full_partition_ranks(players, engine):
+    percentiles, zscores = engine.lookup(players, ["PPG", "RPG"])
+    for (league, season), part in players.groupby(["league", "season"], observed=True):
+        for metric in ["PPG", "RPG"]:
+            values = part[metric].astype(float)
+            dist = values.dropna()
+            for i, value in values.items():
+                if np.isnan(value):
+                    assert np.isnan(percentiles.loc[i, metric])
+                    continue
+                expected = 50.0 * ((dist < value).mean() + (dist <= value).mean())
+                assert np.isclose(percentiles.loc[i, metric], expected)
+                assert np.isclose(zscores.loc[i, metric], (value - dist.mean()) / dist.std(ddof=0))
+                assert np.isclose(engine.percentile(league, season, metric, value), expected)
+
+
+def test_unknown_partitions_and_metrics(players, engine):
+    assert engine.percentile("Men", 1999, "PPG", 10.0) is None
+    assert engine.zscore("Men", 2024, "PPG", np.nan) is None
+    assert list(engine.lookup(players, ["PPG", "name"])[0].columns) == ["PPG"]
+    assert engine.lookup(players.iloc[0:0])[0].empty
+
+
+def test_radar_chart_plots_percentiles(players, engine):
+    fig = create_radar_chart(players.iloc[:3], ["PPG", "RPG"], percentiles=engine)
+    assert len(fig.data) == 3
+    assert fig.layout.polar.radialaxis.range == (0, 100)
+    assert all(0 <= r <= 100 for trace in fig.data for r in trace.r if not np.isnan(r))
@@ -0,0 +1,64 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.dtypes import PLAYER_SCHEMA, apply_dtypes  # noqa: E402
+from bbcoach.data.player_index import PlayerIndex, normalize_name  # noqa: E402
+
+
+def player(pid, name, team_id, season, league="Men", ppg=10.0):
+    return {"id": pid, "name": name, "team_id": team_id, "season": season, "league": league, "PPG": ppg}
+
+
+PLAYERS = [
+    player("p1", "Åsa Öberg", "1", 2025, "Women", 12.0),
+    player("p2", "John Smith", "10", 2025),
+    player("p3", "Erik Berg", "11", 2025),
+    player("p2", "John Smith", "10", 2024),
+    player("p4", "Anna Lind", "1", 2024, "Women"),
+    player("p5", "Karl Nord", "10", 2025),
+]
+
+
+def make_index():
+    return PlayerIndex(apply_dtypes(pd.DataFrame(PLAYERS), PLAYER_SCHEMA))
+
+
+def test_partition_and_team_lookups_are_views():
+    index = make_index()
+    men = index.partition("Men", 2025)
+    assert sorted(men["id"]) == ["p2", "p3", "p5"]
+    assert np.shares_memory(men["PPG"].to_numpy(), index.frame["PPG"].to_numpy())
+
+    roster = index.team("10", 2025)
+    assert sorted(roster["id"]) == ["p2", "p5"]
+    assert np.shares_memory(roster["PPG"].to_numpy(), index.frame["PPG"].to_numpy())
+
+    assert len(index.team("10")) == 3
+    assert len(index.partition(season=2025)) == 4
+    assert len(index.partition(league="Women")) == 2
+    assert index.partition("Men", 1999).empty
+    assert index.team("missing", 2025).empty
+
+
+def test_player_and_name_lookups():
+    index = make_index()
+    assert sorted(index.player("p2")["season"]) == [2024, 2025]
+    assert normalize_name("  ÅSA  öberg ") == "asa oberg"
+    assert index.by_name("asa oberg")["id"].tolist() == ["p1"]
+    assert sorted(index.by_names(["john smith", "Erik Berg", "Nobody"])["id"]) == ["p2", "p2", "p3"]
+
+
+def test_seasons_and_empty_frame():
+    index = make_index()
+    assert index.seasons("Men") == [2025, 2024]
+    assert index.leagues() == ["Men", "Women"]
+
+    empty = PlayerIndex(pd.DataFrame())
+    assert len(empty) == 0
+    assert empty.seasons() == []
+    assert empty.partition("Men", 2025).empty
+    assert empty.by_name("John Smith").empty
@@ -0,0 +1,102 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.storage import save_players, save_teams, DATA_DIR  # noqa: E402
+import bbcoach.data.storage as storage  # noqa: E402
+from bbcoach.data.query import query, QueryError  # noqa: E402
+import shutil
+
+
+@pytest.fixture(scope="function")
+def clean_data_dir():
+    if DATA_DIR.exists():
+        shutil.rmtree(DATA_DIR)
+    yield
+    if DATA_DIR.exists():
+        shutil.rmtree(DATA_DIR)
+
+
+def test_query_resolves_latest_rows(clean_data_dir):
+    save_players([
+        {"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "league": "Men", "PPG": 10.0},
+        {"id": "p2", "name": "Player 2", "team_id": "1", "season": 2023, "league": "Men", "PPG": 20.0},
+    ])
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "league": "Men", "PPG": 14.0}])
+    save_teams([{"id": "1", "name": "Team A", "season": 2023, "league": "Men"}])
+
+    table = query(
+        "SELECT p.name, p.PPG, t.name AS team FROM players p "
+        "JOIN teams t ON t.id = p.team_id AND t.season = p.season "
+        "WHERE p.PPG > ? ORDER BY p.PPG",
+        [12],
+    ).read_all()
+
+    assert table.column("name").to_pylist() == ["Player 1", "Player 2"]
+    assert table.column("PPG").to_pylist() == [14.0, 20.0]
+    assert table.column("team").to_pylist() == ["Team A", "Team A"]
+
+
+def test_query_streams_batches_with_row_cap(clean_data_dir):
+    save_players([
+        {"id": f"p{i}", "name": f"Player {i}", "team_id": "1", "season": 2023, "league": "Men"}
+        for i in range(50)
+    ])
+
+    reader = query("SELECT id FROM players", max_rows=25, batch_rows=10)
+    batches = list(reader)
+    assert sum(b.num_rows for b in batches) == 25
+    assert len(batches) > 1
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP VIEW players",
+    "SELECT 1; SELECT 2",
+    "COPY (SELECT 1) TO 'out.csv'",
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "SELECT * FROM missing_table",
+])
+def test_query_rejects_unsafe_sql(clean_data_dir, sql):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    with pytest.raises(QueryError):
+        query(sql).read_all()
+
+
+def test_query_timeout(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    with pytest.raises(QueryError):
+        query("SELECT count(*) FROM range(10000000000) a, range(1000) b", timeout=0.1).read_all()
+
+
+def exclusive_lock_free(name):
+    with storage._read_lock(name, shared=False, blocking=False) as held:
+        return held
+
+
+def test_abandoned_query_releases_read_locks(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+
+    result = query("SELECT * FROM range(1000000)", batch_rows=1000)
+    batches = iter(result)
+    next(batches)
+    assert not exclusive_lock_free("players")
+    result.close()
+    assert exclusive_lock_free("players")
+
+    with query("SELECT * FROM range(1000000)", batch_rows=1000) as result:
+        batches = iter(result)
+        next(batches)
+        assert not exclusive_lock_free("players")
+    assert exclusive_lock_free("players")
+
+
+def test_query_error_while_streaming(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    sql = "SELECT CAST(CASE WHEN range < 300000 THEN '1' ELSE 'a' END AS INTEGER) FROM range(400000)"
+    result = query(sql, batch_rows=1000)
+    with pytest.raises(QueryError):
+        for _ in result:
+            pass
+    assert exclusive_lock_free("players")
@@ -0,0 +1,75 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.analytics import create_win_loss_trend  # noqa: E402
+from bbcoach.data.ratings import ELO_INITIAL, RatingEngine, completed_games  # noqa: E402
+
+
+def test_completed_games_one_row_per_game(game, schedule, season_games):
+    games = completed_games(schedule(*season_games, game(9, "2", "1", None, None)))
+    assert len(games) == 4
+    assert games[["home_id", "away_id", "home_points", "away_points"]].iloc[2].tolist() == ["3", "1", 60, 90]
+    assert not games["neutral"].any()
+
+
+def test_ratings_and_history(schedule, season_games):
+    engine = RatingEngine().update(schedule(*season_games))
+    table = engine.ratings(2025, "Men")
+    assert table["team_id"].tolist()[0] == "1"
+    assert np.isclose(table["elo"].mean(), ELO_INITIAL)  # Elo is zero-sum
+    assert np.isclose(table["srs"].sum(), 0)
+    assert table.set_index("team_id").loc["1", ["wins", "losses"]].tolist() == [3, 0]
+
+    history = engine.history("1")
+    assert history["won"].tolist() == [True, True, True]
+    assert history["date"].is_monotonic_increasing
+    assert history["elo"].iloc[-1] == engine.team_rating("1")["elo"]
+
+    p = engine.win_probability("1", "2", 2025)
+    assert p > 0.5 and np.isclose(p + engine.win_probability("2", "1", 2025), 1)
+    assert engine.win_probability("1", "missing") is None
+    assert engine.history("missing").empty
+
+
+def test_srs_fits_consistent_margins():
+    # Neutral-court games where 1 is 10 better than 2 and 2 is 5 better than 3
+    games = pd.DataFrame([
+        {"team_id": "1", "opponent_id": "2", "result": "80-70", "season": 2025, "league": "Men"},
+        {"team_id": "2", "opponent_id": "3", "result": "75-70", "season": 2025, "league": "Men"},
+        {"team_id": "1", "opponent_id": "3", "result": "85-70", "season": 2025, "league": "Men"},
+    ])
+    srs = RatingEngine().update(games).ratings().set_index("team_id")["srs"]
+    assert np.allclose([srs["1"] - srs["2"], srs["2"] - srs["3"]], [10, 5])
+
+
+def test_new_games_are_applied_incrementally(game, schedule, season_games):
+    first = RatingEngine().update(schedule(*season_games[:2]))
+    assert (first.applied, first.replayed) == (2, 1)
+
+    second = first.update(schedule(*season_games))
+    assert (second.applied, second.replayed) == (2, 0)
+    full = RatingEngine().update(schedule(*season_games))
+    assert second.ratings().equals(full.ratings())
+    assert second.history("1").equals(full.history("1"))
+    # The earlier engine is unchanged
+    assert first.team_rating("1")["games"] == 1
+
+    # Unchanged partitions are shared, a game in the past replays
+    other_season = [game(1, "1", "2", 70, 60, season=2024)]
+    third = second.update(schedule(*season_games, *other_season))
+    assert (third.applied, third.replayed) == (1, 1)
+    backfilled = third.update(schedule(game(2, "3", "2", 70, 71), *season_games, *other_season))
+    assert (backfilled.applied, backfilled.replayed) == (5, 1)
+    assert backfilled.update(schedule(game(2, "3", "2", 70, 71), *season_games, *other_season)).applied == 0
+
+
+def test_momentum_chart_from_history(schedule, season_games):
+    engine = RatingEngine().update(schedule(*season_games))
+    fig = create_win_loss_trend("Team 3", engine.history("3"))
+    assert list(fig.data[0].y) == [-1, -2, -3]
+    assert len(fig.data[1].y) == 3
+    assert create_win_loss_trend("Nobody", engine.history("missing")) is None
@@ -0,0 +1,84 @@
+import sys
+import os
+import shutil
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.schedule import SCHEDULE_TZ, ScheduleIndex, parse_dates  # noqa: E402
+import bbcoach.data.storage as storage  # noqa: E402
+
+
+def game(team_id, opponent_id, date, result="Scheduled"):
+    return {
+        "date": date,
+        "team_id": team_id,
+        "opponent": f"Team {opponent_id}",
+        "opponent_id": opponent_id,
+        "result": result,
+        "league": "Men",
+        "season": 2025,
+    }
+
+
+GAMES = [
+    game("1", "2", "Oct 12, 2025, 6:00 PM"),
+    game("1", "3", "Oct 5, 2025, 7:00 PM", "80-70"),
+    game("1", "2", "Unknown"),
+    game("1", "2", "Sep 28, 2025", "60-75"),
+    game("2", "1", "Oct 12, 2025, 6:00 PM"),
+]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path / "data_storage")
+    yield storage.DATA_DIR
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def test_parse_dates_is_tz_aware():
+    dates = parse_dates(pd.Series(["Oct 5, 2025, 7:00 PM", "Unknown", None]))
+
+    assert str(dates.dt.tz) == SCHEDULE_TZ
+    assert dates.iloc[0] == pd.Timestamp("2025-10-05 19:00", tz=SCHEDULE_TZ)
+    assert dates.iloc[1:].isna().all()
+
+
+def test_games_between_and_next_game():
+    index = ScheduleIndex(pd.DataFrame(GAMES))
+
+    games = index.games_between("1")
+    assert games["date_text"].tolist() == [
+        "Sep 28, 2025", "Oct 5, 2025, 7:00 PM", "Oct 12, 2025, 6:00 PM", "Unknown",
+    ]
+
+    october = index.games_between("1", "2025-10-01", "2025-11-01")
+    assert october["opponent_id"].tolist() == ["3", "2"]
+
+    nxt = index.next_game("1", now=pd.Timestamp("2025-10-06", tz=SCHEDULE_TZ))
+    assert nxt["date_text"] == "Oct 12, 2025, 6:00 PM"
+    assert index.next_game("1", now="2026-01-01") is None
+    assert index.next_game("missing") is None
+
+
+def test_head_to_head():
+    index = ScheduleIndex(pd.DataFrame(GAMES))
+
+    h2h = index.head_to_head("1", "2")
+    assert h2h["result"].tolist() == ["60-75", "Scheduled", "Scheduled"]
+    assert index.head_to_head("2", "3").empty
+
+
+def test_schedule_store_parses_and_sorts(data_dir):
+    storage.save_schedule(GAMES)
+
+    df = storage.load_schedule()
+    assert isinstance(df["date"].dtype, pd.DatetimeTZDtype)
+    assert df["team_id"].tolist() == ["1", "1", "1", "1", "2"]
+    assert df["date"].iloc[:3].is_monotonic_increasing
+    assert df["date"].iloc[3] is pd.NaT
+
+    on_disk = pd.read_parquet(data_dir / "schedule" / "league=Men" / "season=2025")
+    assert isinstance(on_disk["date"].dtype, pd.DatetimeTZDtype)
@@ -0,0 +1,64 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.player_index import PlayerIndex  # noqa: E402
+from bbcoach.data.similarity import FEATURES, SimilarityIndex, feature_matrix  # noqa: E402
+
+
+@pytest.fixture
+def players(synthetic_players):
+    # Genius rows carry steals under STPG only
+    stats = {("STPG" if feature == "SPG" else feature): 30 for feature in FEATURES}
+    return synthetic_players(80, teams=6, stats=stats, missing=(4, 9))
+
+
+def brute_force(players, player_id, league=None):
+    frame = players.reset_index(drop=True)
+    raw = feature_matrix(frame)
+    vectors = np.zeros_like(raw)
+    for _, part in frame.groupby(["league", "season"], observed=True):
+        block = raw[part.index]
+        mean = np.nanmean(block, axis=0)
+        std = np.nanstd(block, axis=0)
+        vectors[part.index] = np.nan_to_num((block - mean) / np.where(std > 0, std, 1.0))
+    query = vectors[frame.index[frame["id"] == player_id][0]]
+    mask = (frame["id"] != player_id).to_numpy()
+    if league is not None:
+        mask &= (frame["league"] == league).to_numpy()
+    distances = np.sqrt(((vectors - query) ** 2).sum(axis=1))
+    order = np.argsort(np.where(mask, distances, np.inf), kind="stable")[: mask.sum()]
+    return frame["id"].to_numpy()[order].tolist(), distances[order]
+
+
+def test_nearest_players_match_brute_force(players):
+    index = SimilarityIndex(PlayerIndex(players))
+    for player_id, league in [("p1", None), ("p3", "Women"), ("p4", "Men")]:
+        expected_ids, expected_distances = brute_force(players, player_id, league)
+        similar = index.similar_players(player_id, k=5, league=league)
+        assert similar["id"].tolist() == expected_ids[:5]
+        assert np.allclose(similar["distance"], expected_distances[:5])
+
+
+def test_filters_and_unknown_player(players):
+    index = SimilarityIndex(PlayerIndex(players))
+    similar = index.similar_players("p1", k=50, target_season=2024, min_games=10)
+    assert (similar["season"] == 2024).all()
+    assert (similar["GP"] >= 10).all()
+    assert "p1" not in similar["id"].tolist()
+    assert index.similar_players("missing").empty
+    assert index.similar_players("p1", season=1999).empty
+
+
+def test_rebuild_reuses_unchanged_partitions(players):
+    first = SimilarityIndex(PlayerIndex(players))
+
+    changed = players.copy()
+    changed.loc[changed["league"] == "Women", "EFF"] += 1.0
+    second = SimilarityIndex(PlayerIndex(changed), previous=first)
+    assert second.reused == 2  # the two Men seasons
+    fresh = SimilarityIndex(PlayerIndex(changed))
+    assert np.array_equal(second.vectors, fresh.vectors)
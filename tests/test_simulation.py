@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.ratings import completed_games  # noqa: E402
+from bbcoach.data.schedule import game_scores  # noqa: E402
+from bbcoach.simulation import DEFAULT_SCORE_SD, fit_matchup, simulate_games, simulate_matchup  # noqa: E402
+
+AGGREGATES = {("1", 2025): {"total_ppg": 78.0}, ("2", 2025): {"total_ppg": 72.0}}
+
+SCHEDULE = pd.DataFrame({
+    "team_id": ["1", "2", "1", "3", "2"],
+    "opponent_id": ["2", "1", "3", "1", "3"],
+    "result": ["80-70", "80-70", "60-75", "60-75", "Scheduled"],
+    "home_away": ["Home", "Away", "Away", "Home", "Home"],
+    "league": ["Men"] * 5,
+    "season": [2025] * 5,
+})
+
+
+def test_game_scores_from_team_side():
+    points_for, points_against = game_scores(SCHEDULE)
+    assert points_for[:4].tolist() == [80, 70, 75, 60]
+    assert points_against[:4].tolist() == [70, 80, 60, 75]
+    assert np.isnan(points_for[4]) and np.isnan(points_against[4])
+
+
+def test_simulation_is_seeded_and_consistent():
+    first = simulate_games(80.0, 75.0, 11.0, simulations=20_000, seed=7)
+    assert first == simulate_games(80.0, 75.0, 11.0, simulations=20_000, seed=7)
+    assert first["win_probability_a"] + first["win_probability_b"] == 1.0
+    # P(N(5, 11 * sqrt(2)) > 0)
+    assert abs(first["win_probability_a"] - 0.626) < 0.02
+    assert first["score_quantiles_a"]["p50"] == 80.0
+    assert first["margin_quantiles"]["p5"] < 0 < first["margin_quantiles"]["p95"]
+
+    even = simulate_games(70.0, 70.0, 10.0, simulations=20_000)
+    assert abs(even["win_probability_a"] - 0.5) < 0.02
+    assert 0 < even["overtime_rate"] < 0.1
+
+
+def test_simulation_latency_budget():
+    simulate_games(80.0, 75.0, 11.0)
+    start = time.perf_counter()
+    simulate_games(80.0, 75.0, 11.0, simulations=100_000)
+    assert time.perf_counter() - start < 0.25  # budget is 50 ms; slack for CI
+
+
+def test_fit_blends_results_with_rotation_ppg():
+    games = completed_games(SCHEDULE)
+    model = fit_matchup(AGGREGATES, games, "1", "2", 2025)
+    assert (model["games_a"], model["games_b"]) == (2, 1)
+    offense_a = 2 / 7 * 77.5 + 5 / 7 * 78.0
+    defense_b = 1 / 6 * 80 / 71.25 + 5 / 6
+    assert np.isclose(model["mean_a"], offense_a * defense_b)
+    assert model["sd"] == DEFAULT_SCORE_SD
+    assert model["league"] == "Men"
+
+    no_results = fit_matchup(AGGREGATES, None, "1", "2", 2025)
+    assert (no_results["mean_a"], no_results["mean_b"]) == (78.0, 72.0)
+    assert fit_matchup(AGGREGATES, None, "1", "9", 2025) is None
+    assert simulate_matchup(AGGREGATES, games, "1", "2", 2025, 1000)["model"] == model
+
+
+def test_fit_uses_the_teams_league_only(game, schedule):
+    women = schedule(game(2, "4", "5", 100, 95), game(4, "5", "4", 98, 91))
+    women["league"] = "Women"
+    mixed = completed_games(pd.concat([SCHEDULE, women], ignore_index=True))
+
+    model = fit_matchup(AGGREGATES, mixed, "1", "2", 2025)
+    assert model == fit_matchup(AGGREGATES, completed_games(SCHEDULE), "1", "2", 2025)
+    assert fit_matchup(AGGREGATES, mixed, "1", "2", 2025, league="Women")["games_a"] == 0
+
+
+def test_fit_spread_from_results(game, schedule, season_games):
+    games = completed_games(schedule(*season_games, game(9, "2", "1", 90, 60), game(11, "2", "3", 70, 66)))
+    scored = {"1": [80, 90, 85, 60], "2": [70, 75, 90, 70], "3": [72, 60, 65, 66]}
+    residuals = np.concatenate([np.array(p) - np.mean(p) for p in scored.values()])
+
+    model = fit_matchup(AGGREGATES, games, "1", "2", 2025)
+    assert (model["games_a"], model["games_b"]) == (4, 4)
+    assert np.isclose(model["sd"], np.sqrt((residuals ** 2).mean()))
+    assert simulate_matchup(AGGREGATES, games, "1", "2", 2025, 1000)["model"]["sd"] == model["sd"]
@@ -0,0 +1,44 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.standings import COLUMNS, Standings  # noqa: E402
+
+
+@pytest.fixture
+def standings(game, schedule, season_games):
+    rows = schedule(*season_games, game(9, "2", "1", 90, 60), game(11, "2", "3", None, None))
+    rows["team_name"] = "Team " + rows["team_id"]
+    return Standings(rows)
+
+
+def test_league_table(standings):
+    table = standings.table("Men", 2025)
+    assert list(table.columns) == COLUMNS
+    assert table["team_id"].tolist() == ["1", "2", "3"]
+    assert table["rank"].tolist() == [1, 2, 3]
+
+    first = table.iloc[0]
+    assert (first["wins"], first["losses"], first["games"]) == (3, 1, 4)
+    assert (first["home_wins"], first["home_losses"], first["away_wins"], first["away_losses"]) == (2, 0, 1, 1)
+    assert (first["points_for"], first["points_against"], first["point_diff"]) == (315, 285, 30)
+    assert (first["form"], first["streak"]) == ("WWWL", "L1")
+    assert first["team_name"] == "Team 1"
+
+    assert table["games_behind"].tolist() == [0.0, 0.5, 2.5]
+    assert table["streak"].tolist() == ["L1", "W2", "L3"]
+
+
+def test_form_is_last_games_only(game, schedule):
+    rows = schedule(*[game(day, "1", "2", 80 + day % 2 * 20, 90) for day in range(1, 9)])
+    table = Standings(rows).table("Men", 2025).set_index("team_id")
+    assert table.loc["1", "form"] == "LWLWL"
+    assert table.loc["2", "streak"] == "W1"
+
+
+def test_unknown_partition_and_team(standings):
+    assert standings.table("Women", 2025).empty
+    assert standings.team("3", 2025)["streak"] == "L3"
+    assert standings.team("missing", 2025) is None
@@ -1,12 +1,25 @@
+import sys
+import os
 import pytest
-from bbcoach.data.storage import (
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from bbcoach.data.storage import (  # noqa: E402
     save_players,
     load_players,
     save_teams,
     load_teams,
+    migrate_legacy_files,
+    compact_dataset,
+    wait_for_compaction,
     DATA_DIR,
 )
+import bbcoach.data.migrations as migrations  # noqa: E402
+import bbcoach.data.storage as storage  # noqa: E402
+import multiprocessing
 import shutil
+from unittest.mock import patch
 
 
 @pytest.fixture(scope="function")
@@ -52,3 +65,305 @@ def test_incremental_save(clean_data_dir):
 
     df = load_players()
     assert len(df) == 2
+
+
+def test_partitioned_layout(clean_data_dir):
+    save_players(
+        [
+            {"id": "p1", "name": "Player 1", "team_id": "1", "season": 2024, "league": "Men"},
+            {"id": "p2", "name": "Player 2", "team_id": "2", "season": 2025, "league": "Women"},
+        ]
+    )
+
+    assert (DATA_DIR / "players" / "league=Men" / "season=2024").is_dir()
+    assert (DATA_DIR / "players" / "league=Women" / "season=2025").is_dir()
+    assert not (DATA_DIR / "players.parquet").exists()
+
+
+def test_load_players_partition_and_columns(clean_data_dir):
+    save_players(
+        [
+            {"id": "p1", "name": "Player 1", "team_id": "1", "season": 2024, "league": "Men", "PPG": 10.0},
+            {"id": "p2", "name": "Player 2", "team_id": "2", "season": 2025, "league": "Men", "PPG": 12.0},
+            {"id": "p3", "name": "Player 3", "team_id": "3", "season": 2025, "league": "Women", "PPG": 14.0},
+        ]
+    )
+
+    df = load_players(league="Men", season=2025, columns=["name", "PPG"])
+    assert list(df.columns) == ["name", "PPG"]
+    assert df["name"].tolist() == ["Player 2"]
+
+
+def test_save_only_rewrites_touched_partition(clean_data_dir):
+    save_players([{"id": "p1", "name": "Old", "team_id": "1", "season": 2024}])
+    untouched = next((DATA_DIR / "players" / "league=Men" / "season=2024").iterdir())
+    mtime = untouched.stat().st_mtime_ns
+
+    save_players([{"id": "p2", "name": "New", "team_id": "1", "season": 2025}])
+
+    assert untouched.stat().st_mtime_ns == mtime
+    assert len(load_players()) == 2
+
+
+def test_legacy_file_is_migrated(clean_data_dir):
+    DATA_DIR.mkdir(parents=True)
+    pd.DataFrame(
+        [{"id": "1", "name": "Team A", "season": 2023, "url": "http://a"}]
+    ).to_parquet(DATA_DIR / "teams.parquet")
+
+    df = load_teams(season=2023)
+    assert df["name"].tolist() == ["Team A"]
+    assert df["league"].tolist() == ["Men"]
+    assert not (DATA_DIR / "teams.parquet").exists()
+    assert (DATA_DIR / "teams.parquet.migrated").exists()
+
+    migrate_legacy_files()  # Idempotent
+    assert len(load_teams()) == 1
+
+
+def test_last_writer_wins(clean_data_dir):
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "PPG": 10.0}])
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "PPG": 12.5}])
+
+    df = load_players()
+    assert len(df) == 1
+    assert df.iloc[0]["PPG"] == 12.5
+
+
+def test_save_appends_delta_files(clean_data_dir):
+    for i in range(3):
+        save_players([{"id": f"p{i}", "name": f"Player {i}", "team_id": "1", "season": 2023}])
+
+    part_dir = DATA_DIR / "players" / "league=Men" / "season=2023"
+    names = sorted(p.name for p in part_dir.iterdir())
+    assert len(names) == 3
+    assert all(n.startswith("delta-") for n in names)
+
+
+def test_compaction_folds_deltas(clean_data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "COMPACT_MAX_DELTAS", 4)
+    for i in range(4):
+        save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "PPG": float(i)}])
+        save_players([{"id": f"x{i}", "name": f"Extra {i}", "team_id": "1", "season": 2023}])
+    wait_for_compaction()
+
+    part_dir = DATA_DIR / "players" / "league=Men" / "season=2023"
+    names = [p.name for p in part_dir.iterdir()]
+    assert len(names) < 8
+    assert any(n.startswith("base-") for n in names)
+
+    df = load_players()
+    assert len(df) == 5
+    assert df[df["id"] == "p1"].iloc[0]["PPG"] == 3.0
+
+
+def test_compact_dataset_force(clean_data_dir):
+    save_teams([{"id": "1", "name": "Team A", "season": 2023}])
+    save_teams([{"id": "1", "name": "Team A2", "season": 2023}])
+
+    assert compact_dataset("teams", force=True) == 1
+
+    part_dir = DATA_DIR / "teams" / "league=Men" / "season=2023"
+    assert len(list(part_dir.iterdir())) == 1
+    assert load_teams()["name"].tolist() == ["Team A2"]
+
+
+def _save_batches(worker: int, batches: int):
+    for i in range(batches):
+        save_players([{"id": f"w{worker}-{i}", "name": "P", "team_id": "1", "season": 2023}])
+    wait_for_compaction()
+
+
+def test_concurrent_writer_processes(clean_data_dir):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_save_batches, args=(w, 5)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    assert len(load_players()) == 20
+
+
+def test_seq_stays_monotonic_across_processes(clean_data_dir, monkeypatch):
+    # Another process (or a clock ahead of ours) already wrote a later seq
+    storage.ensure_data_dir()
+    future = storage.time.time_ns() + 10**12
+    (DATA_DIR / ".players.seq").write_text(str(future))
+    monkeypatch.setattr(storage, "_last_seq", 0)
+
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+
+    part_dir = DATA_DIR / "players" / "league=Men" / "season=2023"
+    (delta,) = part_dir.iterdir()
+    assert int(storage._file_seq(delta.name)) > future
+
+
+def test_compaction_defers_deletes_while_reading(clean_data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "GC_RETRY_SECONDS", 0)
+    save_teams([{"id": "1", "name": "Team A", "season": 2023}])
+    save_teams([{"id": "1", "name": "Team A2", "season": 2023}])
+    part_dir = DATA_DIR / "teams" / "league=Men" / "season=2023"
+
+    with storage._read_lock("teams"):
+        assert compact_dataset("teams", force=True) == 1
+        assert len(list(part_dir.iterdir())) == 3
+        assert load_teams()["name"].tolist() == ["Team A2"]
+
+    # The left-over files are folded and removed by the next compaction
+    assert compact_dataset("teams", force=True) == 1
+    assert len(list(part_dir.iterdir())) == 1
+    assert load_teams()["name"].tolist() == ["Team A2"]
+
+
+RAW_STATS = ["P", "-", "-", "30", "5", "5", "3", "-", "30", "50%", "40%", "80%"]
+
+
+def test_save_players_normalizes_at_ingest(clean_data_dir):
+    save_players([{"id": "p1", "name": " Old P ", "team_id": "1", "season": 2023, "raw_stats": RAW_STATS}])
+
+    stored = pd.read_parquet(DATA_DIR / "players" / "league=Men" / "season=2023")
+    assert stored.iloc[0]["PPG"] == 10.0
+    assert stored.iloc[0]["name"] == "Old P"
+    assert stored.iloc[0]["schema_version"] == migrations.schema_version("players")
+
+
+def test_run_migrations_upgrades_stored_rows(clean_data_dir, monkeypatch):
+    # Rows written before ingest-time normalization existed
+    storage.ensure_data_dir()
+    raw = pd.DataFrame([{"id": "p1", "name": "Old P", "team_id": "1", "season": 2023, "raw_stats": RAW_STATS}])
+    storage._write_files(storage._with_partition_columns(raw), "players", "delta", storage._next_seq("players"))
+
+    df = load_players()
+    assert df.iloc[0]["PPG"] == 10.0
+    assert (DATA_DIR / ".players.schema").read_text() == str(migrations.schema_version("players"))
+    assert storage.run_migrations("players") is False
+
+    # Nothing is normalized on the read path any more
+    def fail(df):
+        raise AssertionError("normalized on read")
+
+    monkeypatch.setattr(migrations, "normalize_player_stats", fail)
+    assert load_players().iloc[0]["PPG"] == 10.0
+
+
+def player(pid, ppg, name="P"):
+    return {"id": pid, "name": name, "team_id": "1", "season": 2025, "PPG": ppg}
+
+
+def test_snapshots_store_changed_rows_only(clean_data_dir):
+    save_players([player("p1", 10.0), player("p2", 5.0)])
+    save_players([player("p1", 12.0), player("p2", 5.0)])
+    save_players([player("p1", 12.0), player("p2", 5.0)])  # No changes
+
+    snapshots = storage.list_snapshots("players")
+    assert [s["rows"] for s in snapshots] == [2, 1]
+    part_dir = DATA_DIR / "players" / "league=Men" / "season=2025"
+    assert len(list(part_dir.iterdir())) == 2  # The no-op save wrote nothing
+
+
+def test_unchanged_save_keeps_dataset_version(clean_data_dir):
+    save_players([player("p1", 10.0), player("p2", 5.0)])
+    version = storage.dataset_version("players")
+    save_players([player("p2", 5.0)])
+    assert storage.dataset_version("players") == version
+
+    save_players([player("p2", 6.0)])
+    assert storage.dataset_version("players") != version
+
+
+def test_save_reads_only_the_batch_rows(clean_data_dir, monkeypatch):
+    save_players([player(f"p{i}", float(i)) for i in range(50)])
+    reads = []
+    read_files = storage._read_files
+
+    def spy(*args, **kwargs):
+        df = read_files(*args, **kwargs)
+        reads.append(len(df))
+        return df
+
+    monkeypatch.setattr(storage, "_read_files", spy)
+    save_players([player("p7", 70.0), player("new", 1.0)])
+    assert reads == [1]
+    assert load_players().set_index("id").loc["p7", "PPG"] == 70.0
+
+    reads.clear()
+    start = storage.list_snapshots("players")[0]["seq"]
+    deltas = storage.snapshot_deltas("players", start, storage.list_snapshots("players")[-1]["seq"])
+    assert reads == [2, 1]  # The changes, then only their earlier values
+    assert deltas.set_index("id").loc["p7", "PPG_before"] == 7.0
+
+
+def test_load_players_as_of(clean_data_dir):
+    save_players([player("p1", 10.0), player("p2", 5.0)])
+    first = storage.list_snapshots("players")[-1]
+    save_players([player("p1", 12.0), player("p3", 1.0)])
+
+    then = load_players(as_of=first["seq"]).set_index("id")["PPG"].to_dict()
+    assert then == {"p1": 10.0, "p2": 5.0}
+    assert load_players(as_of=first["timestamp"]).set_index("id")["PPG"].to_dict() == then
+    assert load_players(as_of="2000-01-01").empty
+    assert len(load_players()) == 3
+
+
+def test_snapshot_deltas(clean_data_dir):
+    save_players([player("p1", 10.0), player("p2", 5.0)])
+    start = storage.list_snapshots("players")[-1]["seq"]
+    save_players([player("p1", 12.0), player("p3", 1.0)])
+    end = storage.list_snapshots("players")[-1]["seq"]
+
+    deltas = storage.snapshot_deltas("players", start, end, columns=["PPG"]).set_index("id")
+    assert sorted(deltas.index) == ["p1", "p3"]
+    assert deltas.loc["p1", "PPG_delta"] == 2.0
+    assert pd.isna(deltas.loc["p3", "PPG_before"])
+
+
+def test_first_snapshot_records_existing_rows(clean_data_dir):
+    # Rows written before snapshots existed
+    storage.ensure_data_dir()
+    old = pd.DataFrame([player("p1", 10.0)])
+    storage._write_files(storage._with_partition_columns(old), "players", "delta", storage._next_seq("players"))
+
+    save_players([player("p2", 5.0)])
+
+    baseline, latest = storage.list_snapshots("players")
+    assert baseline["baseline"] and baseline["rows"] == 1
+    assert sorted(load_players(as_of=latest["seq"])["id"]) == ["p1", "p2"]
+
+
+def test_dataset_version_tracks_saves(clean_data_dir):
+    assert storage.dataset_version("players") == storage.dataset_version("players")
+    before = storage.dataset_version("players")
+    save_players([{"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023}])
+    after = storage.dataset_version("players")
+    assert after != before
+
+    compact_dataset("players", force=True)
+    assert storage.dataset_version("players") == after
+
+
+def test_dataset_stats_from_metadata(clean_data_dir):
+    save_players([
+        {"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "league": "Men"},
+        {"id": "p2", "name": "Player 2", "team_id": "1", "season": 2024, "league": "Men"},
+    ])
+    save_players([
+        {"id": "p1", "name": "Player 1", "team_id": "1", "season": 2023, "league": "Men", "PPG": 5.0},
+        {"id": "p3", "name": "Player 3", "team_id": "2", "season": 2023, "league": "Women"},
+    ])
+
+    stats = storage.dataset_stats("players")
+    assert stats["rows"] == len(load_players()) == 3
+    assert {(p["league"], p["season"]): p["rows"] for p in stats["partitions"]} == {
+        ("Men", 2023): 1, ("Men", 2024): 1, ("Women", 2023): 1,
+    }
+
+    # Unchanged data is answered from the stats file
+    with patch.object(storage, "_partition_rows") as count:
+        assert storage.dataset_stats("players")["rows"] == 3
+        assert count.call_count == 0
+
+    save_players([{"id": "p4", "name": "Player 4", "team_id": "1", "season": 2023, "league": "Men"}])
+    assert storage.dataset_stats("players")["rows"] == 4
+    assert storage.dataset_stats("teams")["rows"] == 0
@@ -1,18 +1,19 @@
-import pandas as pd
 import os
 import sys
 
 # Ensure src is in path
 sys.path.append(os.path.abspath("src"))
 
+from bbcoach.data.storage import load_players  # noqa: E402
+
 
 def verify_data():
-    if not os.path.exists("data_storage/players.parquet"):
-        print("Error: data_storage/players.parquet not found.")
+    df = load_players()
+    if df.empty:
+        print("Error: no players found in data_storage.")
         return
 
-    df = pd.read_parquet("data_storage/players.parquet")
-    print(f"Loaded players.parquet: {len(df)} rows.")
+    print(f"Loaded players dataset: {len(df)} rows.")
 
     # Filter for Ali Sow
     ali_sow = df[df["name"].str.contains("Ali Sow", case=False, na=False)]